@@ -6,10 +6,23 @@
 # --------------------------------------------------------------
 
 from xml.parsers.expat import model
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import func, select, insert, update, case, cast, literal, and_, tuple_, text, Date
 from . import models, schemas
-from datetime import date, timedelta
+from .utils import archive, catalog_version
+from .utils.report_cache import report_cache
+from datetime import date, datetime, timedelta
+from itertools import islice
+import base64
+import os
+
+# Projects whose items are requested without a fixture (the request form's list).
+# Comma-separated override for deployments that add such a project.
+SKIP_FIXTURE_PROJECTS = {
+    project.strip()
+    for project in os.getenv("SKIP_FIXTURE_PROJECTS", "Hi-Lo,Flying Probe,Development").split(",")
+    if project.strip()
+}
 
 # ---------------- Employee ----------------
 def create_employee(db: Session, emp: schemas.EmployeeCreate, hashed_pw: str):
@@ -75,24 +88,82 @@ def create_or_update_inventory(db: Session, item: schemas.InventoryBase):
     return db_item
 
 def subtract_item_quantity(db: Session, item_id: int, qty: int):
-    """Decrease item quantity atomically (for Request)."""
-    item = get_item(db, item_id)
-    if not item or item.item_current_quantity < qty:
+    """
+    Decrease item quantity atomically (for Request) with a single conditional
+    UPDATE ... RETURNING, so concurrent requests cannot oversell.
+    Does not commit: the caller commits it together with the request transaction.
+    Returns the updated (item_id, item_name, item_current_quantity) row, or None.
+    """
+    if qty <= 0:
         return None
-    item.item_current_quantity -= qty
-    db.commit()
-    db.refresh(item)
-    return item
+    catalog_version.mark_changed(db, "inventory")
+    return db.execute(
+        update(models.Inventory)
+        .where(models.Inventory.item_id == item_id)
+        .where(models.Inventory.item_current_quantity >= qty)
+        .values(item_current_quantity=models.Inventory.item_current_quantity - qty)
+        .returning(
+            models.Inventory.item_id,
+            models.Inventory.item_name,
+            models.Inventory.item_current_quantity,
+        )
+        .execution_options(synchronize_session=False)
+    ).first()
 
 def add_item_quantity(db: Session, item_id: int, qty: int):
-    """Increase item quantity atomically (for Return)."""
-    item = get_item(db, item_id)
-    if not item:
-        return None
-    item.item_current_quantity += qty
-    db.commit()
-    db.refresh(item)
-    return item
+    """
+    Increase item quantity atomically (for Return) with a single UPDATE ... RETURNING.
+    Does not commit: the caller commits it together with the return transaction.
+    Returns the updated (item_id, item_name, item_current_quantity) row, or None.
+    """
+    catalog_version.mark_changed(db, "inventory")
+    return db.execute(
+        update(models.Inventory)
+        .where(models.Inventory.item_id == item_id)
+        .values(item_current_quantity=models.Inventory.item_current_quantity + qty)
+        .returning(
+            models.Inventory.item_id,
+            models.Inventory.item_name,
+            models.Inventory.item_current_quantity,
+        )
+        .execution_options(synchronize_session=False)
+    ).first()
+
+def get_item_alternatives(db: Session, item: models.Inventory):
+    """Return the same item (by name) in other projects that have stock, most stock first."""
+    return (
+        db.query(models.Inventory)
+        .filter(
+            models.Inventory.item_name == item.item_name,
+            models.Inventory.item_id != item.item_id,
+            models.Inventory.item_current_quantity > 0
+        )
+        .order_by(models.Inventory.item_current_quantity.desc())
+        .all()
+    )
+
+def get_fixture_options(db: Session, item: models.Inventory):
+    """Return the fixtures a request for this item can use; none for projects without fixtures."""
+    if not item.project_name or item.project_name in SKIP_FIXTURE_PROJECTS:
+        return []
+    query = db.query(models.Fixture).filter(models.Fixture.project_name == item.project_name)
+    if item.test_area:
+        query = query.filter(models.Fixture.test_area == item.test_area)
+    return query.order_by(models.Fixture.fixture_name).all()
+
+def lock_inventory_items(db: Session, item_ids):
+    """
+    Lock the given inventory rows with SELECT ... FOR UPDATE and return them by item_id.
+    Rows are always locked in item_id order so concurrent batches cannot deadlock.
+    """
+    items = (
+        db.query(models.Inventory)
+        .filter(models.Inventory.item_id.in_(sorted(set(item_ids))))
+        .order_by(models.Inventory.item_id)
+        .with_for_update()
+        .all()
+    )
+    return {item.item_id: item for item in items}
 
 def get_low_stock_items(db: Session):
     """List items below their minimum count."""
@@ -112,6 +183,8 @@ def create_transaction(db: Session, t: schemas.TransactionBase):
         project_name=t.project_name
     )
     db.add(tx)
+    if tx.transaction_type == "request":
+        add_open_checkout(db, tx)
     db.commit()
     db.refresh(tx)
     return tx
@@ -163,16 +236,332 @@ def get_all_transactions(db: Session):
 
 
 
+def get_transaction_history_query(
+    db: Session,
+    test_area: str | None = None,
+    project: str | None = None,
+    transaction_type: str | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+):
+    """
+    Build the filtered transaction history query (transactions joined with item,
+    fixture and employee). Dates are YYYY-MM-DD; end_date is inclusive.
+    """
+    query = (
+        db.query(
+            models.Transaction.transaction_id,
+            models.Transaction.transaction_type,
+            models.Transaction.quantity_used,
+            models.Transaction.created_at,
+            models.Inventory.item_name,
+            models.Inventory.item_part_number,
+            models.Inventory.item_description,
+            models.Inventory.item_manufacturer,
+            models.Inventory.item_unit_price,
+            models.Transaction.test_area,  # Use test_area from Transaction (works for both inventory and fixtures)
+            models.Transaction.project_name,  # Use project_name from Transaction (works for both inventory and fixtures)
+            models.Fixture.fixture_name,
+            models.Employee.employee_name,
+            models.Transaction.fixture_id,
+            models.Transaction.item_id,
+        )
+        .outerjoin(models.Inventory, models.Transaction.item_id == models.Inventory.item_id)  # LEFT JOIN for inventory
+        .outerjoin(models.Fixture, models.Transaction.fixture_id == models.Fixture.fixture_id)  # LEFT JOIN for fixture
+        .join(models.Employee, models.Transaction.employee_id == models.Employee.employee_id)
+    )
+
+    if test_area:
+        query = query.filter(models.Transaction.test_area == test_area)
+
+    if project:
+        query = query.filter(models.Transaction.project_name == project)
+
+    if transaction_type:
+        query = query.filter(models.Transaction.transaction_type == transaction_type.lower())
+
+    if start_date:
+        query = query.filter(models.Transaction.created_at >= parse_history_date(start_date))
+
+    if end_date:
+        # Add one day to include the entire end date
+        query = query.filter(models.Transaction.created_at < parse_history_date(end_date, days=1))
+
+    return query
+
+
+def parse_history_date(value: str, days: int = 0) -> datetime:
+    """Parse a YYYY-MM-DD history filter, plus `days`. Raises ValueError for anything else."""
+    return datetime.strptime(value, "%Y-%m-%d") + timedelta(days=days)
+
+
+def transaction_history_row_to_dict(row):
+    """Convert a get_transaction_history_query() row to the API dict."""
+    return {
+        "transaction_id": row.transaction_id,
+        "transaction_type": row.transaction_type,
+        "quantity_used": row.quantity_used,
+        "created_at": row.created_at,
+        "item_name": row.item_name,
+        "item_part_number": row.item_part_number,
+        "item_description": row.item_description,
+        "item_manufacturer": row.item_manufacturer,
+        "item_unit_price": str(row.item_unit_price) if row.item_unit_price is not None else None,  # Convert Decimal to string
+        "test_area": row.test_area,
+        "project_name": row.project_name,
+        "fixture_name": row.fixture_name,
+        "employee_name": row.employee_name,
+    }
+
+
+def get_transaction_archive_query(db: Session, start: date, end: date):
+    """
+    Query every transaction created in [start, end) with the history columns and
+    the raw fields needed to keep an archived row self-contained.
+    """
+    return (
+        db.query(
+            models.Transaction.transaction_id,
+            models.Transaction.transaction_type,
+            models.Transaction.quantity_used,
+            models.Transaction.created_at,
+            models.Inventory.item_name,
+            models.Inventory.item_part_number,
+            models.Inventory.item_description,
+            models.Inventory.item_manufacturer,
+            models.Inventory.item_unit_price,
+            models.Transaction.test_area,
+            models.Transaction.project_name,
+            models.Fixture.fixture_name,
+            models.Employee.employee_name,
+            models.Transaction.fixture_id,
+            models.Transaction.item_id,
+            models.Transaction.employee_id,
+            models.Transaction.remarks,
+            models.Transaction.request_transaction_id,
+        )
+        .outerjoin(models.Inventory, models.Transaction.item_id == models.Inventory.item_id)
+        .outerjoin(models.Fixture, models.Transaction.fixture_id == models.Fixture.fixture_id)
+        .outerjoin(models.Employee, models.Transaction.employee_id == models.Employee.employee_id)
+        .filter(models.Transaction.created_at >= start)
+        .filter(models.Transaction.created_at < end)
+        .order_by(models.Transaction.created_at.desc(), models.Transaction.transaction_id.desc())
+    )
+
+
+def transaction_archive_row_to_dict(row):
+    """Convert a get_transaction_archive_query() row to an archive record."""
+    record = transaction_history_row_to_dict(row)
+    record.update({
+        "item_id": row.item_id,
+        "fixture_id": row.fixture_id,
+        "employee_id": row.employee_id,
+        "remarks": row.remarks,
+        "request_transaction_id": row.request_transaction_id,
+    })
+    return record
+
+
+def encode_history_cursor(created_at: datetime, transaction_id: int) -> str:
+    """Encode a (created_at, transaction_id) position as an opaque cursor."""
+    raw = f"{created_at.isoformat()}|{transaction_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_history_cursor(cursor: str):
+    """Decode a cursor from encode_history_cursor(). Raises ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, transaction_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(transaction_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def get_transaction_history_page(
+    db: Session,
+    test_area: str | None = None,
+    project: str | None = None,
+    transaction_type: str | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    limit: int = 50,
+    cursor: str | None = None,
+    include_total: bool = False,
+    include_archived: bool = False,
+):
+    """
+    Return one page of transaction history ordered by (created_at, transaction_id) desc.
+    Only limit + 1 rows are read; the total is counted only when include_total is set.
+    With include_archived, pages continue into the archived partitions once the
+    live rows run out (archived rows are always older than live ones).
+    """
+    filters = {
+        "test_area": test_area,
+        "project": project,
+        "transaction_type": transaction_type,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+    query = get_transaction_history_query(db, **filters)
+
+    total = None
+    if include_total:
+        total = query.order_by(None).count()
+        if include_archived:
+            total += sum(1 for _ in archive.iter_archived_rows(**filters))
+
+    position = decode_history_cursor(cursor) if cursor else None
+    if position:
+        query = query.filter(
+            tuple_(models.Transaction.created_at, models.Transaction.transaction_id)
+            < tuple_(*position)
+        )
+
+    rows = [
+        transaction_history_row_to_dict(row)
+        for row in query.order_by(models.Transaction.created_at.desc(), models.Transaction.transaction_id.desc())
+        .limit(limit + 1)
+        .all()
+    ]
+
+    if include_archived and len(rows) <= limit:
+        archived = archive.iter_archived_rows(**filters, before=position)
+        rows += list(islice(archived, limit + 1 - len(rows)))
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_history_cursor(last["created_at"], last["transaction_id"])
+
+    page = {
+        "items": rows,
+        "next_cursor": next_cursor,
+        "limit": limit,
+    }
+    if include_total:
+        page["total"] = total
+    return page
+
+
+def _effective_returned(linked_returned, legacy_returned):
+    """Linked returns win; legacy matches only count for requests with no linked return."""
+    return case((linked_returned == 0, legacy_returned), else_=linked_returned)
+
+
+def returned_quantity_subquery(requests):
+    """
+    Build a subquery of (request_id, linked_returned, legacy_returned, returned)
+    for every request row in `requests`.
+
+    `requests` is a selectable exposing transaction_id, item_id, employee_id,
+    fixture_id and created_at. Returns linked through request_transaction_id
+    are summed in one grouped pass; requests without any linked return fall
+    back to the legacy item/employee/fixture matching, also in one grouped
+    pass. The result never issues a query per request.
+    """
+    returns = aliased(models.Transaction)
+
+    explicit = (
+        select(
+            returns.request_transaction_id.label("request_id"),
+            func.sum(returns.quantity_used).label("returned"),
+        )
+        .where(returns.transaction_type == "return")
+        .where(returns.request_transaction_id.in_(select(requests.c.transaction_id)))
+        .group_by(returns.request_transaction_id)
+        .subquery()
+    )
+
+    # Old returns were not linked to a request, so match them by item/employee/fixture
+    # and only count returns that happened after the request
+    legacy = (
+        select(
+            requests.c.transaction_id.label("request_id"),
+            func.sum(returns.quantity_used).label("returned"),
+        )
+        .select_from(requests)
+        .join(
+            returns,
+            and_(
+                returns.item_id == requests.c.item_id,
+                returns.employee_id == requests.c.employee_id,
+                returns.fixture_id.is_not_distinct_from(requests.c.fixture_id),
+                returns.created_at >= requests.c.created_at,
+            ),
+        )
+        .where(returns.transaction_type == "return")
+        # Exclude returns that are already linked to a request. As before the
+        # column existed, returns with NULL remarks or a REQUEST_TX_ID prefix
+        # (even one pointing at a missing request) never count as legacy matches.
+        .where(returns.request_transaction_id.is_(None))
+        .where(~returns.remarks.like("REQUEST_TX_ID:%"))
+        .group_by(requests.c.transaction_id)
+        .subquery()
+    )
+
+    linked_returned = func.coalesce(explicit.c.returned, 0)
+    legacy_returned = func.coalesce(legacy.c.returned, 0)
+    return (
+        select(
+            requests.c.transaction_id.label("request_id"),
+            linked_returned.label("linked_returned"),
+            legacy_returned.label("legacy_returned"),
+            _effective_returned(linked_returned, legacy_returned).label("returned"),
+        )
+        .select_from(requests)
+        .outerjoin(explicit, explicit.c.request_id == requests.c.transaction_id)
+        .outerjoin(legacy, legacy.c.request_id == requests.c.transaction_id)
+        .subquery()
+    )
+
+
+def get_remaining_quantity(db: Session, request_tx: models.Transaction):
+    """Return how much of a single request transaction can still be returned."""
+    requests = (
+        select(
+            models.Transaction.transaction_id,
+            models.Transaction.item_id,
+            models.Transaction.employee_id,
+            models.Transaction.fixture_id,
+            models.Transaction.created_at,
+        )
+        .where(models.Transaction.transaction_id == request_tx.transaction_id)
+        .subquery()
+    )
+    returned = returned_quantity_subquery(requests)
+    total_returned = db.query(returned.c.returned).scalar() or 0
+    return request_tx.quantity_used - int(total_returned)
+
+
 def get_transactions_by_employee(db: Session, emp_id: int):
-    rows = (
+    """
+    Return the employee's request transactions that are not fully returned yet.
+    Reads the open_checkouts ledger, so remaining_quantity is not re-summed.
+    """
+    return get_open_checkouts(db, employee_id=emp_id)
+
+
+# ---------------- Open checkouts ----------------
+def get_open_checkouts(
+    db: Session,
+    employee_id: int | None = None,
+    all_employees: bool = False,
+    project: str | None = None,
+    test_area: str | None = None,
+):
+    """List open (not fully returned) requests from the open_checkouts ledger."""
+    oc = models.OpenCheckout
+    query = (
         db.query(
-            models.Transaction.transaction_id.label("transaction_id"),
-            models.Transaction.item_id.label("item_id"),
-            models.Transaction.fixture_id.label("fixture_id"),
-            models.Transaction.employee_id.label("employee_id"),
-            models.Transaction.transaction_type.label("transaction_type"),
-            models.Transaction.quantity_used.label("quantity_used"),
-            models.Transaction.created_at.label("created_at"),
+            oc.request_transaction_id.label("transaction_id"),
+            oc.item_id.label("item_id"),
+            oc.fixture_id.label("fixture_id"),
+            oc.employee_id.label("employee_id"),
+            oc.quantity_requested.label("quantity_used"),
+            oc.remaining_quantity.label("remaining_quantity"),
+            oc.requested_at.label("created_at"),
 
             models.Inventory.item_name.label("item_name"),
             models.Inventory.item_part_number.label("item_part_number"),
@@ -185,83 +574,162 @@ def get_transactions_by_employee(db: Session, emp_id: int):
             models.Fixture.fixture_name.label("fixture_name"),
             models.Employee.employee_name.label("employee_name"),
         )
-        .join(models.Inventory, models.Transaction.item_id == models.Inventory.item_id)
-        .outerjoin(models.Fixture, models.Transaction.fixture_id == models.Fixture.fixture_id)  # LEFT JOIN for projects without fixtures
-        .join(models.Employee, models.Transaction.employee_id == models.Employee.employee_id)
-        .filter(models.Transaction.employee_id == emp_id)
-        .filter(models.Transaction.transaction_type == "request")
-        .order_by(models.Transaction.created_at.desc())
-        .all()
+        .join(models.Inventory, oc.item_id == models.Inventory.item_id)
+        .outerjoin(models.Fixture, oc.fixture_id == models.Fixture.fixture_id)  # LEFT JOIN for projects without fixtures
+        .join(models.Employee, oc.employee_id == models.Employee.employee_id)
     )
 
-    # Convert tuple rows to dictionaries and filter out fully returned transactions
-    transactions = []
-    for row in rows:
-        # Calculate total returned quantity for this SPECIFIC request transaction
-        # First, try to match returns that explicitly reference this request_transaction_id in remarks
-        # Format: "REQUEST_TX_ID:123|remarks" or "REQUEST_TX_ID:123"
-        explicit_returns = (
-            db.query(
-                func.coalesce(func.sum(models.Transaction.quantity_used), 0)
-            )
-            .filter(models.Transaction.transaction_type == "return")
-            .filter(models.Transaction.remarks.like(f"REQUEST_TX_ID:{row.transaction_id}%"))
-            .scalar() or 0
+    if not all_employees:
+        query = query.filter(oc.employee_id == employee_id)
+    if project:
+        query = query.filter(oc.project_name == project)
+    if test_area:
+        query = query.filter(oc.test_area == test_area)
+
+    rows = query.order_by(oc.requested_at.desc()).all()
+
+    return [
+        {
+            "transaction_id": row.transaction_id,
+            "item_id": row.item_id,
+            "fixture_id": row.fixture_id,
+            "employee_id": row.employee_id,
+            "transaction_type": "request",
+            "quantity_used": row.quantity_used,  # Original requested quantity
+            "remaining_quantity": row.remaining_quantity,  # Quantity that can still be returned
+            "created_at": row.created_at,
+            "item_name": row.item_name,
+            "item_part_number": row.item_part_number,
+            "item_description": row.item_description,
+            "item_manufacturer": row.item_manufacturer,
+            "item_image_url": row.item_image_url,
+            "test_area": row.test_area,
+            "project_name": row.project_name,
+            "fixture_name": row.fixture_name,
+            "employee_name": row.employee_name,
+        }
+        for row in rows
+    ]
+
+
+def add_open_checkout(db: Session, request_tx: models.Transaction):
+    """
+    Record a new request in the open_checkouts ledger.
+    Does not commit: the caller commits it together with the request transaction.
+    """
+    db.flush()  # Assigns request_tx.transaction_id
+    db.add(models.OpenCheckout(
+        request_transaction_id=request_tx.transaction_id,
+        item_id=request_tx.item_id,
+        employee_id=request_tx.employee_id,
+        fixture_id=request_tx.fixture_id,
+        test_area=request_tx.test_area,
+        project_name=request_tx.project_name,
+        quantity_requested=request_tx.quantity_used,
+        linked_returned=0,
+        legacy_returned=0,
+        remaining_quantity=request_tx.quantity_used,
+        requested_at=func.now(),  # Same transaction timestamp as request_tx.created_at
+    ))
+
+
+def apply_return_to_open_checkouts(db: Session, return_tx: models.Transaction):
+    """
+    Apply a return to the open_checkouts ledger and drop fully returned requests.
+    Uses the same linked/legacy matching as returned_quantity_subquery().
+    Does not commit: the caller commits it together with the return transaction.
+    """
+    oc = models.OpenCheckout
+    if return_tx.request_transaction_id:
+        target = oc.request_transaction_id == return_tx.request_transaction_id
+        linked_returned = oc.linked_returned + return_tx.quantity_used
+        legacy_returned = oc.legacy_returned
+    elif return_tx.remarks is None or return_tx.remarks.startswith("REQUEST_TX_ID:"):
+        # Never a legacy match (see returned_quantity_subquery)
+        return
+    else:
+        # Unlinked return: counts against every matching open request of this employee
+        target = and_(
+            oc.item_id == return_tx.item_id,
+            oc.employee_id == return_tx.employee_id,
+            oc.fixture_id.is_not_distinct_from(return_tx.fixture_id),
         )
-        
-        # If no explicit returns found, fall back to the old matching logic
-        # but only for returns that don't have a REQUEST_TX_ID in remarks (backward compatibility)
-        if explicit_returns == 0:
-            total_returned = (
-                db.query(
-                    func.coalesce(func.sum(models.Transaction.quantity_used), 0)
-                )
-                .filter(models.Transaction.item_id == row.item_id)
-                .filter(models.Transaction.employee_id == row.employee_id)
-                .filter(models.Transaction.fixture_id == row.fixture_id)
-                .filter(models.Transaction.transaction_type == "return")
-                .filter(models.Transaction.created_at >= row.created_at)
-                # Exclude returns that are already linked to other requests
-                .filter(
-                    ~models.Transaction.remarks.like("REQUEST_TX_ID:%")
-                )
-                .scalar() or 0
-            )
-        else:
-            total_returned = explicit_returns
-        
-        # Convert to int to ensure proper type
-        total_returned = int(total_returned) if total_returned else 0
-        
-        # Calculate remaining quantity
-        remaining_quantity = row.quantity_used - total_returned
-        
-        # Only include if not fully returned (remaining_quantity > 0)
-        if remaining_quantity > 0:
-            transactions.append({
-                "transaction_id": row.transaction_id,
-                "item_id": row.item_id,
-                "fixture_id": row.fixture_id,
-                "employee_id": row.employee_id,
-                "transaction_type": row.transaction_type,
-                "quantity_used": row.quantity_used,  # Original requested quantity
-                "remaining_quantity": remaining_quantity,  # Quantity that can still be returned
-                "created_at": row.created_at,
-                "item_name": row.item_name,
-                "item_part_number": row.item_part_number,
-                "item_description": row.item_description,
-                "item_manufacturer": row.item_manufacturer,
-                "item_image_url": row.item_image_url,
-                "test_area": row.test_area,
-                "project_name": row.project_name,
-                "fixture_name": row.fixture_name,
-                "employee_name": row.employee_name,
-            })
-
-    return transactions
-
+        linked_returned = oc.linked_returned
+        legacy_returned = oc.legacy_returned + return_tx.quantity_used
+
+    db.query(oc).filter(target).update(
+        {
+            oc.linked_returned: linked_returned,
+            oc.legacy_returned: legacy_returned,
+            oc.remaining_quantity: oc.quantity_requested - _effective_returned(linked_returned, legacy_returned),
+        },
+        synchronize_session=False,
+    )
+    db.query(oc).filter(target, oc.remaining_quantity <= 0).delete(synchronize_session=False)
+
+
+def rebuild_open_checkouts(db: Session):
+    """
+    Regenerate the open_checkouts ledger from the transactions history.
+    The ledger is locked against writes for the whole rebuild: requests and
+    returns already applied to it have committed (and are read from history),
+    and those still to be applied wait and apply on top of the rebuilt rows.
+    """
+    oc = models.OpenCheckout
+    db.execute(text("LOCK TABLE open_checkouts IN EXCLUSIVE MODE"))
+    requests = (
+        select(
+            models.Transaction.transaction_id,
+            models.Transaction.item_id,
+            models.Transaction.employee_id,
+            models.Transaction.fixture_id,
+            models.Transaction.created_at,
+        )
+        .where(models.Transaction.transaction_type == "request")
+        .subquery()
+    )
+    returned = returned_quantity_subquery(requests)
+    remaining_quantity = models.Transaction.quantity_used - returned.c.returned
 
+    open_requests = (
+        select(
+            models.Transaction.transaction_id,
+            models.Transaction.item_id,
+            models.Transaction.employee_id,
+            models.Transaction.fixture_id,
+            models.Transaction.test_area,
+            models.Transaction.project_name,
+            models.Transaction.quantity_used,
+            returned.c.linked_returned,
+            returned.c.legacy_returned,
+            remaining_quantity,
+            models.Transaction.created_at,
+        )
+        .join(returned, returned.c.request_id == models.Transaction.transaction_id)
+        .where(remaining_quantity > 0)
+    )
 
+    db.query(oc).delete(synchronize_session=False)
+    result = db.execute(
+        insert(oc).from_select(
+            [
+                oc.request_transaction_id,
+                oc.item_id,
+                oc.employee_id,
+                oc.fixture_id,
+                oc.test_area,
+                oc.project_name,
+                oc.quantity_requested,
+                oc.linked_returned,
+                oc.legacy_returned,
+                oc.remaining_quantity,
+                oc.requested_at,
+            ],
+            open_requests,
+        )
+    )
+    db.commit()
+    return result.rowcount
 
 
 # ---------------- Fixtures ----------------
@@ -276,22 +744,126 @@ def create_fixture(db: Session, fx: schemas.FixtureBase):
     return new_fx
 
 # ---------------- Reports ----------------
-def generate_weekly_report(db: Session):
-    """Aggregate transactions of the past week for reporting."""
+def refresh_daily_usage_rollup(db: Session, since: date | None = None):
+    """
+    Recompute daily_usage_rollup for every day from `since` onwards.
+    Without `since`, rebuilds every day still present in transactions (rollups of
+    archived days are kept). Days are replaced in one transaction, so readers see
+    either the old or the new totals.
+    """
+    rollup = models.DailyUsageRollup
+    # Every worker's scheduler runs this job; serialize so two refreshes cannot
+    # both delete and then both insert the same days
+    db.execute(select(func.pg_advisory_xact_lock(func.hashtext("daily_usage_rollup"))))
+
+    if since is None:
+        oldest = db.query(func.min(models.Transaction.created_at)).scalar()
+        if oldest is None:
+            return 0
+        since = oldest.date()
+
+    day = cast(models.Transaction.created_at, Date)
+    totals = (
+        select(
+            day,
+            models.Transaction.item_id,
+            models.Transaction.project_name,
+            models.Transaction.test_area,
+            models.Transaction.transaction_type,
+            func.sum(models.Transaction.quantity_used),
+            func.count(models.Transaction.transaction_id),
+        )
+        .where(models.Transaction.created_at >= since)
+        .group_by(
+            day,
+            models.Transaction.item_id,
+            models.Transaction.project_name,
+            models.Transaction.test_area,
+            models.Transaction.transaction_type,
+        )
+    )
+
+    db.query(rollup).filter(rollup.day >= since).delete(synchronize_session=False)
+    result = db.execute(
+        insert(rollup).from_select(
+            [
+                rollup.day,
+                rollup.item_id,
+                rollup.project_name,
+                rollup.test_area,
+                rollup.transaction_type,
+                rollup.quantity,
+                rollup.transaction_count,
+            ],
+            totals,
+        )
+    )
+    db.commit()
+    report_cache.invalidate()
+    return result.rowcount
+
+def generate_weekly_report(db: Session, regenerate: bool = False):
+    """
+    Return the weekly usage snapshot (one row per requested item) for the past week.
+    The snapshot is built with a single INSERT ... SELECT ... GROUP BY the first time
+    the week is requested, or when regenerate is set; regenerating replaces the
+    week's rows instead of adding duplicates.
+    """
     end_date = date.today()
     start_date = end_date - timedelta(days=7)
-    txs = db.query(models.Transaction).filter(models.Transaction.created_at >= start_date).all()
-
-    for t in txs:
-        rep = models.Report(
-            week_start_date=start_date,
-            week_end_date=end_date,
-            item_id=t.item_id,
-            item_name=t.item.item_name,
-            item_description=t.item.item_description,
-            quantity_used=t.quantity_used,
-            current_quantity=t.item.item_current_quantity
+    report = models.Report
+
+    def stored_snapshot():
+        return (
+            db.query(report)
+            .filter(report.week_start_date == start_date)
+            .order_by(report.quantity_used.desc(), report.item_name)
+            .all()
+        )
+
+    if not regenerate:
+        snapshot = stored_snapshot()
+        if snapshot:
+            return snapshot
+
+    # Serialize concurrent builds of the same week
+    db.execute(select(func.pg_advisory_xact_lock(start_date.toordinal())))
+
+    usage = (
+        select(
+            literal(start_date, Date),
+            literal(end_date, Date),
+            models.Inventory.item_id,
+            models.Inventory.item_name,
+            models.Inventory.item_description,
+            func.sum(models.Transaction.quantity_used),
+            models.Inventory.item_current_quantity,
         )
-        db.add(rep)
+        .join(models.Inventory, models.Transaction.item_id == models.Inventory.item_id)
+        .where(models.Transaction.created_at >= start_date)
+        .where(models.Transaction.transaction_type == "request")
+        .group_by(
+            models.Inventory.item_id,
+            models.Inventory.item_name,
+            models.Inventory.item_description,
+            models.Inventory.item_current_quantity,
+        )
+    )
+
+    db.query(report).filter(report.week_start_date == start_date).delete(synchronize_session=False)
+    db.execute(
+        insert(report).from_select(
+            [
+                report.week_start_date,
+                report.week_end_date,
+                report.item_id,
+                report.item_name,
+                report.item_description,
+                report.quantity_used,
+                report.current_quantity,
+            ],
+            usage,
+        )
+    )
     db.commit()
-    return db.query(models.Report).filter(models.Report.week_start_date == start_date).all()
+    return stored_snapshot()
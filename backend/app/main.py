@@ -7,15 +7,22 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy import inspect, text
-from .database import Base, engine
-from .routes import employees, inventory, transactions, reports, alerts, activity, fixtures, documents
-from . import auth
+from .database import Base, engine, SessionLocal
+from .routes import employees, inventory, transactions, reports, alerts, activity, fixtures, documents, autocomplete, scan
+from . import auth, crud, models
 from .utils.scheduler import start_scheduler, stop_scheduler
+from .utils import catalog_version, inventory_snapshot, report_jobs
+from .utils.prefix_index import prefix_index
+from .utils.scan_index import scan_index
 import os
 import atexit
 
 app = FastAPI(title="Machine Maintenance Inventory System (MMIS)")
 
+# Remember which derived tables exist before create_all adds them
+open_checkouts_existed = inspect(engine).has_table("open_checkouts")
+daily_usage_rollup_existed = inspect(engine).has_table("daily_usage_rollup")
+
 # Auto-create tables if not exist
 Base.metadata.create_all(bind=engine)
 
@@ -58,6 +65,120 @@ def ensure_project_documents_columns():
 
 ensure_project_documents_columns()
 
+
+def ensure_transactions_columns():
+    """Backward-compatible migration for transactions table columns."""
+    inspector = inspect(engine)
+    try:
+        columns = {col["name"] for col in inspector.get_columns("transactions")}
+    except Exception:
+        return
+
+    with engine.begin() as conn:
+        if "request_transaction_id" not in columns:
+            conn.execute(
+                text(
+                    "ALTER TABLE transactions ADD COLUMN request_transaction_id INTEGER "
+                    "REFERENCES transactions(transaction_id)"
+                )
+            )
+            # One-time backfill: returns used to store the link as a
+            # "REQUEST_TX_ID:<id>|remarks" prefix in remarks.
+            conn.execute(
+                text(
+                    "UPDATE transactions AS t "
+                    "SET request_transaction_id = CAST(substring(t.remarks FROM '^REQUEST_TX_ID:([0-9]+)') AS INTEGER) "
+                    "WHERE t.transaction_type = 'return' "
+                    "AND t.request_transaction_id IS NULL "
+                    "AND t.remarks ~ '^REQUEST_TX_ID:[0-9]+' "
+                    "AND EXISTS ("
+                    "  SELECT 1 FROM transactions AS r "
+                    "  WHERE r.transaction_id = CAST(substring(t.remarks FROM '^REQUEST_TX_ID:([0-9]+)') AS INTEGER)"
+                    ")"
+                )
+            )
+
+
+ensure_transactions_columns()
+
+
+def ensure_inventory_columns():
+    """Backward-compatible migration for inventory table columns."""
+    inspector = inspect(engine)
+    try:
+        columns = {col["name"] for col in inspector.get_columns("inventory")}
+    except Exception:
+        return
+
+    with engine.begin() as conn:
+        if "search_vector" not in columns:
+            conn.execute(
+                text(
+                    "ALTER TABLE inventory ADD COLUMN search_vector tsvector "
+                    f"GENERATED ALWAYS AS ({models.INVENTORY_SEARCH_EXPRESSION}) STORED"
+                )
+            )
+        if "change_xid" not in columns:
+            conn.execute(text("ALTER TABLE inventory ADD COLUMN change_xid BIGINT"))
+        # (Re)install the change-tracking trigger used by the inventory snapshot
+        for statement in inventory_snapshot.TRACKING_SQL:
+            conn.execute(text(statement))
+
+
+ensure_inventory_columns()
+
+
+def ensure_indexes():
+    """Create indexes declared on the models that are missing from existing tables."""
+    for table in (
+        models.Transaction.__table__,
+        models.Inventory.__table__,
+        models.Fixture.__table__,
+        models.ProjectDocument.__table__,
+    ):
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+ensure_indexes()
+
+
+def ensure_catalog_versions():
+    """Seed the change-version row of every catalog table used for list ETags."""
+    with engine.begin() as conn:
+        catalog_version.ensure_rows(conn)
+
+
+ensure_catalog_versions()
+
+
+def ensure_open_checkouts_populated():
+    """Build the open_checkouts ledger from history the first time the table is created."""
+    if open_checkouts_existed:
+        return
+    db = SessionLocal()
+    try:
+        crud.rebuild_open_checkouts(db)
+    finally:
+        db.close()
+
+
+ensure_open_checkouts_populated()
+
+
+def ensure_daily_usage_rollup_populated():
+    """Backfill daily_usage_rollup from history the first time the table is created."""
+    if daily_usage_rollup_existed:
+        return
+    db = SessionLocal()
+    try:
+        crud.refresh_daily_usage_rollup(db)
+    finally:
+        db.close()
+
+
+ensure_daily_usage_rollup_populated()
+
 # Create uploads directory if it doesn't exist (relative to backend directory)
 # Get the backend directory (parent of app directory)
 backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -97,6 +218,8 @@ app.include_router(alerts.router)
 app.include_router(activity.router)
 app.include_router(fixtures.router)
 app.include_router(documents.router)
+app.include_router(autocomplete.router)
+app.include_router(scan.router)
 
 @app.get("/")
 def root():
@@ -104,13 +227,17 @@ def root():
 
 @app.on_event("startup")
 def startup_event():
-    """Start the scheduler when the application starts."""
+    """Load in-memory indexes and start the scheduler when the application starts."""
+    prefix_index.load()
+    scan_index.load()
+    inventory_snapshot.inventory_snapshot.load()
     start_scheduler()
 
 @app.on_event("shutdown")
 def shutdown_event():
-    """Stop the scheduler when the application shuts down."""
+    """Stop the scheduler and report workers when the application shuts down."""
     stop_scheduler()
+    report_jobs.shutdown()
 
 # Register shutdown handler
 atexit.register(stop_scheduler) 
\ No newline at end of file
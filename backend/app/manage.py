@@ -0,0 +1,73 @@
+# backend/app/manage.py
+# ----------------------------------------------------------
+# Maintenance commands for derived tables.
+# Usage (from the backend directory):
+#   python -m app.manage rebuild-open-checkouts
+#   python -m app.manage backfill-usage-rollup
+#   python -m app.manage refresh-forecasts
+#   python -m app.manage detect-anomalies
+# ----------------------------------------------------------
+import argparse
+from .database import SessionLocal
+from . import crud
+from .utils.forecast import refresh_item_forecasts
+from .utils.anomaly import detect_usage_anomalies
+
+
+def rebuild_open_checkouts():
+    """Regenerate the open_checkouts ledger from the transactions history."""
+    db = SessionLocal()
+    try:
+        count = crud.rebuild_open_checkouts(db)
+        print(f"open_checkouts rebuilt: {count} open requests")
+    finally:
+        db.close()
+
+
+def backfill_usage_rollup():
+    """Rebuild daily_usage_rollup from the transactions history."""
+    db = SessionLocal()
+    try:
+        count = crud.refresh_daily_usage_rollup(db)
+        print(f"daily_usage_rollup rebuilt: {count} rows")
+    finally:
+        db.close()
+
+
+def refresh_forecasts():
+    """Recompute item_forecasts from the daily usage rollup."""
+    db = SessionLocal()
+    try:
+        count = refresh_item_forecasts(db)
+        print(f"item_forecasts refreshed: {count} items")
+    finally:
+        db.close()
+
+
+def detect_anomalies():
+    """Recompute usage_anomalies from recent request history."""
+    db = SessionLocal()
+    try:
+        count = detect_usage_anomalies(db)
+        print(f"usage_anomalies refreshed: {count} flags")
+    finally:
+        db.close()
+
+
+COMMANDS = {
+    "rebuild-open-checkouts": rebuild_open_checkouts,
+    "backfill-usage-rollup": backfill_usage_rollup,
+    "refresh-forecasts": refresh_forecasts,
+    "detect-anomalies": detect_anomalies,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MMIS maintenance commands")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args()
+    COMMANDS[args.command]()
+
+
+if __name__ == "__main__":
+    main()
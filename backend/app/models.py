@@ -1,8 +1,9 @@
 
 # Import necessary SQLAlchemy components for defining database tables and relationships
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, CheckConstraint, Date, Boolean
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, CheckConstraint, Date, Boolean, Index, Float, BigInteger, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.sql import func        # For automatic timestamps (e.g., created_at)
-from sqlalchemy.orm import relationship      # For defining relationships between tables
+from sqlalchemy.orm import relationship, deferred      # For defining relationships between tables
 from .database import Base   # Import the Base class from database.py
 
 # EMPLOYEE MODEL
@@ -35,6 +36,25 @@ class Fixture(Base):
     # Relationship: one fixture → many transactions
     transactions = relationship("Transaction", back_populates="fixture")
 
+    __table_args__ = (
+        # Sorted/keyset-paginated fixture lists
+        Index("ix_fixtures_name_id", "fixture_name", "fixture_id"),
+        Index("ix_fixtures_project_test_area", "project_name", "test_area"),
+        # Barcode/QR scan lookups (equality only)
+        Index("ix_fixtures_asset_tag_hash", "asset_tag", postgresql_using="hash"),
+        Index("ix_fixtures_serial_number_hash", "fixture_serial_number", postgresql_using="hash"),
+    )
+
+# Weighted full-text document for inventory search: name and part number rank
+# above manufacturer, which ranks above description. 'simple' keeps part numbers
+# and model codes unstemmed.
+INVENTORY_SEARCH_EXPRESSION = (
+    "setweight(to_tsvector('simple', coalesce(item_name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(item_part_number, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(item_manufacturer, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(item_description, '')), 'C')"
+)
+
 class Inventory(Base):
     __tablename__ = "inventory"
 
@@ -53,10 +73,36 @@ class Inventory(Base):
     item_life_cycle = Column(Integer, default=0)
     item_image_url = Column(String(500), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Maintained by Postgres on every insert/update; not loaded with the row
+    search_vector = deferred(Column(TSVECTOR, Computed(INVENTORY_SEARCH_EXPRESSION, persisted=True)))
+    # Id of the transaction that last wrote the row, set by the inventory_track_change
+    # trigger; drives delta refreshes of utils/inventory_snapshot.py
+    change_xid = Column(BigInteger, nullable=True)
 
     # Relationship: one inventory item → many transactions
     transactions = relationship("Transaction", back_populates="item")
 
+    __table_args__ = (
+        # Sorted/keyset-paginated inventory lists
+        Index("ix_inventory_name_id", "item_name", "item_id"),
+        Index("ix_inventory_created_at_id", "created_at", "item_id"),
+        Index("ix_inventory_project_test_area", "project_name", "test_area"),
+        # Full-text search
+        Index("ix_inventory_search_vector", "search_vector", postgresql_using="gin"),
+        # Barcode/QR scan lookups (equality only)
+        Index("ix_inventory_part_number_hash", "item_part_number", postgresql_using="hash"),
+        # Snapshot delta refreshes
+        Index("ix_inventory_change_xid", "change_xid"),
+    )
+
+# Deleted inventory rows, recorded by the inventory_track_change trigger so
+# snapshot delta refreshes can drop them
+class InventoryTombstone(Base):
+    __tablename__ = "inventory_tombstones"
+
+    item_id = Column(Integer, primary_key=True)
+    change_xid = Column(BigInteger, nullable=False, index=True)
+
 class Transaction(Base):
     __tablename__ = "transactions"
 
@@ -70,12 +116,138 @@ class Transaction(Base):
     test_area = Column(String(20))
     project_name = Column(String(100))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # For returns: the request transaction this return belongs to
+    request_transaction_id = Column(Integer, ForeignKey("transactions.transaction_id"), nullable=True, index=True)
 
     # Define relationships to other tables
     employee = relationship("Employee", back_populates="transactions") # Many-to-one with Employee
     fixture = relationship("Fixture", back_populates="transactions") # Many-to-one with Fixture
     item = relationship("Inventory", back_populates="transactions") # Many-to-one with Inventory
 
+    __table_args__ = (
+        # Date-range reports and keyset-paginated history
+        Index("ix_transactions_created_at_id", "created_at", "transaction_id"),
+        # Per-user request history
+        Index("ix_transactions_employee_type_created", "employee_id", "transaction_type", "created_at"),
+        # Legacy return matching by item/employee/fixture
+        Index("ix_transactions_return_match", "item_id", "employee_id", "fixture_id", "created_at"),
+        # History/report filters
+        Index("ix_transactions_type_created", "transaction_type", "created_at"),
+        Index("ix_transactions_project_created", "project_name", "created_at"),
+        Index("ix_transactions_test_area_created", "test_area", "created_at"),
+    )
+
+
+# Projection of request transactions that still have items out.
+# Maintained by the request/return write paths; rebuilt by crud.rebuild_open_checkouts.
+class OpenCheckout(Base):
+    __tablename__ = "open_checkouts"
+
+    request_transaction_id = Column(Integer, ForeignKey("transactions.transaction_id", ondelete="CASCADE"), primary_key=True)
+    item_id = Column(Integer, ForeignKey("inventory.item_id"), nullable=True)
+    employee_id = Column(Integer, ForeignKey("employees.employee_id"))
+    fixture_id = Column(Integer, ForeignKey("fixtures.fixture_id"), nullable=True)
+    test_area = Column(String(20))
+    project_name = Column(String(100))
+    quantity_requested = Column(Integer, nullable=False)
+    linked_returned = Column(Integer, nullable=False, default=0)  # Returns linked via request_transaction_id
+    legacy_returned = Column(Integer, nullable=False, default=0)  # Unlinked returns matched by item/employee/fixture
+    remaining_quantity = Column(Integer, nullable=False)
+    requested_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index("ix_open_checkouts_employee_requested_at", "employee_id", "requested_at"),
+        Index("ix_open_checkouts_requested_at", "requested_at"),
+    )
+
+
+# Stored responses for requests sent with an Idempotency-Key header (see utils/idempotency.py)
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(255), primary_key=True)
+    endpoint = Column(String(100), nullable=False)
+    request_hash = Column(String(64), nullable=False)
+    status = Column(String(20), nullable=False, default="in_progress")  # in_progress | completed
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+# Per-day usage totals for the report endpoints.
+# Refreshed from transactions by crud.refresh_daily_usage_rollup.
+class DailyUsageRollup(Base):
+    __tablename__ = "daily_usage_rollup"
+
+    rollup_id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    item_id = Column(Integer, ForeignKey("inventory.item_id"), nullable=True)  # NULL for fixture transactions
+    project_name = Column(String(100))
+    test_area = Column(String(20))
+    transaction_type = Column(String(20))
+    quantity = Column(Integer, nullable=False, default=0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_daily_usage_rollup_key", "day", "item_id", "project_name", "test_area", "transaction_type"),
+    )
+
+
+# Demand forecast per inventory item, recomputed by utils/forecast.py
+class ItemForecast(Base):
+    __tablename__ = "item_forecasts"
+
+    item_id = Column(Integer, ForeignKey("inventory.item_id", ondelete="CASCADE"), primary_key=True)
+    forecast_date = Column(Date, nullable=False)
+    moving_average_daily = Column(Float, nullable=False, default=0)
+    ewma_daily = Column(Float, nullable=False, default=0)
+    demand_std = Column(Float, nullable=False, default=0)
+    days_of_cover = Column(Float, nullable=True)  # NULL when there is no recent demand
+    suggested_reorder_point = Column(Integer, nullable=False, default=0)
+    current_quantity = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# Change counter per catalog table, bumped on every committed write (utils/catalog_version.py)
+class CatalogVersion(Base):
+    __tablename__ = "catalog_versions"
+
+    table_name = Column(String(50), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=1)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# Day on which one employee's requests of an item were far above their usual volume
+class UsageAnomaly(Base):
+    __tablename__ = "usage_anomalies"
+
+    anomaly_id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False, index=True)
+    item_id = Column(Integer, ForeignKey("inventory.item_id", ondelete="CASCADE"), nullable=True)
+    employee_id = Column(Integer, ForeignKey("employees.employee_id", ondelete="CASCADE"), nullable=True)
+    project_name = Column(String(100), nullable=True)
+    quantity = Column(Integer, nullable=False)
+    baseline_mean = Column(Float, nullable=False)
+    baseline_std = Column(Float, nullable=False)
+    z_score = Column(Float, nullable=False)
+    detected_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# Background XLSX report job, rendered by utils/report_jobs.py
+class ReportJob(Base):
+    __tablename__ = "report_jobs"
+
+    job_id = Column(String(32), primary_key=True)
+    report_type = Column(String(20), nullable=False)  # weekly, monthly
+    period_start = Column(Date, nullable=False)
+    period_end = Column(Date, nullable=False)
+    params_hash = Column(String(64), nullable=False, index=True)
+    status = Column(String(20), nullable=False, default="queued")  # queued, completed, failed
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
 
 class Report(Base):
     __tablename__ = "reports"
@@ -109,3 +281,9 @@ class ProjectDocument(Base):
     pinned_at = Column(DateTime(timezone=True), nullable=True)
     uploaded_by_employee_id = Column(Integer, ForeignKey("employees.employee_id"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Sorted/keyset-paginated document lists
+        Index("ix_project_documents_created_at_id", "created_at", "document_id"),
+        Index("ix_project_documents_filename_id", "original_filename", "document_id"),
+    )
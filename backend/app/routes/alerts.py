@@ -1,26 +1,22 @@
 # backend/app/routes/alerts.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from ..database import get_db
-from .. import crud, schemas, models
+from .. import crud, schemas
 from ..utils.scheduler import send_daily_low_stock_notifications
+from ..utils.inventory_snapshot import inventory_snapshot
 
 router = APIRouter(prefix="/alerts", tags=["Alerts"])
 
 @router.get("/low-stock", response_model=list[schemas.InventoryOut])
-def low_stock_alerts(test_area: str | None = None, project: str | None = None, db: Session = Depends(get_db)):
+def low_stock_alerts(
+    test_area: str | None = None,
+    project: str | None = None,
+    consistency: str = Query("snapshot", description="snapshot (may lag writes by a few seconds) or strong (read-your-writes)"),
+):
     """Return list of items below minimum count, optionally filtered by test_area and/or project."""
-    query = db.query(models.Inventory).filter(
-        models.Inventory.item_current_quantity < models.Inventory.item_min_count
-    )
-    
-    if test_area:
-        query = query.filter(models.Inventory.test_area == test_area)
-    
-    if project:
-        query = query.filter(models.Inventory.project_name == project)
-    
-    return query.order_by(models.Inventory.item_name).all()
+    inventory_snapshot.ensure_fresh(consistency)
+    return inventory_snapshot.low_stock(project=project, test_area=test_area)
 
 @router.post("/send-notifications")
 def send_low_stock_notifications_manual(db: Session = Depends(get_db)):
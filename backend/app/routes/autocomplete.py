@@ -0,0 +1,35 @@
+# backend/app/routes/autocomplete.py
+from fastapi import APIRouter, HTTPException, Query
+from ..utils.prefix_index import prefix_index
+
+router = APIRouter(prefix="/autocomplete", tags=["Autocomplete"])
+
+AUTOCOMPLETE_KINDS = {"item", "fixture", "project"}
+
+
+@router.get("/")
+def autocomplete(
+    q: str = Query(..., min_length=1, description="Typed prefix of a name, part number or asset tag"),
+    kinds: str | None = Query(None, description="Comma-separated subset of item, fixture, project"),
+    project: str | None = None,
+    test_area: str | None = None,
+    limit: int = Query(10, ge=1, le=50),
+):
+    """
+    Type-ahead suggestions served from the in-memory prefix index (no database
+    round trip). Matches names and part numbers / asset tags by prefix, including
+    prefixes of later words ("rel" finds "Omron Relay").
+    """
+    selected = None
+    if kinds:
+        selected = {kind.strip().lower() for kind in kinds.split(",") if kind.strip()}
+        unknown = selected - AUTOCOMPLETE_KINDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"kinds must be a subset of: {', '.join(sorted(AUTOCOMPLETE_KINDS))}")
+    return prefix_index.search(q, kinds=selected, project=project, test_area=test_area, limit=limit)
+
+
+@router.get("/stats")
+def autocomplete_stats():
+    """Size and approximate memory usage of the prefix index."""
+    return prefix_index.stats()
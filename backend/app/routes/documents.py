@@ -4,13 +4,14 @@ import os
 import shutil
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, UploadFile
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, Response, UploadFile
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import func, or_
 
 from .. import models, schemas
 from ..database import get_db
+from ..utils import catalog_version, listing
 from ..utils.jwt_handler import verify_access_token
 
 router = APIRouter(prefix="/documents", tags=["Documents"])
@@ -89,19 +90,70 @@ def _to_document_out(db: Session, document: models.ProjectDocument):
     )
 
 
-@router.get("/", response_model=list[schemas.ProjectDocumentOut])
+# Columns available to `fields=` on the document list
+DOCUMENT_LIST_COLUMNS = {
+    "document_id": models.ProjectDocument.document_id,
+    "document_scope": func.coalesce(models.ProjectDocument.document_scope, "project"),
+    "project_name": models.ProjectDocument.project_name,
+    "test_area": models.ProjectDocument.test_area,
+    "original_filename": models.ProjectDocument.original_filename,
+    "stored_filename": models.ProjectDocument.stored_filename,
+    "file_type": models.ProjectDocument.file_type,
+    "content_type": models.ProjectDocument.content_type,
+    "file_size": models.ProjectDocument.file_size,
+    "file_url": models.ProjectDocument.file_url,
+    "remarks": models.ProjectDocument.remarks,
+    "is_pinned": models.ProjectDocument.is_pinned,
+    "pinned_at": models.ProjectDocument.pinned_at,
+    "uploaded_by_employee_id": models.ProjectDocument.uploaded_by_employee_id,
+    "uploaded_by_name": models.Employee.employee_name,
+    "created_at": models.ProjectDocument.created_at,
+}
+# Sort keys, each ending in the primary key. "pinned" is the default
+# pinned-first order; pinned_at is only set on pinned documents.
+DOCUMENT_LIST_SORTS = {
+    "pinned": [
+        models.ProjectDocument.is_pinned,
+        func.coalesce(models.ProjectDocument.pinned_at, datetime(1970, 1, 1, tzinfo=timezone.utc)),
+        models.ProjectDocument.created_at,
+        models.ProjectDocument.document_id,
+    ],
+    "created_at": [models.ProjectDocument.created_at, models.ProjectDocument.document_id],
+    "original_filename": [models.ProjectDocument.original_filename, models.ProjectDocument.document_id],
+}
+
+
+@router.get("/")
 def list_documents(
+    request: Request,
+    response: Response,
     scope: str | None = Query(default=None),
     project: str | None = Query(default=None),
     test_area: str | None = Query(default=None),
     search: str | None = Query(default=None),
     doc_type: str | None = Query(default=None),
     include_common: bool = Query(default=True),
+    fields: str | None = Query(default=None, description="Comma-separated columns to return, default all"),
+    sort: str | None = Query(default=None, description="pinned, created_at or original_filename; prefix - for descending"),
+    limit: int | None = Query(default=None, ge=1, le=listing.MAX_LIMIT, description="Page size; returns {items, next_cursor, limit}"),
+    cursor: str | None = Query(default=None, description="next_cursor from the previous page"),
     db: Session = Depends(get_db),
 ):
-    query = db.query(models.ProjectDocument, models.Employee.employee_name).outerjoin(
-        models.Employee,
-        models.Employee.employee_id == models.ProjectDocument.uploaded_by_employee_id,
+    # Uploader names come from employees, so its version is part of the ETag
+    cached = catalog_version.not_modified(db, request, response, "project_documents", "employees")
+    if cached:
+        return cached
+
+    selected = listing.parse_fields(fields, DOCUMENT_LIST_COLUMNS)
+    sort, keys, descending = listing.parse_sort(sort, DOCUMENT_LIST_SORTS, "-pinned")
+
+    query = (
+        db.query(*[DOCUMENT_LIST_COLUMNS[name].label(name) for name in selected])
+        .select_from(models.ProjectDocument)
+        .outerjoin(
+            models.Employee,
+            models.Employee.employee_id == models.ProjectDocument.uploaded_by_employee_id,
+        )
     )
 
     if scope and scope.lower() in {"project", "common"}:
@@ -129,35 +181,7 @@ def list_documents(
             | models.Employee.employee_name.ilike(like_query)
         )
 
-    rows = (
-        query.order_by(
-            models.ProjectDocument.is_pinned.desc(),
-            models.ProjectDocument.pinned_at.desc(),
-            models.ProjectDocument.created_at.desc(),
-        )
-        .all()
-    )
-    return [
-        schemas.ProjectDocumentOut(
-            document_id=doc.document_id,
-            document_scope=doc.document_scope or "project",
-            project_name=doc.project_name,
-            test_area=doc.test_area,
-            original_filename=doc.original_filename,
-            stored_filename=doc.stored_filename,
-            file_type=doc.file_type,
-            content_type=doc.content_type,
-            file_size=doc.file_size,
-            file_url=doc.file_url,
-            remarks=doc.remarks,
-            is_pinned=doc.is_pinned,
-            pinned_at=doc.pinned_at,
-            uploaded_by_employee_id=doc.uploaded_by_employee_id,
-            uploaded_by_name=employee_name,
-            created_at=doc.created_at,
-        )
-        for doc, employee_name in rows
-    ]
+    return listing.fetch_rows(query, selected, sort, keys, descending, limit=limit, cursor=cursor)
 
 
 @router.post("/upload", response_model=schemas.ProjectDocumentOut)
@@ -1,22 +1,72 @@
 # backend/app/routes/fixtures.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from ..database import get_db
 from .. import crud, schemas
 from .. import models
+from ..utils import catalog_version, listing
 
 router = APIRouter(prefix="/fixtures", tags=["Fixtures"])
 
-@router.get("/", response_model=list[schemas.FixtureOut])
-def list_fixtures(db: Session = Depends(get_db)):
-    """Return all fixtures."""
-    return crud.get_all_fixtures(db)
+# Columns available to `fields=` on the fixture lists
+FIXTURE_LIST_COLUMNS = {
+    "fixture_id": models.Fixture.fixture_id,
+    "fixture_name": models.Fixture.fixture_name,
+    "test_area": models.Fixture.test_area,
+    "project_name": models.Fixture.project_name,
+    "asset_tag": models.Fixture.asset_tag,
+    "fixture_serial_number": models.Fixture.fixture_serial_number,
+}
+# Sort keys, each backed by an index ending in the primary key
+FIXTURE_LIST_SORTS = {
+    "fixture_name": [models.Fixture.fixture_name, models.Fixture.fixture_id],
+    "fixture_id": [models.Fixture.fixture_id],
+}
 
 
-@router.get("/filter", response_model=list[schemas.FixtureOut])
+def _list_fixtures(db: Session, request, response, project, test_area, fields, sort, limit, cursor):
+    cached = catalog_version.not_modified(db, request, response, "fixtures")
+    if cached:
+        return cached
+
+    selected = listing.parse_fields(fields, FIXTURE_LIST_COLUMNS)
+    sort, keys, descending = listing.parse_sort(sort, FIXTURE_LIST_SORTS, "fixture_name")
+
+    query = db.query(*[FIXTURE_LIST_COLUMNS[name].label(name) for name in selected])
+
+    if project:
+        query = query.filter(models.Fixture.project_name == project)
+
+    if test_area:
+        query = query.filter(models.Fixture.test_area == test_area)
+
+    return listing.fetch_rows(query, selected, sort, keys, descending, limit=limit, cursor=cursor)
+
+
+@router.get("/")
+def list_fixtures(
+    request: Request,
+    response: Response,
+    fields: str | None = Query(None, description="Comma-separated columns to return, default all"),
+    sort: str | None = Query(None, description="fixture_name or fixture_id; prefix - for descending"),
+    limit: int | None = Query(None, ge=1, le=listing.MAX_LIMIT, description="Page size; returns {items, next_cursor, limit}"),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    db: Session = Depends(get_db)
+):
+    """Return all fixtures, or one keyset page of them when `limit` is given. Supports If-None-Match (304)."""
+    return _list_fixtures(db, request, response, None, None, fields, sort, limit, cursor)
+
+
+@router.get("/filter")
 def filter_fixtures(
+    request: Request,
+    response: Response,
     project: str | None = None,
     test_area: str | None = None,
+    fields: str | None = Query(None, description="Comma-separated columns to return, default all"),
+    sort: str | None = Query(None, description="fixture_name or fixture_id; prefix - for descending"),
+    limit: int | None = Query(None, ge=1, le=listing.MAX_LIMIT, description="Page size; returns {items, next_cursor, limit}"),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
     db: Session = Depends(get_db)
 ):
     """
@@ -24,16 +74,9 @@ def filter_fixtures(
     Example:
         /fixtures/filter?project=Athena
         /fixtures/filter?project=Athena&test_area=FBT
+        /fixtures/filter?project=Athena&fields=fixture_id,fixture_name&limit=50
     """
-    query = db.query(models.Fixture)
-
-    if project:
-        query = query.filter(models.Fixture.project_name == project)
-
-    if test_area:
-        query = query.filter(models.Fixture.test_area == test_area)
-
-    return query.order_by(models.Fixture.fixture_name).all()
+    return _list_fixtures(db, request, response, project, test_area, fields, sort, limit, cursor)
 
 
 @router.get("/{fixture_id}", response_model=schemas.FixtureOut)
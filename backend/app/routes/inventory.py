@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Form
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, UploadFile, File, Form
+from sqlalchemy import Float, cast, func
 from sqlalchemy.orm import Session
 from .. import crud, schemas, models
 from ..database import get_db
 from ..utils.jwt_handler import verify_access_token
+from ..utils import catalog_version, idempotency, listing, transfer_engine
+from ..utils.inventory_snapshot import inventory_snapshot
 import os
+import re
 import shutil
 from pathlib import Path
 from typing import Optional
@@ -27,13 +31,99 @@ def _require_admin_for_transfer(request: Request):
     return payload
 
 
-@router.get("/", response_model=list[schemas.InventoryOut])
+CONSISTENCY_DESCRIPTION = "snapshot (may lag writes by a few seconds) or strong (read-your-writes)"
+
+# Columns available to `fields=` on the inventory list
+INVENTORY_LIST_COLUMNS = {
+    "item_id": models.Inventory.item_id,
+    "item_name": models.Inventory.item_name,
+    "item_description": models.Inventory.item_description,
+    "item_part_number": models.Inventory.item_part_number,
+    "item_current_quantity": models.Inventory.item_current_quantity,
+    "item_min_count": models.Inventory.item_min_count,
+    "item_unit": models.Inventory.item_unit,
+    "item_unit_price": models.Inventory.item_unit_price,
+    "item_manufacturer": models.Inventory.item_manufacturer,
+    "item_type": models.Inventory.item_type,
+    "test_area": models.Inventory.test_area,
+    "project_name": models.Inventory.project_name,
+    "item_life_cycle": models.Inventory.item_life_cycle,
+    "item_image_url": models.Inventory.item_image_url,
+    "created_at": models.Inventory.created_at,
+}
+# Sort keys, each backed by an index ending in the primary key
+INVENTORY_LIST_SORTS = {
+    "item_name": [models.Inventory.item_name, models.Inventory.item_id],
+    "item_id": [models.Inventory.item_id],
+    "created_at": [models.Inventory.created_at, models.Inventory.item_id],
+}
+
+
+@router.get("/")
 def get_inventory(
+    request: Request,
+    response: Response,
     project: str | None = None,
     test_area: str | None = None,
+    fields: str | None = Query(None, description="Comma-separated columns to return, default all"),
+    sort: str | None = Query(None, description="item_name, item_id or created_at; prefix - for descending"),
+    limit: int | None = Query(None, ge=1, le=listing.MAX_LIMIT, description="Page size; returns {items, next_cursor, limit}"),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    consistency: str = Query("snapshot", description=CONSISTENCY_DESCRIPTION),
+):
+    """
+    List inventory items from the in-memory snapshot. Without `limit` every matching
+    item is returned as a list; with `limit` the response is one keyset page.
+    Supports If-None-Match (304); the ETag is the version the snapshot was built at.
+    """
+    selected = listing.parse_fields(fields, INVENTORY_LIST_COLUMNS)
+    sort, keys, descending = listing.parse_sort(sort, INVENTORY_LIST_SORTS, "item_name")
+
+    inventory_snapshot.ensure_fresh(consistency)
+    cached = catalog_version.check_etag(request, response, {"inventory": inventory_snapshot.version})
+    if cached:
+        return cached
+
+    return inventory_snapshot.list_items(
+        selected, sort, keys, project=project, test_area=test_area, limit=limit, cursor=cursor
+    )
+
+
+@router.get("/search")
+def search_inventory(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, description="Words or word prefixes, e.g. 'omron rel' or 'ABC-12'"),
+    project: str | None = None,
+    test_area: str | None = None,
+    fields: str | None = Query(None, description="Comma-separated columns to return, default all plus rank"),
+    limit: int = Query(20, ge=1, le=listing.MAX_LIMIT),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
     db: Session = Depends(get_db)
 ):
-    query = db.query(models.Inventory)
+    """
+    Full-text search over item name, part number, manufacturer and description.
+    Every word must match (as a prefix); hits are ranked by relevance, with name and
+    part number matches weighted highest. Returns {items, next_cursor, limit}.
+    """
+    cached = catalog_version.not_modified(db, request, response, "inventory")
+    if cached:
+        return cached
+
+    terms = re.findall(r"[^\W_]+", q.lower())
+    if not terms:
+        raise HTTPException(status_code=400, detail="q must contain at least one letter or digit")
+    ts_query = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+    # double precision so the rank round-trips exactly through the cursor
+    rank = cast(func.ts_rank_cd(models.Inventory.search_vector, ts_query), Float)
+
+    columns = {**INVENTORY_LIST_COLUMNS, "rank": rank}
+    selected = listing.parse_fields(fields, columns)
+
+    query = (
+        db.query(*[columns[name].label(name) for name in selected])
+        .filter(models.Inventory.search_vector.op("@@")(ts_query))
+    )
 
     if project:
         query = query.filter(models.Inventory.project_name == project)
@@ -41,12 +131,22 @@ def get_inventory(
     if test_area:
         query = query.filter(models.Inventory.test_area == test_area)
 
-    return query.order_by(models.Inventory.item_name).all()
+    return listing.fetch_rows(query, selected, "-rank", [rank, models.Inventory.item_id], True, limit=limit, cursor=cursor)
+
+
+@router.get("/snapshot/stats")
+def get_inventory_snapshot_stats():
+    """Size, age and refresh counters of the in-memory inventory snapshot."""
+    return inventory_snapshot.stats()
 
 
 @router.get("/{item_id}", response_model=schemas.InventoryOut)
-def get_single_item(item_id: int, db: Session = Depends(get_db)):
-    item = db.query(models.Inventory).filter(models.Inventory.item_id == item_id).first()
+def get_single_item(
+    item_id: int,
+    consistency: str = Query("snapshot", description=CONSISTENCY_DESCRIPTION),
+):
+    inventory_snapshot.ensure_fresh(consistency)
+    item = inventory_snapshot.get(item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     return item
@@ -110,8 +210,19 @@ def update_inventory(item_id: int, item: schemas.InventoryBase, db: Session = De
 
 
 @router.post("/request")
-def request_item(data: schemas.RequestCreate, db: Session = Depends(get_db)):
+def request_item(
+    data: schemas.RequestCreate,
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db)
+):
+    """Request an item, borrowing the shortfall from other projects if needed."""
+    return transfer_engine.run_with_retry(
+        db,
+        lambda: idempotency.run(db, idempotency_key, "inventory.request", data, lambda: _request_item(data, db)),
+    )
+
 
+def _request_item(data: schemas.RequestCreate, db: Session):
     item_id = data.item_id
     qty = data.quantity
 
@@ -142,103 +253,57 @@ def request_item(data: schemas.RequestCreate, db: Session = Depends(get_db)):
         )
         
         db.add(transaction)
-        db.commit()
+        crud.add_open_checkout(db, transaction)
+        new_quantity = item.item_current_quantity
+        db.flush()
         
         return {
             "message": "Request successful", 
-            "new_quantity": item.item_current_quantity,
+            "new_quantity": new_quantity,
             "transfer_used": False
         }
     
-    # Not enough stock in current project - check other projects
-    available_in_other_projects = (
-        db.query(models.Inventory)
-        .filter(
-            models.Inventory.item_name == item.item_name,
-            models.Inventory.item_id != item_id,
-            models.Inventory.item_current_quantity > 0
-        )
-        .order_by(models.Inventory.item_current_quantity.desc())
-        .all()
-    )
-    
-    if not available_in_other_projects:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Not enough stock. Available: {item.item_current_quantity}, Requested: {qty}. No stock available in other projects."
-        )
-    
-    # Calculate how much we need from other projects
+    # Not enough stock in current project - allocate the shortfall from other
+    # projects in one statement (largest donors first)
     remaining_needed = qty - item.item_current_quantity
     used_from_current = item.item_current_quantity
-    
-    # Transfer from other projects first
-    transfers_made = []
-    total_transferred = 0
-    
-    for source_item in available_in_other_projects:
-        if total_transferred >= remaining_needed:
-            break
-            
-        # Lock the source item
-        source_item_locked = (
-            db.query(models.Inventory)
-            .filter(models.Inventory.item_id == source_item.item_id)
-            .with_for_update()
-            .first()
-        )
-        
-        if not source_item_locked or source_item_locked.item_current_quantity == 0:
-            continue
-        
-        transfer_qty = min(
-            source_item_locked.item_current_quantity,
-            remaining_needed - total_transferred
-        )
-        
-        # Deduct from source project
-        source_item_locked.item_current_quantity -= transfer_qty
-        
-        # Add to destination project
-        item.item_current_quantity += transfer_qty
-        
-        # Create transfer transaction for source project
-        transfer_tx_source = models.Transaction(
-            item_id=source_item_locked.item_id,
-            employee_id=data.employee_id,
-            fixture_id=data.fixture_id,
-            quantity_used=transfer_qty,
-            test_area=source_item_locked.test_area,
-            project_name=source_item_locked.project_name,
-            transaction_type="transfer_out",
-            remarks=f"Transferred to {item.project_name} project. Request ID: {item_id}"
+    allocations = transfer_engine.allocate_from_donors(db, item, remaining_needed)
+    total_transferred = sum(row.quantity for row in allocations)
+
+    if total_transferred < remaining_needed:
+        db.rollback()
+        if not allocations:
+            raise HTTPException(
+                status_code=400, 
+                detail=f"Not enough stock. Available: {used_from_current}, Requested: {qty}. No stock available in other projects."
+            )
+        raise HTTPException(
+            status_code=400,
+            detail=f"Not enough stock. Available: {used_from_current}, Requested: {qty}. Only {total_transferred} available in other projects."
         )
-        db.add(transfer_tx_source)
-        
-        # Create transfer transaction for destination project
-        transfer_tx_dest = models.Transaction(
-            item_id=item_id,
+
+    transfers_made = []
+    for source in allocations:
+        transfer_engine.record_transfer(
+            db,
+            source_item_id=source.item_id,
+            source_project=source.project_name,
+            source_test_area=source.test_area,
+            dest_item=item,
+            quantity=source.quantity,
             employee_id=data.employee_id,
             fixture_id=data.fixture_id,
-            quantity_used=transfer_qty,
-            test_area=item.test_area,
-            project_name=item.project_name,
-            transaction_type="transfer_in",
-            remarks=f"Transferred from {source_item_locked.project_name} project. Source Item ID: {source_item_locked.item_id}"
+            out_remarks=f"Transferred to {item.project_name} project. Request ID: {item_id}",
+            in_remarks=f"Transferred from {source.project_name} project. Source Item ID: {source.item_id}",
         )
-        db.add(transfer_tx_dest)
-        
         transfers_made.append({
-            "from_project": source_item_locked.project_name,
-            "from_item_id": source_item_locked.item_id,
-            "quantity": transfer_qty
+            "from_project": source.project_name,
+            "from_item_id": source.item_id,
+            "quantity": source.quantity
         })
-        
-        total_transferred += transfer_qty
     
-    # Now deduct the full requested quantity from destination
-    # (which now has original stock + transferred items)
-    item.item_current_quantity -= qty
+    # The transferred units plus the current stock cover the full request
+    item.item_current_quantity = item.item_current_quantity + total_transferred - qty
     
     # Create final request transaction for the full quantity
     final_request_tx = models.Transaction(
@@ -252,13 +317,14 @@ def request_item(data: schemas.RequestCreate, db: Session = Depends(get_db)):
         remarks=f"Fulfilled via cross-project transfer. Used {used_from_current} from current project, {total_transferred} transferred from other projects."
     )
     db.add(final_request_tx)
+    crud.add_open_checkout(db, final_request_tx)
+    new_quantity = item.item_current_quantity
     
-    db.commit()
-    db.refresh(item)
+    db.flush()
     
     return {
         "message": "Request fulfilled with cross-project transfer",
-        "new_quantity": item.item_current_quantity,
+        "new_quantity": new_quantity,
         "transfer_used": True,
         "used_from_current": used_from_current,
         "transferred_from_other_projects": total_transferred,
@@ -266,9 +332,84 @@ def request_item(data: schemas.RequestCreate, db: Session = Depends(get_db)):
     }
 
 
+@router.post("/request/batch")
+def request_items_batch(data: schemas.BatchRequestCreate, db: Session = Depends(get_db)):
+    """
+    Check out a whole kit in one call. Item rows are locked in item_id order and
+    all lines are committed together; if any line cannot be fulfilled nothing is
+    changed and the per-line results explain why.
+    """
+    if not data.lines:
+        raise HTTPException(status_code=400, detail="At least one line is required")
+
+    items = crud.lock_inventory_items(db, [line.item_id for line in data.lines])
+
+    # Validate every line against the stock left after the previous lines
+    available = {item_id: item.item_current_quantity for item_id, item in items.items()}
+    results = []
+    failed = False
+    for index, line in enumerate(data.lines):
+        result = {"line": index, "item_id": line.item_id, "quantity": line.quantity}
+        if line.quantity <= 0:
+            result.update(status="error", detail="Quantity must be greater than 0")
+        elif line.item_id not in items:
+            result.update(status="error", detail="Item not found")
+        elif available[line.item_id] < line.quantity:
+            result.update(
+                status="error",
+                detail=f"Not enough stock. Available: {available[line.item_id]}, Requested: {line.quantity}",
+            )
+        else:
+            available[line.item_id] -= line.quantity
+            result["status"] = "ok"
+        failed = failed or result["status"] != "ok"
+        results.append(result)
+
+    if failed:
+        db.rollback()
+        raise HTTPException(status_code=400, detail={"message": "Kit request rejected", "lines": results})
+
+    transactions = []
+    for line in data.lines:
+        item = items[line.item_id]
+        item.item_current_quantity -= line.quantity
+        transaction = models.Transaction(
+            item_id=line.item_id,
+            employee_id=data.employee_id,
+            fixture_id=data.fixture_id,
+            quantity_used=line.quantity,
+            test_area=item.test_area,
+            project_name=item.project_name,
+            transaction_type="request",
+            remarks=data.remarks,
+        )
+        db.add(transaction)
+        transactions.append(transaction)
+
+    for transaction in transactions:
+        crud.add_open_checkout(db, transaction)
+
+    # Collect results before commit expires the loaded rows
+    for result, transaction in zip(results, transactions):
+        result["transaction_id"] = transaction.transaction_id
+        result["new_quantity"] = items[transaction.item_id].item_current_quantity
+
+    db.commit()
+
+    return {"message": "Kit request successful", "lines": results}
+
+
 @router.post("/restock")
-def restock_item(data: dict, db: Session = Depends(get_db)):
+def restock_item(
+    data: dict,
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db)
+):
     """Restock an item by adding quantity."""
+    return idempotency.run(db, idempotency_key, "inventory.restock", data, lambda: _restock_item(data, db))
+
+
+def _restock_item(data: dict, db: Session):
     item_id = data.get("item_id")
     quantity = data.get("quantity")
     remarks = data.get("remarks", "")
@@ -320,10 +461,10 @@ def restock_item(data: dict, db: Session = Depends(get_db)):
     )
     
     db.add(transaction)
-    db.commit()
-    db.refresh(item)
+    new_quantity = item.item_current_quantity
+    db.flush()
 
-    return {"message": "Restock successful", "new_quantity": item.item_current_quantity}
+    return {"message": "Restock successful", "new_quantity": new_quantity}
 
 
 @router.post("/upload-image")
@@ -422,33 +563,38 @@ async def upload_and_update_item_image(
 
 # New endpoint to get available items from other projects
 @router.get("/{item_id}/alternatives")
-def get_alternative_items(item_id: int, db: Session = Depends(get_db)):
+def get_alternative_items(
+    item_id: int,
+    consistency: str = Query("snapshot", description=CONSISTENCY_DESCRIPTION),
+):
     """Get the same item from other projects that have stock available."""
-    item = db.query(models.Inventory).filter(models.Inventory.item_id == item_id).first()
+    inventory_snapshot.ensure_fresh(consistency)
+    item = inventory_snapshot.get(item_id)
     
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     
     # Find same items in other projects
-    alternatives = (
-        db.query(models.Inventory)
-        .filter(
-            models.Inventory.item_name == item.item_name,
-            models.Inventory.item_id != item_id,
-            models.Inventory.item_current_quantity > 0
-        )
-        .order_by(models.Inventory.item_current_quantity.desc())
-        .all()
-    )
-    
-    return alternatives
+    return inventory_snapshot.alternatives(item)
 
 
 # New endpoint for explicit transfer between projects
 @router.post("/transfer")
-def transfer_item(data: dict, request: Request, db: Session = Depends(get_db)):
+def transfer_item(
+    data: dict,
+    request: Request,
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db)
+):
     """Explicitly transfer items from one project to another (admin only)."""
     _require_admin_for_transfer(request)
+    return transfer_engine.run_with_retry(
+        db,
+        lambda: idempotency.run(db, idempotency_key, "inventory.transfer", data, lambda: _transfer_item(data, db)),
+    )
+
+
+def _transfer_item(data: dict, db: Session):
     source_item_id = data.get("source_item_id")
     dest_item_id = data.get("dest_item_id")
     quantity = data.get("quantity")
@@ -461,21 +607,14 @@ def transfer_item(data: dict, request: Request, db: Session = Depends(get_db)):
     
     if quantity <= 0:
         raise HTTPException(status_code=400, detail="Quantity must be greater than 0")
+
+    if source_item_id == dest_item_id:
+        raise HTTPException(status_code=400, detail="Source and destination must be different items")
     
-    # Lock both items
-    source_item = (
-        db.query(models.Inventory)
-        .filter(models.Inventory.item_id == source_item_id)
-        .with_for_update()
-        .first()
-    )
-    
-    dest_item = (
-        db.query(models.Inventory)
-        .filter(models.Inventory.item_id == dest_item_id)
-        .with_for_update()
-        .first()
-    )
+    # Lock both items in item_id order so opposing transfers cannot deadlock
+    locked = crud.lock_inventory_items(db, [source_item_id, dest_item_id])
+    source_item = locked.get(source_item_id)
+    dest_item = locked.get(dest_item_id)
     
     if not source_item or not dest_item:
         raise HTTPException(status_code=404, detail="Source or destination item not found")
@@ -493,38 +632,24 @@ def transfer_item(data: dict, request: Request, db: Session = Depends(get_db)):
     source_item.item_current_quantity -= quantity
     dest_item.item_current_quantity += quantity
     
-    # Create transactions
-    transfer_out_tx = models.Transaction(
-        item_id=source_item_id,
-        employee_id=employee_id,
-        fixture_id=fixture_id,
-        quantity_used=quantity,
-        test_area=source_item.test_area,
-        project_name=source_item.project_name,
-        transaction_type="transfer_out",
-        remarks=f"Transferred to {dest_item.project_name}. {remarks}"
-    )
-    
-    transfer_in_tx = models.Transaction(
-        item_id=dest_item_id,
+    transfer_engine.record_transfer(
+        db,
+        source_item_id=source_item_id,
+        source_project=source_item.project_name,
+        source_test_area=source_item.test_area,
+        dest_item=dest_item,
+        quantity=quantity,
         employee_id=employee_id,
         fixture_id=fixture_id,
-        quantity_used=quantity,
-        test_area=dest_item.test_area,
-        project_name=dest_item.project_name,
-        transaction_type="transfer_in",
-        remarks=f"Transferred from {source_item.project_name}. {remarks}"
+        out_remarks=f"Transferred to {dest_item.project_name}. {remarks}",
+        in_remarks=f"Transferred from {source_item.project_name}. {remarks}",
     )
-    
-    db.add(transfer_out_tx)
-    db.add(transfer_in_tx)
-    db.commit()
-    db.refresh(source_item)
-    db.refresh(dest_item)
+    source_quantity = source_item.item_current_quantity
+    dest_quantity = dest_item.item_current_quantity
+    db.flush()
     
     return {
         "message": "Transfer successful",
-        "source_quantity": source_item.item_current_quantity,
-        "dest_quantity": dest_item.item_current_quantity
+        "source_quantity": source_quantity,
+        "dest_quantity": dest_quantity
     }
-    
@@ -1,36 +1,55 @@
 # backend/app/routes/reports.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case
-from datetime import datetime, timedelta
+from sqlalchemy import func, case, select, text, tuple_
+from datetime import date, datetime, timedelta
 from ..database import get_db
 from .. import crud, schemas, models
+from ..utils.report_cache import report_cache
+from ..utils import report_jobs
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
 @router.get("/weekly", response_model=list[schemas.ReportOut])
-def generate_report(db: Session = Depends(get_db)):
-    """Generate and return weekly usage report."""
-    return crud.generate_weekly_report(db)
+def generate_report(regenerate: bool = False, db: Session = Depends(get_db)):
+    """
+    Return the stored weekly usage report, building it on first request.
+    Pass regenerate=true to rebuild this week's snapshot from current transactions.
+    """
+    return crud.generate_weekly_report(db, regenerate=regenerate)
+
+def _weekly_rollup_start():
+    """First day of the weekly window (the day 7 days ago, inclusive)."""
+    return (datetime.now() - timedelta(days=7)).date()
+
+
+def _type_quantity(transaction_type: str):
+    rollup = models.DailyUsageRollup
+    return func.sum(case((rollup.transaction_type == transaction_type, rollup.quantity), else_=0))
+
 
 @router.get("/weekly/projects")
 def get_weekly_projects_stats(db: Session = Depends(get_db)):
-    """Get weekly statistics grouped by project."""
-    # Get date 7 days ago
-    week_ago = datetime.now() - timedelta(days=7)
+    """Get weekly statistics grouped by project (read from daily_usage_rollup)."""
+    return report_cache.get_or_compute("weekly/projects", lambda: _weekly_projects_stats(db))
+
+
+def _weekly_projects_stats(db: Session):
+    rollup = models.DailyUsageRollup
     
     results = (
         db.query(
-            models.Transaction.project_name,
-            func.count(models.Transaction.transaction_id).label("total"),
-            func.sum(case((models.Transaction.transaction_type == "request", models.Transaction.quantity_used), else_=0)).label("requests"),
-            func.sum(case((models.Transaction.transaction_type == "return", models.Transaction.quantity_used), else_=0)).label("returns"),
-            func.sum(case((models.Transaction.transaction_type == "restock", models.Transaction.quantity_used), else_=0)).label("restocks"),
+            rollup.project_name,
+            func.sum(rollup.transaction_count).label("total"),
+            _type_quantity("request").label("requests"),
+            _type_quantity("return").label("returns"),
+            _type_quantity("restock").label("restocks"),
         )
-        .filter(models.Transaction.created_at >= week_ago)
-        .filter(models.Transaction.project_name.isnot(None))
-        .group_by(models.Transaction.project_name)
-        .order_by(func.count(models.Transaction.transaction_id).desc())
+        .filter(rollup.day >= _weekly_rollup_start())
+        .filter(rollup.project_name.isnot(None))
+        .group_by(rollup.project_name)
+        .order_by(func.sum(rollup.transaction_count).desc())
         .limit(10)
         .all()
     )
@@ -38,7 +57,7 @@ def get_weekly_projects_stats(db: Session = Depends(get_db)):
     return [
         {
             "name": row.project_name,
-            "total": row.total or 0,
+            "total": int(row.total or 0),
             "requests": int(row.requests or 0),
             "returns": int(row.returns or 0),
             "restocks": int(row.restocks or 0),
@@ -48,25 +67,26 @@ def get_weekly_projects_stats(db: Session = Depends(get_db)):
 
 @router.get("/weekly/test-areas")
 def get_weekly_test_areas_stats(db: Session = Depends(get_db)):
-    """Get weekly statistics grouped by test area."""
-    # Get date 7 days ago
-    week_ago = datetime.now() - timedelta(days=7)
+    """Get weekly statistics grouped by test area (read from daily_usage_rollup)."""
+    return report_cache.get_or_compute("weekly/test-areas", lambda: _weekly_test_areas_stats(db))
+
+
+def _weekly_test_areas_stats(db: Session):
+    rollup = models.DailyUsageRollup
     
     results = (
         db.query(
-            models.Transaction.test_area,
-            func.count(models.Transaction.transaction_id).label("total"),
-            func.sum(case((models.Transaction.transaction_type == "request", models.Transaction.quantity_used), else_=0)).label("requests"),
-            func.sum(case((models.Transaction.transaction_type == "return", models.Transaction.quantity_used), else_=0)).label("returns"),
-            func.sum(case((models.Transaction.transaction_type == "restock", models.Transaction.quantity_used), else_=0)).label("restocks"),
+            rollup.test_area,
+            func.sum(rollup.transaction_count).label("total"),
+            _type_quantity("request").label("requests"),
+            _type_quantity("return").label("returns"),
+            _type_quantity("restock").label("restocks"),
         )
-        .filter(models.Transaction.created_at >= week_ago)
-        .filter(models.Transaction.test_area.isnot(None))
-        .filter(models.Transaction.test_area != "BSI")
-        .filter(models.Transaction.test_area != "FBT")
-        .filter(models.Transaction.test_area != "ICT")
-        .group_by(models.Transaction.test_area)
-        .order_by(func.count(models.Transaction.transaction_id).desc())
+        .filter(rollup.day >= _weekly_rollup_start())
+        .filter(rollup.test_area.isnot(None))
+        .filter(rollup.test_area.notin_(["BSI", "FBT", "ICT"]))
+        .group_by(rollup.test_area)
+        .order_by(func.sum(rollup.transaction_count).desc())
         .limit(10)
         .all()
     )
@@ -74,7 +94,7 @@ def get_weekly_test_areas_stats(db: Session = Depends(get_db)):
     return [
         {
             "name": row.test_area,
-            "total": row.total or 0,
+            "total": int(row.total or 0),
             "requests": int(row.requests or 0),
             "returns": int(row.returns or 0),
             "restocks": int(row.restocks or 0),
@@ -84,33 +104,27 @@ def get_weekly_test_areas_stats(db: Session = Depends(get_db)):
 
 @router.get("/weekly/most-used-items")
 def get_weekly_most_used_items(db: Session = Depends(get_db)):
-    """Get most used items in the last 7 days."""
-    # Get date 7 days ago
-    week_ago = datetime.now() - timedelta(days=7)
+    """Get most used items in the last 7 days (read from daily_usage_rollup)."""
+    return report_cache.get_or_compute("weekly/most-used-items", lambda: _weekly_most_used_items(db))
+
+
+def _weekly_most_used_items(db: Session):
+    rollup = models.DailyUsageRollup
+    total_requested = func.sum(rollup.quantity)
     
     results = (
         db.query(
             models.Inventory.item_id,
             models.Inventory.item_name,
             models.Inventory.item_part_number,
-            func.sum(
-                case(
-                    (models.Transaction.transaction_type == "request", models.Transaction.quantity_used),
-                    else_=0
-                )
-            ).label("total_requested"),
-            func.count(models.Transaction.transaction_id).label("transaction_count"),
+            total_requested.label("total_requested"),
+            func.sum(rollup.transaction_count).label("transaction_count"),
         )
-        .join(models.Transaction, models.Inventory.item_id == models.Transaction.item_id)
-        .filter(models.Transaction.created_at >= week_ago)
-        .filter(models.Transaction.transaction_type == "request")
+        .join(rollup, models.Inventory.item_id == rollup.item_id)
+        .filter(rollup.day >= _weekly_rollup_start())
+        .filter(rollup.transaction_type == "request")
         .group_by(models.Inventory.item_id, models.Inventory.item_name, models.Inventory.item_part_number)
-        .order_by(func.sum(
-            func.case(
-                (models.Transaction.transaction_type == "request", models.Transaction.quantity_used),
-                else_=0
-            )
-        ).desc())
+        .order_by(total_requested.desc())
         .limit(10)
         .all()
     )
@@ -121,7 +135,504 @@ def get_weekly_most_used_items(db: Session = Depends(get_db)):
             "item_name": row.item_name,
             "item_part_number": row.item_part_number or "N/A",
             "total_requested": int(row.total_requested or 0),
-            "transaction_count": row.transaction_count or 0,
+            "transaction_count": int(row.transaction_count or 0),
         }
         for row in results
     ]
+
+
+@router.get("/dashboard")
+def get_dashboard_summary(db: Session = Depends(get_db)):
+    """
+    Everything the home page needs in one payload: weekly stats by project,
+    by test area and top items, plus headline counts.
+    """
+    return report_cache.get_or_compute("dashboard", lambda: _dashboard_summary(db))
+
+
+def _usage_stats(row, name):
+    return {
+        "name": name,
+        "total": int(row.total or 0),
+        "requests": int(row.requests or 0),
+        "returns": int(row.returns or 0),
+        "restocks": int(row.restocks or 0),
+    }
+
+
+def _dashboard_summary(db: Session):
+    rollup = models.DailyUsageRollup
+    today = date.today()
+
+    total_items = select(func.count(models.Inventory.item_id)).scalar_subquery()
+    low_stock_count = (
+        select(func.count(models.Inventory.item_id))
+        .where(models.Inventory.item_current_quantity < models.Inventory.item_min_count)
+        .scalar_subquery()
+    )
+
+    # One scan of the week's rollup rows computes every grouping at once
+    rows = (
+        db.query(
+            func.grouping(rollup.project_name).label("by_project"),
+            func.grouping(rollup.test_area).label("by_test_area"),
+            func.grouping(rollup.item_id).label("by_item"),
+            rollup.project_name,
+            rollup.test_area,
+            rollup.item_id,
+            models.Inventory.item_name,
+            models.Inventory.item_part_number,
+            func.sum(rollup.transaction_count).label("total"),
+            _type_quantity("request").label("requests"),
+            _type_quantity("return").label("returns"),
+            _type_quantity("restock").label("restocks"),
+            func.sum(case((rollup.transaction_type == "request", rollup.transaction_count), else_=0)).label("request_count"),
+            func.sum(rollup.transaction_count).filter(rollup.day == today).label("today_transactions"),
+            total_items.label("total_items"),
+            low_stock_count.label("low_stock_count"),
+        )
+        .outerjoin(models.Inventory, models.Inventory.item_id == rollup.item_id)
+        .filter(rollup.day >= _weekly_rollup_start())
+        .group_by(
+            func.grouping_sets(
+                rollup.project_name,
+                rollup.test_area,
+                tuple_(rollup.item_id, models.Inventory.item_name, models.Inventory.item_part_number),
+                text("()"),
+            )
+        )
+        .all()
+    )
+
+    projects, test_areas, items = [], [], []
+    headline = {"total_items": 0, "low_stock_count": 0, "today_transactions": 0, "week_transactions": 0}
+    for row in rows:
+        if row.by_project == 0:
+            if row.project_name is not None:
+                projects.append(_usage_stats(row, row.project_name))
+        elif row.by_test_area == 0:
+            if row.test_area is not None and row.test_area not in {"BSI", "FBT", "ICT"}:
+                test_areas.append(_usage_stats(row, row.test_area))
+        elif row.by_item == 0:
+            if row.item_id is not None and (row.requests or 0) > 0:
+                items.append({
+                    "item_id": row.item_id,
+                    "item_name": row.item_name,
+                    "item_part_number": row.item_part_number or "N/A",
+                    "total_requested": int(row.requests or 0),
+                    "transaction_count": int(row.request_count or 0),
+                })
+        else:
+            headline["week_transactions"] = int(row.total or 0)
+            headline["today_transactions"] = int(row.today_transactions or 0)
+        # Scalar subqueries carry the same value on every row
+        headline["total_items"] = int(row.total_items or 0)
+        headline["low_stock_count"] = int(row.low_stock_count or 0)
+
+    projects.sort(key=lambda stat: stat["total"], reverse=True)
+    test_areas.sort(key=lambda stat: stat["total"], reverse=True)
+    items.sort(key=lambda stat: stat["total_requested"], reverse=True)
+
+    return {
+        "headline": headline,
+        "projects": projects[:10],
+        "test_areas": test_areas[:10],
+        "most_used_items": items[:10],
+    }
+
+
+USAGE_SERIES_BUCKETS = {"day", "week", "month", "quarter", "year"}
+
+
+def _usage_series_dimension(group_by: str):
+    rollup = models.DailyUsageRollup
+    return {
+        "project": rollup.project_name,
+        "test_area": rollup.test_area,
+        "item": rollup.item_id,
+        "transaction_type": rollup.transaction_type,
+    }.get(group_by)
+
+
+@router.get("/usage-series")
+def get_usage_series(
+    start_date: date | None = Query(None, description="First day (YYYY-MM-DD), default 30 days before end_date"),
+    end_date: date | None = Query(None, description="Last day, inclusive (YYYY-MM-DD), default today"),
+    bucket: str = Query("day", description="day, week, month, quarter or year"),
+    group_by: str = Query("project", description="project, test_area, item or transaction_type"),
+    transaction_type: str | None = Query("request", description="Only count this transaction type; empty for all"),
+    top_n: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """
+    Usage over an arbitrary date range, bucketed by day/week/month/quarter/year and
+    split by a grouping dimension. Only the top_n groups (by total quantity) are returned.
+    """
+    bucket = bucket.lower()
+    if bucket not in USAGE_SERIES_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of: {', '.join(sorted(USAGE_SERIES_BUCKETS))}")
+    dimension = _usage_series_dimension(group_by.lower())
+    if dimension is None:
+        raise HTTPException(status_code=400, detail="group_by must be project, test_area, item or transaction_type")
+
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=29)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+
+    rollup = models.DailyUsageRollup
+    period = func.date_trunc(bucket, rollup.day)
+
+    # Plain range on the leading rollup index column
+    in_range = [
+        rollup.day >= start_date,
+        rollup.day < end_date + timedelta(days=1),
+        dimension.isnot(None),
+    ]
+    if transaction_type:
+        in_range.append(rollup.transaction_type == transaction_type.lower())
+
+    series = (
+        select(
+            period.label("period"),
+            dimension.label("group_key"),
+            func.sum(rollup.quantity).label("quantity"),
+            func.sum(rollup.transaction_count).label("transactions"),
+        )
+        .where(*in_range)
+        .group_by(period, dimension)
+        .cte("series")
+    )
+    top_groups = (
+        select(series.c.group_key, func.sum(series.c.quantity).label("group_total"))
+        .group_by(series.c.group_key)
+        .order_by(func.sum(series.c.quantity).desc(), series.c.group_key)
+        .limit(top_n)
+        .cte("top_groups")
+    )
+
+    query = (
+        db.query(
+            series.c.period,
+            series.c.group_key,
+            series.c.quantity,
+            series.c.transactions,
+            top_groups.c.group_total,
+        )
+        .join(top_groups, top_groups.c.group_key == series.c.group_key)
+    )
+    if group_by.lower() == "item":
+        query = query.add_columns(models.Inventory.item_name).outerjoin(
+            models.Inventory, models.Inventory.item_id == series.c.group_key
+        )
+    rows = query.order_by(top_groups.c.group_total.desc(), series.c.group_key, series.c.period).all()
+
+    groups = {}
+    for row in rows:
+        group = groups.get(row.group_key)
+        if group is None:
+            group = groups[row.group_key] = {
+                "key": row.group_key,
+                "name": getattr(row, "item_name", None) or row.group_key,
+                "total": int(row.group_total or 0),
+                "series": [],
+            }
+        group["series"].append({
+            "period": row.period.date().isoformat(),
+            "quantity": int(row.quantity or 0),
+            "transactions": int(row.transactions or 0),
+        })
+
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "bucket": bucket,
+        "group_by": group_by.lower(),
+        "transaction_type": transaction_type.lower() if transaction_type else None,
+        "groups": list(groups.values()),
+    }
+
+
+@router.get("/forecast")
+def get_item_forecasts(
+    project: str | None = None,
+    test_area: str | None = None,
+    below_reorder_point: bool = False,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    """
+    Latest demand forecasts per item, soonest stock-out first.
+    below_reorder_point=true lists only items at or below their suggested reorder point.
+    """
+    forecast = models.ItemForecast
+    query = (
+        db.query(
+            forecast,
+            models.Inventory.item_name,
+            models.Inventory.item_part_number,
+            models.Inventory.item_min_count,
+            models.Inventory.project_name,
+            models.Inventory.test_area,
+        )
+        .join(models.Inventory, models.Inventory.item_id == forecast.item_id)
+    )
+    if project:
+        query = query.filter(models.Inventory.project_name == project)
+    if test_area:
+        query = query.filter(models.Inventory.test_area == test_area)
+    if below_reorder_point:
+        query = query.filter(forecast.current_quantity <= forecast.suggested_reorder_point)
+
+    rows = (
+        query.order_by(forecast.days_of_cover.asc().nulls_last(), models.Inventory.item_name)
+        .limit(limit)
+        .all()
+    )
+
+    return [
+        {
+            "item_id": f.item_id,
+            "item_name": item_name,
+            "item_part_number": item_part_number or "N/A",
+            "project_name": project_name,
+            "test_area": item_test_area,
+            "forecast_date": f.forecast_date,
+            "current_quantity": f.current_quantity,
+            "item_min_count": item_min_count,
+            "moving_average_daily": round(f.moving_average_daily, 3),
+            "ewma_daily": round(f.ewma_daily, 3),
+            "demand_std": round(f.demand_std, 3),
+            "days_of_cover": round(f.days_of_cover, 1) if f.days_of_cover is not None else None,
+            "suggested_reorder_point": f.suggested_reorder_point,
+        }
+        for f, item_name, item_part_number, item_min_count, project_name, item_test_area in rows
+    ]
+
+
+@router.get("/anomalies")
+def get_usage_anomalies(
+    start_date: date | None = Query(None, description="First day (YYYY-MM-DD), default 30 days ago"),
+    end_date: date | None = Query(None, description="Last day, inclusive (YYYY-MM-DD), default today"),
+    project: str | None = None,
+    employee_id: int | None = None,
+    item_id: int | None = None,
+    min_z: float = Query(0, ge=0, description="Only flags with at least this z-score"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    """
+    Days on which an employee requested far more of an item than their trailing
+    baseline, newest and most extreme first. Flags are computed by a nightly job.
+    """
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=29)
+
+    anomaly = models.UsageAnomaly
+    query = (
+        db.query(
+            anomaly,
+            models.Inventory.item_name,
+            models.Inventory.item_part_number,
+            models.Employee.employee_name,
+        )
+        .outerjoin(models.Inventory, models.Inventory.item_id == anomaly.item_id)
+        .outerjoin(models.Employee, models.Employee.employee_id == anomaly.employee_id)
+        .filter(anomaly.day >= start_date, anomaly.day <= end_date)
+    )
+    if project:
+        query = query.filter(anomaly.project_name == project)
+    if employee_id is not None:
+        query = query.filter(anomaly.employee_id == employee_id)
+    if item_id is not None:
+        query = query.filter(anomaly.item_id == item_id)
+    if min_z:
+        query = query.filter(anomaly.z_score >= min_z)
+
+    rows = query.order_by(anomaly.day.desc(), anomaly.z_score.desc()).limit(limit).all()
+
+    return [
+        {
+            "anomaly_id": a.anomaly_id,
+            "day": a.day,
+            "item_id": a.item_id,
+            "item_name": item_name,
+            "item_part_number": item_part_number or "N/A",
+            "employee_id": a.employee_id,
+            "employee_name": employee_name,
+            "project_name": a.project_name,
+            "quantity": a.quantity,
+            "baseline_mean": round(a.baseline_mean, 2),
+            "baseline_std": round(a.baseline_std, 2),
+            "z_score": round(a.z_score, 2),
+        }
+        for a, item_name, item_part_number, employee_name in rows
+    ]
+
+
+REPORT_JOB_TYPES = {"weekly", "monthly"}
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _report_period(report_type: str, day: date):
+    """Calendar week (Monday-Sunday) or month containing `day`."""
+    if report_type == "weekly":
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6)
+    start = day.replace(day=1)
+    next_month = (start + timedelta(days=32)).replace(day=1)
+    return start, next_month - timedelta(days=1)
+
+
+def _workbook_data(db: Session, report_type: str, start: date, end: date):
+    """Plain (picklable) data for one report workbook, read from daily_usage_rollup."""
+    rollup = models.DailyUsageRollup
+    in_period = [rollup.day >= start, rollup.day <= end]
+
+    def usage_by(column):
+        rows = (
+            db.query(
+                column.label("name"),
+                func.sum(rollup.transaction_count).label("total"),
+                _type_quantity("request").label("requests"),
+                _type_quantity("return").label("returns"),
+                _type_quantity("restock").label("restocks"),
+            )
+            .filter(*in_period)
+            .filter(column.isnot(None))
+            .group_by(column)
+            .order_by(func.sum(rollup.transaction_count).desc())
+            .all()
+        )
+        return [_usage_stats(row, row.name) for row in rows]
+
+    projects = usage_by(rollup.project_name)
+    test_areas = usage_by(rollup.test_area)
+
+    total_requested = func.sum(rollup.quantity)
+    top_items = [
+        {
+            "item_name": row.item_name,
+            "item_part_number": row.item_part_number or "N/A",
+            "total_requested": int(row.total_requested or 0),
+            "transaction_count": int(row.transaction_count or 0),
+        }
+        for row in (
+            db.query(
+                models.Inventory.item_name,
+                models.Inventory.item_part_number,
+                total_requested.label("total_requested"),
+                func.sum(rollup.transaction_count).label("transaction_count"),
+            )
+            .join(rollup, models.Inventory.item_id == rollup.item_id)
+            .filter(*in_period)
+            .filter(rollup.transaction_type == "request")
+            .group_by(models.Inventory.item_id, models.Inventory.item_name, models.Inventory.item_part_number)
+            .order_by(total_requested.desc())
+            .limit(50)
+            .all()
+        )
+    ]
+
+    low_stock = [
+        {
+            "item_name": item.item_name,
+            "item_part_number": item.item_part_number or "N/A",
+            "project_name": item.project_name,
+            "test_area": item.test_area,
+            "item_current_quantity": item.item_current_quantity or 0,
+            "item_min_count": item.item_min_count or 0,
+            "shortfall": (item.item_min_count or 0) - (item.item_current_quantity or 0),
+        }
+        for item in (
+            db.query(models.Inventory)
+            .filter(models.Inventory.item_current_quantity < models.Inventory.item_min_count)
+            .order_by(models.Inventory.project_name, models.Inventory.item_name)
+            .all()
+        )
+    ]
+
+    return {
+        "title": f"MMIS {report_type.capitalize()} Usage Report",
+        "period_start": start.isoformat(),
+        "period_end": end.isoformat(),
+        "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M"),
+        "summary": {
+            "Transactions": sum(stat["total"] for stat in projects),
+            "Quantity requested": sum(stat["requests"] for stat in projects),
+            "Quantity returned": sum(stat["returns"] for stat in projects),
+            "Quantity restocked": sum(stat["restocks"] for stat in projects),
+            "Items below minimum": len(low_stock),
+        },
+        "projects": projects,
+        "test_areas": test_areas,
+        "top_items": top_items,
+        "low_stock": low_stock,
+    }
+
+
+def _report_job_out(job: models.ReportJob):
+    status = report_jobs.job_status(job)
+    return schemas.ReportJobOut(
+        job_id=job.job_id,
+        report_type=job.report_type,
+        period_start=job.period_start,
+        period_end=job.period_end,
+        status=status,
+        error=job.error,
+        created_at=job.created_at,
+        completed_at=job.completed_at,
+        download_url=f"/reports/jobs/{job.job_id}/download" if status == "completed" else None,
+    )
+
+
+def _get_report_job(db: Session, job_id: str) -> models.ReportJob:
+    job = db.query(models.ReportJob).filter(models.ReportJob.job_id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job
+
+
+@router.post("/jobs", response_model=schemas.ReportJobOut, status_code=202)
+def submit_report_job(data: schemas.ReportJobCreate, db: Session = Depends(get_db)):
+    """
+    Queue a weekly or monthly XLSX workbook. Returns immediately; poll
+    GET /reports/jobs/{job_id} and download once status is "completed".
+    Requests for a period that already has a workbook reuse it.
+    """
+    report_type = data.report_type.lower()
+    if report_type not in REPORT_JOB_TYPES:
+        raise HTTPException(status_code=400, detail="report_type must be weekly or monthly")
+    start, end = _report_period(report_type, data.period_start or date.today())
+
+    job = report_jobs.submit(
+        db, report_type, start, end,
+        lambda: _workbook_data(db, report_type, start, end),
+    )
+    return _report_job_out(job)
+
+
+@router.get("/jobs/{job_id}", response_model=schemas.ReportJobOut)
+def get_report_job(job_id: str, db: Session = Depends(get_db)):
+    return _report_job_out(_get_report_job(db, job_id))
+
+
+@router.get("/jobs/{job_id}/download")
+def download_report_job(job_id: str, db: Session = Depends(get_db)):
+    job = _get_report_job(db, job_id)
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Report is not ready (status: {report_jobs.job_status(job)})")
+    path = report_jobs.report_path(job.job_id)
+    if not path.exists():
+        raise HTTPException(status_code=410, detail="Report file has expired. Submit the job again.")
+    return FileResponse(
+        path,
+        media_type=XLSX_MEDIA_TYPE,
+        filename=f"mmis_{job.report_type}_{job.period_start.isoformat()}.xlsx",
+    )
+
+
+@router.get("/cache-stats")
+def get_report_cache_stats():
+    """Hit/miss counters for the report response cache."""
+    return report_cache.stats()
@@ -0,0 +1,49 @@
+# backend/app/routes/scan.py
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from ..database import get_db
+from .. import crud, schemas
+from ..utils import scan_index
+
+router = APIRouter(prefix="/scan", tags=["Scan"])
+
+
+# `path` so codes containing "/" (some asset tags and serials) still match
+@router.get("/{code:path}", response_model=schemas.ScanResult)
+def resolve_scan(
+    code: str,
+    project: str | None = None,
+    test_area: str | None = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Resolve a scanned item part number, fixture asset tag or fixture serial number.
+    When a part number exists in several projects, rows for the given project /
+    test area come first. Also returns the fixtures selectable for the first item
+    and, if it is out of stock, the same item in other projects.
+    """
+    items, fixtures = scan_index.resolve(db, code)
+    if not items and not fixtures:
+        raise HTTPException(status_code=404, detail="No item or fixture matches this code")
+
+    items.sort(key=lambda item: (
+        project is not None and item.project_name != project,
+        test_area is not None and item.test_area != test_area,
+        -(item.item_current_quantity or 0),
+        item.item_id,
+    ))
+
+    fixture_options, alternatives = [], []
+    if items:
+        first = items[0]
+        fixture_options = crud.get_fixture_options(db, first)
+        if not first.item_current_quantity:
+            alternatives = crud.get_item_alternatives(db, first)
+
+    return {
+        "code": code,
+        "items": items,
+        "fixtures": fixtures,
+        "fixture_options": fixture_options,
+        "alternatives": alternatives,
+    }
@@ -1,20 +1,37 @@
 # backend/app/routes/transactions.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from .. import crud, schemas, models
-from ..database import get_db
+from ..database import get_db, SessionLocal
+from ..utils import archive, idempotency
+from datetime import datetime
+import csv
+import io
+import json
 
 router = APIRouter(prefix="/transactions", tags=["Transactions"])
 
+
+def _check_history_dates(start_date: str | None, end_date: str | None):
+    """Reject malformed date filters instead of silently returning unfiltered history."""
+    for name, value in (("start_date", start_date), ("end_date", end_date)):
+        if value:
+            try:
+                crud.parse_history_date(value)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"{name} must be a date in YYYY-MM-DD format")
+
+
 @router.post("/request")
 def request_item(t: schemas.TransactionBase, db: Session = Depends(get_db)):
     """Employee requests an item (decrease quantity)."""
+    # Stock decrement and transaction insert are committed together
     updated_item = crud.subtract_item_quantity(db, t.item_id, t.quantity_used)
     if not updated_item:
+        db.rollback()
         raise HTTPException(status_code=400, detail="Insufficient stock or invalid item")
-    
 
-    
     crud.create_transaction(db, t)
     return {"message": "Request confirmed", "item": updated_item.item_name}
 
@@ -29,83 +46,144 @@ def get_all(
     db: Session = Depends(get_db)
 ):
     """View all transactions with optional filters."""
-    from datetime import datetime
-    
-    result = (
-        db.query(
-            models.Transaction.transaction_id,
-            models.Transaction.transaction_type,
-            models.Transaction.quantity_used,
-            models.Transaction.created_at,
-            models.Inventory.item_name,
-            models.Inventory.item_part_number,
-            models.Inventory.item_description,
-            models.Inventory.item_manufacturer,
-            models.Inventory.item_unit_price,
-            models.Transaction.test_area,  # Use test_area from Transaction (works for both inventory and fixtures)
-            models.Transaction.project_name,  # Use project_name from Transaction (works for both inventory and fixtures)
-            models.Fixture.fixture_name,
-            models.Employee.employee_name,
-            models.Transaction.fixture_id,
-            models.Transaction.item_id,
-        )
-        .outerjoin(models.Inventory, models.Transaction.item_id == models.Inventory.item_id)  # LEFT JOIN for inventory
-        .outerjoin(models.Fixture, models.Transaction.fixture_id == models.Fixture.fixture_id)  # LEFT JOIN for fixture
-        .join(models.Employee, models.Transaction.employee_id == models.Employee.employee_id)
+    _check_history_dates(start_date, end_date)
+    result = crud.get_transaction_history_query(
+        db, test_area, project, transaction_type, start_date, end_date
     )
+    result = result.order_by(models.Transaction.created_at.desc()).all()
+    return [crud.transaction_history_row_to_dict(row) for row in result]
 
-    # Apply filters
-    if test_area:
-        result = result.filter(models.Transaction.test_area == test_area)
-    
-    if project:
-        result = result.filter(models.Transaction.project_name == project)
-    
-    if transaction_type:
-        result = result.filter(models.Transaction.transaction_type == transaction_type.lower())
-    
-    if start_date:
-        try:
-            # Parse date string (format: YYYY-MM-DD)
-            start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-            result = result.filter(models.Transaction.created_at >= start_dt)
-        except Exception as e:
-            print(f"Error parsing start_date: {e}")
-            pass
-    
-    if end_date:
-        try:
-            # Parse date string and add one day to include the entire end date
-            from datetime import timedelta
-            end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-            end_dt = end_dt + timedelta(days=1)
-            result = result.filter(models.Transaction.created_at < end_dt)
-        except Exception as e:
-            print(f"Error parsing end_date: {e}")
-            pass
 
-    result = result.order_by(models.Transaction.created_at.desc()).all()
+@router.get("/history")
+def get_history(
+    test_area: str | None = None,
+    project: str | None = None,
+    transaction_type: str | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    limit: int = Query(50, ge=1, le=500, description="Page size"),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(False, description="Also count all matching rows (slower)"),
+    include_archived: bool = Query(False, description="Continue into archived partitions"),
+    db: Session = Depends(get_db)
+):
+    """
+    Keyset-paginated transaction history, newest first.
+    Pass the returned next_cursor to fetch the following page.
+    """
+    _check_history_dates(start_date, end_date)
+    try:
+        return crud.get_transaction_history_page(
+            db,
+            test_area=test_area,
+            project=project,
+            transaction_type=transaction_type,
+            start_date=start_date,
+            end_date=end_date,
+            limit=limit,
+            cursor=cursor,
+            include_total=include_total,
+            include_archived=include_archived,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+EXPORT_COLUMNS = [
+    "transaction_id",
+    "transaction_type",
+    "quantity_used",
+    "created_at",
+    "item_name",
+    "item_part_number",
+    "item_description",
+    "item_manufacturer",
+    "item_unit_price",
+    "test_area",
+    "project_name",
+    "fixture_name",
+    "employee_name",
+]
+EXPORT_BATCH_SIZE = 1000
+
+
+def _export_rows(filters: dict, include_archived: bool):
+    """
+    Yield history rows as dicts using a server-side cursor, followed by the
+    archived rows when requested.
+    Opens its own session because the response is streamed after the
+    request dependencies have been cleaned up.
+    """
+    db = SessionLocal()
+    try:
+        query = (
+            crud.get_transaction_history_query(db, **filters)
+            .order_by(models.Transaction.created_at.desc(), models.Transaction.transaction_id.desc())
+            .yield_per(EXPORT_BATCH_SIZE)
+        )
+        for row in query:
+            yield crud.transaction_history_row_to_dict(row)
+    finally:
+        db.close()
+
+    if include_archived:
+        for row in archive.iter_archived_rows(**filters):
+            yield {column: row.get(column) for column in EXPORT_COLUMNS}
+
+
+def _stream_csv(filters: dict, include_archived: bool):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for count, row in enumerate(_export_rows(filters, include_archived), start=1):
+        writer.writerow(row)
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
+
+def _stream_ndjson(filters: dict, include_archived: bool):
+    lines = []
+    for row in _export_rows(filters, include_archived):
+        lines.append(json.dumps(row, default=str))
+        if len(lines) >= EXPORT_BATCH_SIZE:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+@router.get("/export")
+def export_transactions(
+    format: str = Query("csv", description="csv or ndjson"),
+    test_area: str | None = None,
+    project: str | None = None,
+    transaction_type: str | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    include_archived: bool = Query(False, description="Also stream rows from archived partitions"),
+):
+    """Stream the filtered transaction history as CSV or NDJSON."""
+    export_format = format.lower()
+    if export_format not in {"csv", "ndjson"}:
+        raise HTTPException(status_code=400, detail="format must be 'csv' or 'ndjson'")
+    _check_history_dates(start_date, end_date)
+
+    filters = {
+        "test_area": test_area,
+        "project": project,
+        "transaction_type": transaction_type,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+    filename = f"transactions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+    if export_format == "csv":
+        return StreamingResponse(_stream_csv(filters, include_archived), media_type="text/csv", headers=headers)
+    return StreamingResponse(_stream_ndjson(filters, include_archived), media_type="application/x-ndjson", headers=headers)
 
-    # Convert row tuples to dicts
-    transactions = []
-    for row in result:
-        transactions.append({
-            "transaction_id": row[0],
-            "transaction_type": row[1],
-            "quantity_used": row[2],
-            "created_at": row[3],
-            "item_name": row[4],
-            "item_part_number": row[5],
-            "item_description": row[6],
-            "item_manufacturer": row[7],
-            "item_unit_price": str(row[8]) if row[8] is not None else None,  # Convert Decimal to string
-            "test_area": row[9],
-            "project_name": row[10],
-            "fixture_name": row[11],
-            "employee_name": row[12],
-        })
-
-    return transactions
 
 @router.get("/user/{employee_id}")
 def get_user_transactions(employee_id: int, db: Session = Depends(get_db)):
@@ -121,10 +199,25 @@ def get_user_transactions_full(employee_id: int, db: Session = Depends(get_db)):
     """Returns user transactions WITH item details."""
     return crud.get_transactions_by_employee(db, employee_id)
 
+
+@router.get("/open", response_model=list[schemas.TransactionOut])
+def get_open_checkouts(
+    employee_id: int | None = None,
+    project: str | None = None,
+    test_area: str | None = None,
+    db: Session = Depends(get_db)
+):
+    """Returns open (not fully returned) requests across the shop, optionally filtered."""
+    return crud.get_open_checkouts(
+        db,
+        employee_id=employee_id,
+        all_employees=employee_id is None,
+        project=project,
+        test_area=test_area,
+    )
+
 @router.get("/{transaction_id}", response_model=schemas.TransactionOut)
 def get_transaction(transaction_id: int, db: Session = Depends(get_db)):
-    from sqlalchemy import func
-    
     tx = (
         db.query(models.Transaction)
         .join(models.Inventory, models.Transaction.item_id == models.Inventory.item_id)
@@ -140,37 +233,7 @@ def get_transaction(transaction_id: int, db: Session = Depends(get_db)):
     # Calculate remaining returnable quantity if this is a request transaction
     remaining_quantity = None
     if tx.transaction_type == "request":
-        # First, try to match returns that explicitly reference this request_transaction_id
-        explicit_returns = (
-            db.query(
-                func.coalesce(func.sum(models.Transaction.quantity_used), 0)
-            )
-            .filter(models.Transaction.transaction_type == "return")
-            .filter(models.Transaction.remarks.like(f"REQUEST_TX_ID:{tx.transaction_id}%"))
-            .scalar() or 0
-        )
-        
-        # If no explicit returns found, fall back to old matching logic (backward compatibility)
-        if explicit_returns == 0:
-            total_returned = (
-                db.query(
-                    func.coalesce(func.sum(models.Transaction.quantity_used), 0)
-                )
-                .filter(models.Transaction.item_id == tx.item_id)
-                .filter(models.Transaction.employee_id == tx.employee_id)
-                .filter(models.Transaction.fixture_id == tx.fixture_id)
-                .filter(models.Transaction.transaction_type == "return")
-                .filter(models.Transaction.created_at >= tx.created_at)
-                # Exclude returns that are already linked to other requests
-                .filter(
-                    ~models.Transaction.remarks.like("REQUEST_TX_ID:%")
-                )
-                .scalar() or 0
-            )
-        else:
-            total_returned = explicit_returns
-            
-        remaining_quantity = tx.quantity_used - total_returned
+        remaining_quantity = crud.get_remaining_quantity(db, tx)
 
     result = {
         "transaction_id": tx.transaction_id,
@@ -181,6 +244,7 @@ def get_transaction(transaction_id: int, db: Session = Depends(get_db)):
         "quantity_used": tx.quantity_used,
         "created_at": tx.created_at,
         "remarks": tx.remarks,
+        "request_transaction_id": tx.request_transaction_id,
         "test_area": tx.test_area,
         "project_name": tx.project_name,
 
@@ -208,6 +272,7 @@ def get_transaction(transaction_id: int, db: Session = Depends(get_db)):
 def return_item(
     t: schemas.TransactionBase,
     request_transaction_id: int = Query(None, description="The transaction_id of the original request this return belongs to"),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db)
 ):
     """Employee returns an item (increase quantity).
@@ -215,40 +280,117 @@ def return_item(
     Args:
         t: Transaction data including item_id, employee_id, fixture_id, quantity, etc.
         request_transaction_id: The transaction_id of the original request this return belongs to.
+        idempotency_key: Optional key; retries with the same key replay the first response.
     """
-    print("receiving return request")
-    print(f"Request transaction ID: {request_transaction_id}")
-    print(t)
-    print("end-----------")
-    
-    # Add quantity back
-    crud.add_item_quantity(db, t.item_id, t.quantity_used)
+    payload = {"transaction": t, "request_transaction_id": request_transaction_id}
+    return idempotency.run(
+        db, idempotency_key, "transactions.return", payload,
+        lambda: _return_item(t, request_transaction_id, db),
+    )
+
 
-    # Store request_transaction_id in remarks if provided, so we can link returns to specific requests
-    # Format: "REQUEST_TX_ID:123|user remarks" or just "REQUEST_TX_ID:123" if no remarks
-    remarks_with_tx_id = t.remarks or ""
+def _return_item(t: schemas.TransactionBase, request_transaction_id: int | None, db: Session):
     if request_transaction_id:
-        if remarks_with_tx_id:
-            remarks_with_tx_id = f"REQUEST_TX_ID:{request_transaction_id}|{remarks_with_tx_id}"
-        else:
-            remarks_with_tx_id = f"REQUEST_TX_ID:{request_transaction_id}"
+        request_tx = (
+            db.query(models.Transaction)
+            .filter(models.Transaction.transaction_id == request_transaction_id)
+            .first()
+        )
+        if not request_tx or request_tx.transaction_type != "request":
+            raise HTTPException(status_code=404, detail="Request transaction not found")
+
+    # Add quantity back (committed together with the return transaction)
+    if not crud.add_item_quantity(db, t.item_id, t.quantity_used):
+        raise HTTPException(status_code=404, detail="Item not found")
 
-    # Create the return transaction
+    # Create the return transaction, linked to the request it belongs to
     new_tx = models.Transaction(
         item_id=t.item_id,
         employee_id=t.employee_id,
         fixture_id=t.fixture_id,
         quantity_used=t.quantity_used,
         transaction_type="return",
-        remarks=remarks_with_tx_id,
+        remarks=t.remarks or "",
         test_area=t.test_area,
-        project_name=t.project_name
+        project_name=t.project_name,
+        request_transaction_id=request_transaction_id,
     )
 
     db.add(new_tx)
-    db.commit()
-    db.refresh(new_tx)
+    crud.apply_return_to_open_checkouts(db, new_tx)
+    db.flush()
 
     return {"message": "Return logged"}
 
 
+@router.post("/return/batch")
+def return_items_batch(data: schemas.BatchRequestCreate, db: Session = Depends(get_db)):
+    """
+    Return a whole kit in one call. Item rows are locked in item_id order and
+    all lines are committed together; if any line is invalid nothing is changed
+    and the per-line results explain why.
+    """
+    if not data.lines:
+        raise HTTPException(status_code=400, detail="At least one line is required")
+
+    items = crud.lock_inventory_items(db, [line.item_id for line in data.lines])
+
+    request_ids = {line.request_transaction_id for line in data.lines if line.request_transaction_id}
+    request_txs = {}
+    if request_ids:
+        request_txs = {
+            tx.transaction_id: tx
+            for tx in db.query(models.Transaction)
+            .filter(models.Transaction.transaction_id.in_(request_ids))
+            .filter(models.Transaction.transaction_type == "request")
+            .all()
+        }
+
+    results = []
+    failed = False
+    for index, line in enumerate(data.lines):
+        result = {"line": index, "item_id": line.item_id, "quantity": line.quantity}
+        if line.quantity <= 0:
+            result.update(status="error", detail="Quantity must be greater than 0")
+        elif line.item_id not in items:
+            result.update(status="error", detail="Item not found")
+        elif line.request_transaction_id and line.request_transaction_id not in request_txs:
+            result.update(status="error", detail="Request transaction not found")
+        else:
+            result["status"] = "ok"
+        failed = failed or result["status"] != "ok"
+        results.append(result)
+
+    if failed:
+        db.rollback()
+        raise HTTPException(status_code=400, detail={"message": "Kit return rejected", "lines": results})
+
+    transactions = []
+    for line in data.lines:
+        item = items[line.item_id]
+        item.item_current_quantity += line.quantity
+        transaction = models.Transaction(
+            item_id=line.item_id,
+            employee_id=data.employee_id,
+            fixture_id=data.fixture_id,
+            quantity_used=line.quantity,
+            transaction_type="return",
+            remarks=data.remarks or "",
+            test_area=item.test_area,
+            project_name=item.project_name,
+            request_transaction_id=line.request_transaction_id,
+        )
+        db.add(transaction)
+        crud.apply_return_to_open_checkouts(db, transaction)
+        transactions.append(transaction)
+
+    db.flush()
+
+    # Collect results before commit expires the loaded rows
+    for result, transaction in zip(results, transactions):
+        result["transaction_id"] = transaction.transaction_id
+        result["new_quantity"] = items[transaction.item_id].item_current_quantity
+
+    db.commit()
+
+    return {"message": "Kit return logged", "lines": results}
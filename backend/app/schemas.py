@@ -1,7 +1,7 @@
 # backend/app/schemas.py
 from pydantic import BaseModel, validator   # Base class for creating Pydantic data validation models
 from datetime import datetime, date
-from typing import Optional, Union  # Allows defining optional (nullable) fields
+from typing import List, Optional, Union  # Allows defining optional (nullable) fields
 from decimal import Decimal
 
 # ===== Employee =====
@@ -62,6 +62,20 @@ class RequestCreate(BaseModel):
     fixture_id: Optional[int] = None
     quantity: int    
 
+
+# One (item, quantity) line of a kit checkout or kit return
+class BatchLine(BaseModel):
+    item_id: int
+    quantity: int
+    request_transaction_id: Optional[int] = None  # Returns only: the request this line belongs to
+
+
+class BatchRequestCreate(BaseModel):
+    employee_id: int
+    fixture_id: Optional[int] = None
+    remarks: Optional[str] = None
+    lines: List[BatchLine]
+
 # Schema for returning full inventory details to the client
 class InventoryOut(InventoryBase):
     item_id: int
@@ -92,6 +106,7 @@ class TransactionOut(BaseModel):
     quantity_used: int
     created_at: datetime
     remarks: Optional[str] = None
+    request_transaction_id: Optional[int] = None  # For return transactions: the request being returned
 
     item_name: Optional[str] = None
     item_part_number: Optional[str] = None
@@ -119,6 +134,22 @@ class ReportOut(BaseModel):
     created_at: datetime
     class Config:
         from_attributes = True  # Enables ORM model conversion
+
+# Schema for submitting a spreadsheet report job
+class ReportJobCreate(BaseModel):
+    report_type: str = "weekly"  # weekly or monthly
+    period_start: Optional[date] = None  # any day in the period; defaults to today
+
+class ReportJobOut(BaseModel):
+    job_id: str
+    report_type: str
+    period_start: date
+    period_end: date
+    status: str
+    error: Optional[str] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    download_url: Optional[str] = None
 #------------------------------------------------------------------------------------------------------------------------------------------
 # ===== Fixture =====
 # Schema for reporting fixture data
@@ -135,6 +166,16 @@ class FixtureOut(FixtureBase):
         from_attributes = True
 
 
+# ===== Scan =====
+# Everything the checkout screen needs after scanning a code
+class ScanResult(BaseModel):
+    code: str
+    items: List[InventoryOut]            # inventory rows with this part number
+    fixtures: List[FixtureOut]           # fixtures with this asset tag or serial number
+    fixture_options: List[FixtureOut]    # fixtures selectable for the first item's project/test area
+    alternatives: List[InventoryOut]     # same item in other projects, when the first item is out of stock
+
+
 # ===== Project Documents =====
 class ProjectDocumentUpdate(BaseModel):
     document_scope: Optional[str] = None
@@ -0,0 +1,119 @@
+# backend/app/utils/anomaly.py
+# ----------------------------------------------------------
+# Usage anomaly detection: loads daily request volumes per
+# (item, employee, project) into one series x days NumPy matrix
+# and flags days far above each series' trailing baseline using
+# a rolling z-score computed from cumulative sums.
+# ----------------------------------------------------------
+import os
+from datetime import date, timedelta
+import numpy as np
+from sqlalchemy import Date, cast, func, insert, select
+from sqlalchemy.orm import Session
+from .. import models
+
+ANOMALY_LOOKBACK_DAYS = int(os.getenv("ANOMALY_LOOKBACK_DAYS", "180"))
+ANOMALY_WINDOW_DAYS = int(os.getenv("ANOMALY_WINDOW_DAYS", "28"))
+ANOMALY_Z_THRESHOLD = float(os.getenv("ANOMALY_Z_THRESHOLD", "3.5"))
+# Ignore small absolute volumes, and keep near-constant series from producing huge scores
+ANOMALY_MIN_QUANTITY = int(os.getenv("ANOMALY_MIN_QUANTITY", "5"))
+ANOMALY_MIN_STD = float(os.getenv("ANOMALY_MIN_STD", "1.0"))
+
+
+def rolling_zscores(
+    volumes: np.ndarray,
+    window_days: int = ANOMALY_WINDOW_DAYS,
+    min_std: float = ANOMALY_MIN_STD,
+):
+    """
+    Score every day against the `window_days` days before it, for all series at once.
+
+    volumes: (series, days) daily quantities, oldest day first
+
+    Returns (mean, std, z) arrays of shape (series, days - window_days); column j
+    scores day j + window_days. Rolling sums come from cumulative sums, so the cost
+    is linear in the matrix size regardless of the window length.
+    """
+    padded = np.zeros((volumes.shape[0], volumes.shape[1] + 1))
+    np.cumsum(volumes, axis=1, out=padded[:, 1:])
+    padded_sq = np.zeros_like(padded)
+    np.cumsum(volumes ** 2, axis=1, out=padded_sq[:, 1:])
+
+    days = volumes.shape[1]
+    window_sum = padded[:, window_days:days] - padded[:, :days - window_days]
+    window_sq = padded_sq[:, window_days:days] - padded_sq[:, :days - window_days]
+
+    mean = window_sum / window_days
+    std = np.sqrt(np.clip(window_sq / window_days - mean ** 2, 0, None))
+    z = (volumes[:, window_days:] - mean) / np.maximum(std, min_std)
+    return mean, std, z
+
+
+def detect_usage_anomalies(db: Session, lookback_days: int = ANOMALY_LOOKBACK_DAYS) -> int:
+    """
+    Recompute usage_anomalies for every day in the scored range (the lookback
+    window minus the first baseline window). Returns the number of flags stored.
+    """
+    today = date.today()
+    start = today - timedelta(days=lookback_days - 1)
+    first_scored = start + timedelta(days=ANOMALY_WINDOW_DAYS)
+
+    day = cast(models.Transaction.created_at, Date)
+    history = (
+        db.query(
+            models.Transaction.item_id,
+            models.Transaction.employee_id,
+            models.Transaction.project_name,
+            day,
+            func.sum(models.Transaction.quantity_used),
+        )
+        .filter(models.Transaction.transaction_type == "request")
+        .filter(models.Transaction.created_at >= start)
+        .group_by(models.Transaction.item_id, models.Transaction.employee_id, models.Transaction.project_name, day)
+        .all()
+    )
+
+    records = []
+    if history and lookback_days > ANOMALY_WINDOW_DAYS:
+        item_ids = np.array([row[0] if row[0] is not None else -1 for row in history])
+        employee_ids = np.array([row[1] if row[1] is not None else -1 for row in history])
+        project_names, project_codes = np.unique(
+            np.array([row[2] or "" for row in history], dtype=object), return_inverse=True
+        )
+        offsets = np.array([(row[3] - start).days for row in history])
+        quantities = np.array([row[4] or 0 for row in history], dtype=float)
+
+        # One row per (item, employee, project) series
+        keys, series_index = np.unique(
+            np.column_stack([item_ids, employee_ids, project_codes.reshape(-1)]), axis=0, return_inverse=True
+        )
+        series_index = series_index.reshape(-1)
+        in_range = (offsets >= 0) & (offsets < lookback_days)
+        volumes = np.zeros((len(keys), lookback_days))
+        np.add.at(volumes, (series_index[in_range], offsets[in_range]), quantities[in_range])
+
+        mean, std, z = rolling_zscores(volumes)
+        scored = volumes[:, ANOMALY_WINDOW_DAYS:]
+        flagged_series, flagged_days = np.nonzero((z >= ANOMALY_Z_THRESHOLD) & (scored >= ANOMALY_MIN_QUANTITY))
+
+        for s, d in zip(flagged_series.tolist(), flagged_days.tolist()):
+            item_id, employee_id, project_code = keys[s]
+            records.append({
+                "day": first_scored + timedelta(days=d),
+                "item_id": int(item_id) if item_id >= 0 else None,
+                "employee_id": int(employee_id) if employee_id >= 0 else None,
+                "project_name": project_names[project_code] or None,
+                "quantity": int(scored[s, d]),
+                "baseline_mean": float(mean[s, d]),
+                "baseline_std": float(std[s, d]),
+                "z_score": float(z[s, d]),
+            })
+
+    # Every worker's scheduler runs this job; serialize so two runs cannot both
+    # delete and then both insert the same flags
+    db.execute(select(func.pg_advisory_xact_lock(func.hashtext("usage_anomalies"))))
+    db.query(models.UsageAnomaly).filter(models.UsageAnomaly.day >= first_scored).delete(synchronize_session=False)
+    if records:
+        db.execute(insert(models.UsageAnomaly), records)
+    db.commit()
+    return len(records)
@@ -0,0 +1,261 @@
+# backend/app/utils/archive.py
+# ----------------------------------------------------------
+# Monthly partition management and cold-data archival for the
+# transactions table. Partitions older than the retention window
+# are written to gzip NDJSON files, then detached and dropped.
+# Archived rows stay readable through iter_archived_rows().
+#
+# Each archive is a series of gzip members of ARCHIVE_BLOCK_ROWS
+# rows (still one valid .gz file), with a sidecar index holding
+# each member's byte offset and first (created_at, transaction_id),
+# so a keyset page starts reading at the right block.
+# ----------------------------------------------------------
+import gzip
+import json
+import logging
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Number of whole months kept in the live transactions table
+TRANSACTION_RETENTION_MONTHS = int(os.getenv("TRANSACTION_RETENTION_MONTHS", "12"))
+# Number of future monthly partitions created ahead of time
+PARTITION_MONTHS_AHEAD = 2
+
+PARTITION_PREFIX = "transactions_p"
+# Rows per gzip member; the unit a keyset read seeks to
+ARCHIVE_BLOCK_ROWS = 1000
+
+ARCHIVE_DIR = Path(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))) / "archive" / "transactions"
+
+
+def _add_months(month_start: date, months: int) -> date:
+    month_index = month_start.year * 12 + (month_start.month - 1) + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(month_start: date) -> str:
+    """Return the partition table name for a month, e.g. transactions_p2025_01."""
+    return f"{PARTITION_PREFIX}{month_start.year:04d}_{month_start.month:02d}"
+
+
+def partition_month(name: str):
+    """Return the first day of the month a partition covers, or None for non-monthly partitions."""
+    try:
+        year, month = name[len(PARTITION_PREFIX):].split("_")
+        return date(int(year), int(month), 1)
+    except (ValueError, IndexError):
+        return None
+
+
+def is_partitioned(conn) -> bool:
+    """True once database/migration_partition_transactions.sql has been applied."""
+    return bool(conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('transactions')"
+    )).first())
+
+
+def list_monthly_partitions(conn) -> list[str]:
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass('transactions')"
+    )).all()
+    return sorted(row[0] for row in rows if partition_month(row[0]))
+
+
+def ensure_future_partitions(conn, months_ahead: int = PARTITION_MONTHS_AHEAD):
+    """Create the current and upcoming monthly partitions if they are missing."""
+    current = date.today().replace(day=1)
+    for offset in range(months_ahead + 1):
+        month_start = _add_months(current, offset)
+        conn.execute(text(
+            f'CREATE TABLE IF NOT EXISTS "{partition_name(month_start)}" PARTITION OF transactions '
+            f"FOR VALUES FROM ('{month_start.isoformat()}') TO ('{_add_months(month_start, 1).isoformat()}')"
+        ))
+
+
+def expired_partitions(conn, retention_months: int = TRANSACTION_RETENTION_MONTHS) -> list[tuple[str, date, date]]:
+    """Return (name, month_start, month_end) for partitions older than the retention window."""
+    cutoff = _add_months(date.today().replace(day=1), -retention_months)
+    expired = []
+    for name in list_monthly_partitions(conn):
+        month_start = partition_month(name)
+        if month_start < cutoff:
+            expired.append((name, month_start, _add_months(month_start, 1)))
+    return expired
+
+
+def archive_path(name: str) -> Path:
+    return ARCHIVE_DIR / f"{name}.ndjson.gz"
+
+
+def archive_index_path(name: str) -> Path:
+    return ARCHIVE_DIR / f"{name}.ndjson.idx.json"
+
+
+def _temp_file(name: str, suffix: str):
+    # Unique per call, so concurrent writers never share a temp file
+    return tempfile.NamedTemporaryFile(dir=ARCHIVE_DIR, prefix=f"{name}.", suffix=suffix, delete=False)
+
+
+def write_archive(name: str, rows) -> int:
+    """
+    Write history rows (newest first) to the partition's archive file and its
+    block index. Returns the row count.
+    """
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    path = archive_path(name)
+    index_path = archive_index_path(name)
+    blocks = []   # [offset, created_at, transaction_id] of each member's first row
+    oldest = None
+    count = 0
+    raw = _temp_file(name, ".ndjson.gz.tmp")
+    try:
+        with raw:
+            member = None
+            for row in rows:
+                key = [str(row["created_at"]), row["transaction_id"]]
+                if member is None:
+                    blocks.append([raw.tell(), *key])
+                    member = gzip.GzipFile(fileobj=raw, mode="wb")
+                member.write((json.dumps(row, default=str) + "\n").encode("utf-8"))
+                oldest = key
+                count += 1
+                if count % ARCHIVE_BLOCK_ROWS == 0:
+                    member.close()
+                    member = None
+            if member is not None:
+                member.close()
+        with _temp_file(name, ".idx.json.tmp") as tmp_index:
+            tmp_index.write(json.dumps({"rows": count, "blocks": blocks, "oldest": oldest}).encode("utf-8"))
+    except BaseException:
+        Path(raw.name).unlink(missing_ok=True)
+        raise
+
+    # Never leave an index next to an archive it does not describe
+    index_path.unlink(missing_ok=True)
+    os.replace(raw.name, path)
+    os.replace(tmp_index.name, index_path)
+    return count
+
+
+def _index_key(created_at: str, transaction_id: int):
+    return datetime.fromisoformat(created_at), transaction_id
+
+
+def _archive_start_offset(name: str, before: tuple[datetime, int] | None):
+    """
+    Byte offset of the last block whose first row is at or after `before` (the
+    first block that can hold older rows), 0 without an index or position, or
+    None when every row in the archive is at or after `before`.
+    """
+    if not before:
+        return 0
+    try:
+        index = json.loads(archive_index_path(name).read_text())
+    except (OSError, ValueError):
+        return 0
+    if not index.get("blocks"):
+        return 0
+    if _index_key(*index["oldest"]) >= before:
+        return None
+    offset = 0
+    for block_offset, created_at, transaction_id in index["blocks"]:
+        if _index_key(created_at, transaction_id) < before:
+            break
+        offset = block_offset
+    return offset
+
+
+def lock_archival(conn) -> bool:
+    """
+    Try to take the session-level lock that makes one process at a time archive
+    partitions (every worker runs the scheduler). False if another holds it.
+    """
+    return bool(conn.execute(text("SELECT pg_try_advisory_lock(hashtext('transaction_archival'))")).scalar())
+
+
+def unlock_archival(conn):
+    conn.execute(text("SELECT pg_advisory_unlock(hashtext('transaction_archival'))"))
+
+
+def detach_and_drop_partition(conn, name: str) -> bool:
+    """Detach and drop a monthly partition. False if it is no longer attached."""
+    if name not in list_monthly_partitions(conn):
+        return False
+    conn.execute(text(f'ALTER TABLE transactions DETACH PARTITION "{name}"'))
+    conn.execute(text(f'DROP TABLE "{name}"'))
+    return True
+
+
+def _parse_date(value: str | None, days: int = 0):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d") + timedelta(days=days)
+    except Exception as e:
+        logger.warning(f"[ARCHIVE] Error parsing archive date filter: {e}")
+        return None
+
+
+def iter_archived_rows(
+    test_area: str | None = None,
+    project: str | None = None,
+    transaction_type: str | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    before: tuple[datetime, int] | None = None,
+):
+    """
+    Yield archived history rows newest first, applying the same filters as the
+    live history query. `before` is a (created_at, transaction_id) keyset position.
+    """
+    if not ARCHIVE_DIR.exists():
+        return
+
+    start_dt = _parse_date(start_date)
+    end_dt = _parse_date(end_date, days=1)  # end_date is inclusive
+    if transaction_type:
+        transaction_type = transaction_type.lower()
+
+    for path in sorted(ARCHIVE_DIR.glob(f"{PARTITION_PREFIX}*.ndjson.gz"), reverse=True):
+        name = path.name.split(".", 1)[0]
+        month_start = partition_month(name)
+        if month_start is None:
+            continue
+        # Skip whole files outside the date filter
+        if end_dt and month_start >= end_dt.date():
+            continue
+        if start_dt and _add_months(month_start, 1) <= start_dt.date():
+            continue
+        offset = _archive_start_offset(name, before)
+        if offset is None:
+            continue
+
+        with open(path, "rb") as raw:
+            raw.seek(offset)
+            with gzip.open(raw, "rt", encoding="utf-8") as f:
+                for line in f:
+                    row = json.loads(line)
+                    row["created_at"] = datetime.fromisoformat(row["created_at"])
+                    created_at = row["created_at"]
+                    naive_created_at = created_at.replace(tzinfo=None)
+
+                    if start_dt and naive_created_at < start_dt:
+                        break  # rows are newest first
+                    if test_area and row.get("test_area") != test_area:
+                        continue
+                    if project and row.get("project_name") != project:
+                        continue
+                    if transaction_type and row.get("transaction_type") != transaction_type:
+                        continue
+                    if end_dt and naive_created_at >= end_dt:
+                        continue
+                    if before and (created_at, row["transaction_id"]) >= before:
+                        continue
+                    yield row
@@ -0,0 +1,112 @@
+# backend/app/utils/catalog_version.py
+# ----------------------------------------------------------
+# Change-version counters for catalog tables (inventory,
+# fixtures, documents) and conditional GET support.
+# A commit that writes one of these tables bumps its counter
+# in the same transaction; list endpoints derive their ETag
+# from the counters and answer 304 without reading the table.
+# ----------------------------------------------------------
+from fastapi import Request, Response
+from sqlalchemy import event, func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from ..database import SessionLocal
+from .. import models
+
+# ORM classes whose flushed changes bump their table's version
+TRACKED_MODELS = {
+    models.Inventory: "inventory",
+    models.Fixture: "fixtures",
+    models.ProjectDocument: "project_documents",
+    models.Employee: "employees",
+}
+TRACKED_TABLES = sorted(set(TRACKED_MODELS.values()))
+
+
+def mark_changed(db: Session, *tables: str):
+    """
+    Record that this session wrote `tables` outside the ORM unit of work
+    (Core UPDATE or raw SQL). The versions are bumped when it commits.
+    """
+    db.info.setdefault("catalog_changed", set()).update(tables)
+
+
+def ensure_rows(conn):
+    """Create a version row for every tracked table that does not have one."""
+    statement = insert(models.CatalogVersion.__table__).values(
+        [{"table_name": name, "version": 1} for name in TRACKED_TABLES]
+    )
+    conn.execute(statement.on_conflict_do_nothing(index_elements=["table_name"]))
+
+
+def get_versions(db: Session, *tables: str) -> dict:
+    rows = (
+        db.query(models.CatalogVersion.table_name, models.CatalogVersion.version)
+        .filter(models.CatalogVersion.table_name.in_(tables))
+        .all()
+    )
+    versions = {name: 0 for name in tables}
+    versions.update({name: version for name, version in rows})
+    return versions
+
+
+def not_modified(db: Session, request: Request, response: Response, *tables: str):
+    """
+    Conditional GET for a list endpoint that reads `tables` from the database.
+    Sets the ETag on `response` and returns a 304 Response when the client's
+    If-None-Match still matches, otherwise None. Call it before querying the data:
+    a write committed in between only makes the next revalidation miss, it never
+    hides a change.
+    """
+    return check_etag(request, response, get_versions(db, *tables))
+
+
+def check_etag(request: Request, response: Response, versions: dict):
+    """
+    Conditional GET against `versions` ({table: version}) of the data actually being
+    served. Endpoints that answer from an in-memory copy pass the versions that copy
+    was built at, so the ETag never claims data newer than the body.
+    """
+    etag = 'W/"' + "-".join(f"{name}.{version}" for name, version in versions.items()) + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = {tag.strip() for tag in if_none_match.split(",")}
+        if etag in candidates or "*" in candidates:
+            return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
+
+
+# ---- Write-driven bumps: one UPDATE per tracked table, inside the writing transaction ----
+@event.listens_for(SessionLocal, "after_flush")
+def _track_catalog_writes(session, flush_context):
+    changed = {
+        TRACKED_MODELS[type(obj)]
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if type(obj) in TRACKED_MODELS
+    }
+    if changed:
+        mark_changed(session, *changed)
+
+
+@event.listens_for(SessionLocal, "before_commit")
+def _bump_versions_before_commit(session):
+    # Flush first so ORM changes still pending at commit time are tracked too
+    session.flush()
+    changed = session.info.pop("catalog_changed", None)
+    if changed:
+        # Sorted so concurrent commits lock version rows in the same order
+        session.execute(
+            update(models.CatalogVersion)
+            .where(models.CatalogVersion.table_name.in_(sorted(changed)))
+            .values(version=models.CatalogVersion.version + 1, updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _reset_after_rollback(session):
+    session.info.pop("catalog_changed", None)
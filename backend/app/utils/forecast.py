@@ -0,0 +1,129 @@
+# backend/app/utils/forecast.py
+# ----------------------------------------------------------
+# Consumption forecasting: loads per-item daily request totals
+# into one items x days NumPy matrix and computes demand,
+# days-of-cover and reorder points for every item at once.
+# ----------------------------------------------------------
+import os
+from datetime import date, timedelta
+import numpy as np
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+from .. import models
+
+FORECAST_LOOKBACK_DAYS = int(os.getenv("FORECAST_LOOKBACK_DAYS", "90"))
+FORECAST_WINDOW_DAYS = int(os.getenv("FORECAST_WINDOW_DAYS", "28"))
+FORECAST_EWMA_ALPHA = float(os.getenv("FORECAST_EWMA_ALPHA", "0.1"))
+FORECAST_LEAD_TIME_DAYS = float(os.getenv("FORECAST_LEAD_TIME_DAYS", "7"))
+FORECAST_SERVICE_Z = float(os.getenv("FORECAST_SERVICE_Z", "1.65"))  # ~95% service level
+
+
+def compute_forecasts(
+    demand: np.ndarray,
+    on_hand: np.ndarray,
+    window_days: int = FORECAST_WINDOW_DAYS,
+    alpha: float = FORECAST_EWMA_ALPHA,
+    lead_time_days: float = FORECAST_LEAD_TIME_DAYS,
+    service_z: float = FORECAST_SERVICE_Z,
+):
+    """
+    Compute forecasts for all items in one vectorized pass.
+
+    demand:  (items, days) daily requested quantities, oldest day first
+    on_hand: (items,) current quantities
+
+    Returns a dict of (items,) arrays: moving_average, ewma, demand_std,
+    days_of_cover (NaN when there is no demand) and reorder_point.
+    """
+    window = demand[:, -window_days:]
+    moving_average = window.mean(axis=1)
+    demand_std = window.std(axis=1)
+
+    # Exponential smoothing as a weighted average: weight (1 - alpha)^age
+    ages = np.arange(demand.shape[1] - 1, -1, -1)
+    weights = alpha * (1 - alpha) ** ages
+    ewma = (demand @ weights) / weights.sum()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        days_of_cover = np.where(ewma > 0, on_hand / ewma, np.nan)
+
+    # Round away float noise first: an EWMA of 1.0000000000000002 must not
+    # push a reorder point of exactly 7 up to 8
+    reorder_point = np.ceil(np.round(ewma * lead_time_days + service_z * demand_std * np.sqrt(lead_time_days), 6))
+
+    return {
+        "moving_average": moving_average,
+        "ewma": ewma,
+        "demand_std": demand_std,
+        "days_of_cover": days_of_cover,
+        "reorder_point": reorder_point,
+    }
+
+
+def refresh_item_forecasts(db: Session, lookback_days: int = FORECAST_LOOKBACK_DAYS) -> int:
+    """
+    Recompute item_forecasts for every inventory item. Returns the number of items.
+    The history window ends yesterday: today's partial day would be the most heavily
+    weighted sample and pull every forecast low.
+    """
+    today = date.today()
+    start = today - timedelta(days=lookback_days)
+
+    items = db.query(
+        models.Inventory.item_id,
+        models.Inventory.item_current_quantity,
+    ).order_by(models.Inventory.item_id).all()
+    if not items:
+        return 0
+
+    item_ids = np.array([row.item_id for row in items])
+    on_hand = np.array([row.item_current_quantity or 0 for row in items], dtype=float)
+
+    history = (
+        db.query(
+            models.DailyUsageRollup.item_id,
+            models.DailyUsageRollup.day,
+            func.sum(models.DailyUsageRollup.quantity),
+        )
+        .filter(models.DailyUsageRollup.transaction_type == "request")
+        .filter(models.DailyUsageRollup.item_id.isnot(None))
+        .filter(models.DailyUsageRollup.day >= start)
+        .filter(models.DailyUsageRollup.day < today)
+        .group_by(models.DailyUsageRollup.item_id, models.DailyUsageRollup.day)
+        .all()
+    )
+
+    # Scatter (item, day, quantity) triples into a dense items x days matrix
+    demand = np.zeros((len(items), lookback_days))
+    if history:
+        hist_items = np.array([row[0] for row in history])
+        hist_days = np.array([(row[1] - start).days for row in history])
+        hist_qty = np.array([row[2] for row in history], dtype=float)
+        rows = np.searchsorted(item_ids, hist_items)
+        known = (rows < len(item_ids)) & (item_ids[np.minimum(rows, len(item_ids) - 1)] == hist_items)
+        known &= (hist_days >= 0) & (hist_days < lookback_days)
+        np.add.at(demand, (rows[known], hist_days[known]), hist_qty[known])
+
+    result = compute_forecasts(demand, on_hand)
+
+    records = [
+        {
+            "item_id": int(item_ids[i]),
+            "forecast_date": today,
+            "moving_average_daily": float(result["moving_average"][i]),
+            "ewma_daily": float(result["ewma"][i]),
+            "demand_std": float(result["demand_std"][i]),
+            "days_of_cover": None if np.isnan(result["days_of_cover"][i]) else float(result["days_of_cover"][i]),
+            "suggested_reorder_point": int(result["reorder_point"][i]),
+            "current_quantity": int(on_hand[i]),
+        }
+        for i in range(len(items))
+    ]
+
+    # Every worker's scheduler runs this job; serialize so a second run cannot
+    # insert before the first commits and fail on the item_id key
+    db.execute(select(func.pg_advisory_xact_lock(func.hashtext("item_forecasts"))))
+    db.query(models.ItemForecast).delete(synchronize_session=False)
+    db.execute(insert(models.ItemForecast), records)
+    db.commit()
+    return len(records)
@@ -0,0 +1,123 @@
+# backend/app/utils/idempotency.py
+# ----------------------------------------------------------
+# Idempotency-Key support for stock-mutating POST endpoints.
+# The key is claimed inside the same DB transaction as the stock
+# change, so a retried request either replays the stored response
+# or waits briefly on the key row - never on the inventory row.
+# ----------------------------------------------------------
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from .. import models
+
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+MAX_KEY_LENGTH = 255
+
+
+def fingerprint(payload) -> str:
+    """Stable hash of a request payload, used to reject key reuse with a different body."""
+    body = json.dumps(jsonable_encoder(payload), sort_keys=True)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def _claim(db: Session, key: str, endpoint: str, request_hash: str):
+    """
+    Insert the key as in_progress without committing. Expired keys are reclaimed.
+    Returns True if this request owns the key. A concurrent duplicate blocks here
+    until the owner's transaction finishes.
+    """
+    table = models.IdempotencyKey.__table__
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=IDEMPOTENCY_KEY_TTL_HOURS)
+    statement = insert(table).values(
+        key=key,
+        endpoint=endpoint,
+        request_hash=request_hash,
+        status="in_progress",
+        expires_at=expires_at,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.key],
+        set_={
+            "endpoint": statement.excluded.endpoint,
+            "request_hash": statement.excluded.request_hash,
+            "status": statement.excluded.status,
+            "response_status": None,
+            "response_body": None,
+            "created_at": func.now(),
+            "expires_at": statement.excluded.expires_at,
+        },
+        where=table.c.expires_at < func.now(),
+    ).returning(table.c.key)
+    return db.execute(statement).first() is not None
+
+
+def _replay(db: Session, key: str, endpoint: str, request_hash: str):
+    record = db.query(models.IdempotencyKey).filter(models.IdempotencyKey.key == key).first()
+    if not record:
+        # Owner rolled back between our claim attempt and this read
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is in progress. Retry shortly.")
+    if record.endpoint != endpoint or record.request_hash != request_hash:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+    if record.status != "completed":
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is in progress. Retry shortly.")
+    return JSONResponse(
+        status_code=record.response_status,
+        content=json.loads(record.response_body),
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def run(db: Session, key: str | None, endpoint: str, payload, operation):
+    """
+    Run `operation()` at most once per Idempotency-Key.
+
+    `operation` must flush its work without committing. The key claim, the work
+    and the stored response are then committed together, so a key is never left
+    in_progress for an operation that succeeded. Later requests with the same key
+    replay the stored response. Without a key, `operation()` runs and is committed
+    unchanged. Errors are not stored, so a failed request can be retried with the
+    same key.
+    """
+    if not key:
+        response = operation()
+        db.commit()
+        return response
+    if len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters")
+
+    request_hash = fingerprint(payload)
+    if not _claim(db, key, endpoint, request_hash):
+        response = _replay(db, key, endpoint, request_hash)
+        db.rollback()
+        return response
+
+    response = operation()
+
+    db.query(models.IdempotencyKey).filter(models.IdempotencyKey.key == key).update(
+        {
+            models.IdempotencyKey.status: "completed",
+            models.IdempotencyKey.response_status: 200,
+            models.IdempotencyKey.response_body: json.dumps(jsonable_encoder(response)),
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+    return response
+
+
+def purge_expired(db: Session) -> int:
+    """Delete expired keys. Returns the number of rows removed."""
+    deleted = (
+        db.query(models.IdempotencyKey)
+        .filter(models.IdempotencyKey.expires_at < func.now())
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
@@ -0,0 +1,334 @@
+# backend/app/utils/inventory_snapshot.py
+# ----------------------------------------------------------
+# Process-local, column-oriented snapshot of the inventory table
+# for read routes. Each column is one Python list (ints in
+# arrays), rows are addressed by position, and the snapshot is
+# kept current by applying deltas instead of full reloads.
+#
+# Delta tracking: a trigger stamps every inserted/updated row with
+# the writing transaction id (inventory.change_xid) and records
+# deletes in inventory_tombstones. A refresh reads rows stamped at
+# or after the previous watermark, where the watermark is the
+# oldest transaction still running when the last refresh started
+# (txid_snapshot_xmin), so commits that land out of order are
+# never skipped.
+# ----------------------------------------------------------
+import os
+import threading
+import time
+from array import array
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from ..database import SessionLocal
+from .. import models
+from . import catalog_version, listing
+
+INVENTORY_SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv("INVENTORY_SNAPSHOT_MAX_AGE_SECONDS", "2"))
+# Rebuild the arrays in memory once this share of rows has been deleted
+COMPACT_DEAD_RATIO = 0.25
+
+SNAPSHOT_COLUMNS = [
+    "item_id",
+    "item_name",
+    "item_description",
+    "item_part_number",
+    "item_current_quantity",
+    "item_min_count",
+    "item_unit",
+    "item_unit_price",
+    "item_manufacturer",
+    "item_type",
+    "test_area",
+    "project_name",
+    "item_life_cycle",
+    "item_image_url",
+    "created_at",
+]
+# Sort keys matching INVENTORY_LIST_SORTS in routes/inventory.py
+SNAPSHOT_SORTS = {
+    "item_name": ("item_name", "item_id"),
+    "item_id": ("item_id",),
+    "created_at": ("created_at", "item_id"),
+}
+
+CONSISTENCY_MODES = {"snapshot", "strong"}
+
+TRACKING_SQL = [
+    "CREATE OR REPLACE FUNCTION inventory_track_change() RETURNS trigger AS $$ "
+    "BEGIN "
+    "  IF TG_OP = 'DELETE' THEN "
+    "    INSERT INTO inventory_tombstones (item_id, change_xid) VALUES (OLD.item_id, txid_current()) "
+    "    ON CONFLICT (item_id) DO UPDATE SET change_xid = EXCLUDED.change_xid; "
+    "    RETURN OLD; "
+    "  END IF; "
+    "  NEW.change_xid := txid_current(); "
+    "  RETURN NEW; "
+    "END $$ LANGUAGE plpgsql",
+    "DROP TRIGGER IF EXISTS inventory_track_change ON inventory",
+    "CREATE TRIGGER inventory_track_change BEFORE INSERT OR UPDATE OR DELETE ON inventory "
+    "FOR EACH ROW EXECUTE FUNCTION inventory_track_change()",
+]
+
+
+def _sort_value(value):
+    # NULLs sort last, as in Postgres ascending order
+    return (value is None, value if value is not None else 0)
+
+
+class InventorySnapshot:
+    def __init__(self):
+        self._lock = threading.RLock()          # guards the arrays
+        self._refresh_lock = threading.Lock()   # one refresh at a time
+        self._reset()
+        self.watermark = None    # transactions at or after this id may be unseen
+        self.version = None      # inventory catalog version the data includes (ETag)
+        self.refreshed_at = None
+        self.full_loads = 0
+        self.delta_refreshes = 0
+        self.rows_applied = 0
+
+    def _reset(self):
+        self._columns = {name: [] for name in SNAPSHOT_COLUMNS}
+        self._columns["item_id"] = array("q")
+        self._alive = bytearray()
+        self._row_of = {}        # item_id -> row position
+        self._dead = 0
+        self._orders = {}        # sort name -> row positions in ascending order
+
+    # ---- loading ----
+    def _select_rows(self):
+        return select(*[getattr(models.Inventory, name) for name in SNAPSHOT_COLUMNS])
+
+    def load(self):
+        """Rebuild the snapshot from the whole table."""
+        with self._refresh_lock:
+            self._load()
+
+    def _load(self):
+        db = SessionLocal()
+        try:
+            # Version first: rows read afterwards include every write it counts
+            version = catalog_version.get_versions(db, "inventory")["inventory"]
+            watermark = db.execute(select(func.txid_snapshot_xmin(func.txid_current_snapshot()))).scalar()
+            rows = db.execute(self._select_rows()).all()
+        finally:
+            db.close()
+        with self._lock:
+            self._reset()
+            for row in rows:
+                self._append(row)
+            self.watermark = watermark
+            self.version = version
+            self.refreshed_at = time.monotonic()
+            self.full_loads += 1
+
+    def _append(self, row):
+        position = len(self._alive)
+        for name, value in zip(SNAPSHOT_COLUMNS, row):
+            self._columns[name].append(value)
+        self._alive.append(1)
+        self._row_of[row[0]] = position
+
+    def refresh(self):
+        """Apply inserts, updates and deletes committed since the last refresh."""
+        with self._refresh_lock:
+            self._refresh()
+
+    def _refresh(self):
+        if self.watermark is None:
+            self._load()
+            return
+        db = SessionLocal()
+        try:
+            version = catalog_version.get_versions(db, "inventory")["inventory"]
+            watermark = db.execute(select(func.txid_snapshot_xmin(func.txid_current_snapshot()))).scalar()
+            rows = db.execute(
+                self._select_rows().where(models.Inventory.change_xid >= self.watermark)
+            ).all()
+            deleted = db.execute(
+                select(models.InventoryTombstone.item_id)
+                .where(models.InventoryTombstone.change_xid >= self.watermark)
+            ).scalars().all()
+        finally:
+            db.close()
+
+        with self._lock:
+            for item_id in deleted:
+                position = self._row_of.pop(item_id, None)
+                if position is not None:
+                    self._alive[position] = 0
+                    self._dead += 1
+            for row in rows:
+                position = self._row_of.get(row[0])
+                if position is None:
+                    self._append(row)
+                else:
+                    for name, value in zip(SNAPSHOT_COLUMNS, row):
+                        self._columns[name][position] = value
+            if rows or deleted:
+                self._orders.clear()
+                self.rows_applied += len(rows) + len(deleted)
+            if self._dead > len(self._alive) * COMPACT_DEAD_RATIO:
+                self._compact()
+            self.watermark = watermark
+            self.version = version
+            self.refreshed_at = time.monotonic()
+            self.delta_refreshes += 1
+
+    def _compact(self):
+        live = [position for position, alive in enumerate(self._alive) if alive]
+        columns = self._columns
+        self._columns = {name: [columns[name][p] for p in live] for name in SNAPSHOT_COLUMNS}
+        self._columns["item_id"] = array("q", self._columns["item_id"])
+        self._alive = bytearray(b"\x01" * len(live))
+        self._row_of = {item_id: position for position, item_id in enumerate(self._columns["item_id"])}
+        self._dead = 0
+        self._orders.clear()
+
+    def ensure_fresh(self, consistency: str = "snapshot"):
+        """
+        "strong" waits for a refresh that started after this call, so a caller sees
+        every write committed before its request (read-your-writes). "snapshot"
+        refreshes only when older than INVENTORY_SNAPSHOT_MAX_AGE_SECONDS, and serves
+        the current data instead of waiting if another request is already refreshing.
+        """
+        if consistency not in CONSISTENCY_MODES:
+            raise HTTPException(status_code=400, detail="consistency must be snapshot or strong")
+        if consistency == "strong":
+            self.refresh()
+            return
+        if self.refreshed_at is not None and time.monotonic() - self.refreshed_at < INVENTORY_SNAPSHOT_MAX_AGE_SECONDS:
+            return
+        if self.refreshed_at is None:
+            self.refresh()
+        elif self._refresh_lock.acquire(blocking=False):
+            try:
+                self._refresh()
+            finally:
+                self._refresh_lock.release()
+
+    # ---- reads (callers hold no DB session) ----
+    def _row(self, position: int, fields) -> dict:
+        return {name: self._columns[name][position] for name in fields}
+
+    def _order(self, sort_name: str):
+        order = self._orders.get(sort_name)
+        if order is None:
+            keys = [self._columns[name] for name in SNAPSHOT_SORTS[sort_name]]
+            order = sorted(
+                (p for p, alive in enumerate(self._alive) if alive),
+                key=lambda p: tuple(_sort_value(column[p]) for column in keys),
+            )
+            self._orders[sort_name] = order
+        return order
+
+    def get(self, item_id: int, fields=SNAPSHOT_COLUMNS):
+        with self._lock:
+            position = self._row_of.get(item_id)
+            return None if position is None else self._row(position, fields)
+
+    def list_items(
+        self,
+        fields,
+        sort: str,
+        sort_columns,
+        project: str | None = None,
+        test_area: str | None = None,
+        limit: int | None = None,
+        cursor: str | None = None,
+    ):
+        """
+        Filter, sort and keyset-paginate like listing.fetch_rows(), with the same
+        response shapes and cursors. `sort_columns` are the SQL sort expressions,
+        used only to decode cursor values.
+        """
+        descending = sort.startswith("-")
+        sort_name = sort.lstrip("-")
+        if cursor and limit is None:
+            limit = listing.DEFAULT_LIMIT
+        after = None
+        if cursor:
+            try:
+                after = tuple(_sort_value(v) for v in listing.decode_cursor(cursor, sort, sort_columns))
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        with self._lock:
+            key_columns = [self._columns[name] for name in SNAPSHOT_SORTS[sort_name]]
+            projects, test_areas = self._columns["project_name"], self._columns["test_area"]
+            order = self._order(sort_name)
+            if descending:
+                order = reversed(order)
+
+            picked = []
+            for position in order:
+                if project and projects[position] != project:
+                    continue
+                if test_area and test_areas[position] != test_area:
+                    continue
+                if after is not None:
+                    key = tuple(_sort_value(column[position]) for column in key_columns)
+                    if (key <= after) if not descending else (key >= after):
+                        continue
+                picked.append(position)
+                if limit is not None and len(picked) > limit:
+                    break
+
+            if limit is None:
+                return [self._row(position, fields) for position in picked]
+
+            next_cursor = None
+            if len(picked) > limit:
+                picked = picked[:limit]
+                last = picked[-1]
+                next_cursor = listing.encode_cursor(sort, [column[last] for column in key_columns])
+            return {
+                "items": [self._row(position, fields) for position in picked],
+                "next_cursor": next_cursor,
+                "limit": limit,
+            }
+
+    def low_stock(self, project: str | None = None, test_area: str | None = None):
+        """Items below their minimum count, ordered by name (as /alerts/low-stock)."""
+        with self._lock:
+            quantities, minimums = self._columns["item_current_quantity"], self._columns["item_min_count"]
+            return [
+                self._row(position, SNAPSHOT_COLUMNS)
+                for position in self._order("item_name")
+                if quantities[position] is not None and minimums[position] is not None
+                and quantities[position] < minimums[position]
+                and (not project or self._columns["project_name"][position] == project)
+                and (not test_area or self._columns["test_area"][position] == test_area)
+            ]
+
+    def alternatives(self, item: dict):
+        """The same item (by name) in other projects with stock, most stock first."""
+        with self._lock:
+            names, quantities = self._columns["item_name"], self._columns["item_current_quantity"]
+            matches = [
+                position
+                for position, alive in enumerate(self._alive)
+                if alive
+                and names[position] == item["item_name"]
+                and self._columns["item_id"][position] != item["item_id"]
+                and (quantities[position] or 0) > 0
+            ]
+            matches.sort(key=lambda p: -quantities[p])
+            return [self._row(position, SNAPSHOT_COLUMNS) for position in matches]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rows": len(self._row_of),
+                "dead_rows": self._dead,
+                "watermark": self.watermark,
+                "version": self.version,
+                "age_seconds": round(time.monotonic() - self.refreshed_at, 3) if self.refreshed_at else None,
+                "full_loads": self.full_loads,
+                "delta_refreshes": self.delta_refreshes,
+                "rows_applied": self.rows_applied,
+                "max_age_seconds": INVENTORY_SNAPSHOT_MAX_AGE_SECONDS,
+            }
+
+
+inventory_snapshot = InventorySnapshot()
@@ -0,0 +1,126 @@
+# backend/app/utils/listing.py
+# ----------------------------------------------------------
+# Shared helpers for list endpoints: `fields=` projection,
+# `sort=` on whitelisted (indexed) keys, and keyset pagination
+# with an opaque cursor. Rows are returned as plain dicts built
+# from only the selected columns, without model validation.
+# ----------------------------------------------------------
+import base64
+import json
+from datetime import date, datetime
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import tuple_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def parse_fields(fields: str | None, columns: dict) -> list[str]:
+    """
+    Resolve a comma-separated `fields=` value against the available columns.
+    Without `fields`, every column is returned. Raises 400 for unknown names.
+    """
+    if not fields:
+        return list(columns)
+    selected = []
+    for name in (part.strip() for part in fields.split(",")):
+        if not name:
+            continue
+        if name not in columns:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown field '{name}'. Available fields: {', '.join(columns)}",
+            )
+        if name not in selected:
+            selected.append(name)
+    if not selected:
+        raise HTTPException(status_code=400, detail="fields must name at least one column")
+    return selected
+
+
+def parse_sort(sort: str | None, sorts: dict, default: str):
+    """
+    Resolve `sort=name` (ascending) or `sort=-name` (descending) to
+    (sort, key expressions, descending). Each key list ends with the
+    primary key so the order is total and usable as a keyset.
+    """
+    sort = (sort or default).strip()
+    descending = sort.startswith("-")
+    name = sort.lstrip("-")
+    if name not in sorts:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown sort '{name}'. Sortable fields: {', '.join(sorts)}",
+        )
+    return ("-" if descending else "") + name, sorts[name], descending
+
+
+def encode_cursor(sort: str, values) -> str:
+    """Encode the sort keys of the last row on a page as an opaque cursor."""
+    raw = json.dumps({"sort": sort, "after": jsonable_encoder(list(values))})
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str, sort: str, keys) -> list:
+    """Decode a cursor for the same sort. Raises ValueError if malformed or for another sort."""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        if raw["sort"] != sort or len(raw["after"]) != len(keys):
+            raise ValueError("Cursor does not match sort")
+        values = []
+        for key, value in zip(keys, raw["after"]):
+            python_type = key.type.python_type
+            if value is not None and python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif value is not None and python_type is date:
+                value = date.fromisoformat(value)
+            values.append(value)
+        return values
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def fetch_rows(
+    query,
+    fields: list[str],
+    sort: str,
+    keys,
+    descending: bool,
+    limit: int | None = None,
+    cursor: str | None = None,
+):
+    """
+    Order `query` (which selects each field labelled with its name) by the sort
+    keys and return the rows as dicts. Without `limit` every row is returned as a
+    list; with `limit` one page is returned as {items, next_cursor, limit}.
+    """
+    if cursor and limit is None:
+        limit = DEFAULT_LIMIT
+    key_labels = [f"_sort_{i}" for i in range(len(keys))]
+    query = query.add_columns(*[key.label(label) for key, label in zip(keys, key_labels)])
+
+    if cursor:
+        try:
+            after = decode_cursor(cursor, sort, keys)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        position = tuple_(*keys)
+        query = query.filter(position < tuple_(*after) if descending else position > tuple_(*after))
+
+    query = query.order_by(*[key.desc() if descending else key.asc() for key in keys])
+
+    if limit is None:
+        return [{name: row._mapping[name] for name in fields} for row in query.all()]
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort, [rows[-1]._mapping[label] for label in key_labels])
+
+    return {
+        "items": [{name: row._mapping[name] for name in fields} for row in rows],
+        "next_cursor": next_cursor,
+        "limit": limit,
+    }
@@ -0,0 +1,279 @@
+# backend/app/utils/prefix_index.py
+# ----------------------------------------------------------
+# In-process prefix index for type-ahead lookup of items,
+# fixtures and projects. Keys live in one sorted list searched
+# with bisect, with a parallel int array of entity handles.
+# Loaded at startup, patched after each committed ORM write and
+# fully reloaded on a schedule to pick up other processes' writes.
+# ----------------------------------------------------------
+import heapq
+import re
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from sqlalchemy import event
+from ..database import SessionLocal
+from .. import models
+
+# Word boundaries where a key may also start, so "relay" finds "Omron relay"
+WORD_BOUNDARY = re.compile(r"[\s\-_/.,()]+")
+MAX_WORD_KEYS = 8
+
+
+def normalize(text: str | None) -> str:
+    return " ".join(text.lower().split()) if text else ""
+
+
+def _keys_for(value: str | None):
+    """Return (key, is_label_start) pairs: the whole value plus each later word start."""
+    value = normalize(value)
+    if not value:
+        return []
+    keys = [(value, True)]
+    for match in list(WORD_BOUNDARY.finditer(value))[:MAX_WORD_KEYS]:
+        if match.end() < len(value):
+            keys.append((value[match.end():], False))
+    return keys
+
+
+def _item_entity(item):
+    return {
+        "kind": "item",
+        "id": item.item_id,
+        "label": item.item_name,
+        "item_part_number": item.item_part_number,
+        "project_name": item.project_name,
+        "test_area": item.test_area,
+    }, [item.item_name, item.item_part_number]
+
+
+def _fixture_entity(fixture):
+    return {
+        "kind": "fixture",
+        "id": fixture.fixture_id,
+        "label": fixture.fixture_name,
+        "asset_tag": fixture.asset_tag,
+        "project_name": fixture.project_name,
+        "test_area": fixture.test_area,
+    }, [fixture.fixture_name, fixture.asset_tag]
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+        self.loaded_at = None
+
+    def _reset(self):
+        self._keys = []               # sorted normalized keys
+        self._handles = array("q")    # entity handle per key, parallel to _keys
+        self._starts = array("b")     # 1 when the key is the start of its field
+        self._entities = {}           # handle -> entity dict
+        self._entity_keys = {}        # handle -> keys added for it (for removal)
+        self._handle_of = {}          # (kind, id) -> handle
+        self._project_refs = {}       # project name -> number of items/fixtures using it
+        self._next_handle = 0
+
+    # ---- building ----
+    def _add_key(self, key: str, handle: int, is_start: bool):
+        position = bisect_left(self._keys, key)
+        self._keys.insert(position, key)
+        self._handles.insert(position, handle)
+        self._starts.insert(position, 1 if is_start else 0)
+
+    def _remove_key(self, key: str, handle: int):
+        position = bisect_left(self._keys, key)
+        while position < len(self._keys) and self._keys[position] == key:
+            if self._handles[position] == handle:
+                del self._keys[position]
+                del self._handles[position]
+                del self._starts[position]
+                return
+            position += 1
+
+    def _put(self, entity: dict, values):
+        ref = (entity["kind"], entity["id"])
+        self._remove(ref)
+        handle = self._next_handle
+        self._next_handle += 1
+        keys = []
+        for value in values:
+            for key, is_start in _keys_for(value):
+                self._add_key(key, handle, is_start)
+                keys.append(key)
+        self._entities[handle] = entity
+        self._entity_keys[handle] = keys
+        self._handle_of[ref] = handle
+        if entity["kind"] != "project" and entity.get("project_name"):
+            self._ref_project(entity["project_name"], 1)
+
+    def _remove(self, ref):
+        handle = self._handle_of.pop(ref, None)
+        if handle is None:
+            return
+        for key in self._entity_keys.pop(handle):
+            self._remove_key(key, handle)
+        entity = self._entities.pop(handle)
+        if entity["kind"] != "project" and entity.get("project_name"):
+            self._ref_project(entity["project_name"], -1)
+
+    def _ref_project(self, name: str, delta: int):
+        count = self._project_refs.get(name, 0) + delta
+        if count > 0:
+            if name not in self._project_refs:
+                self._put({"kind": "project", "id": name, "label": name}, [name])
+            self._project_refs[name] = count
+        else:
+            self._project_refs.pop(name, None)
+            self._remove(("project", name))
+
+    # ---- public API ----
+    def load(self):
+        """Rebuild the whole index from the database."""
+        db = SessionLocal()
+        try:
+            items = db.query(
+                models.Inventory.item_id,
+                models.Inventory.item_name,
+                models.Inventory.item_part_number,
+                models.Inventory.project_name,
+                models.Inventory.test_area,
+            ).all()
+            fixtures = db.query(
+                models.Fixture.fixture_id,
+                models.Fixture.fixture_name,
+                models.Fixture.asset_tag,
+                models.Fixture.project_name,
+                models.Fixture.test_area,
+            ).all()
+        finally:
+            db.close()
+
+        fresh = PrefixIndex()
+        # Build unsorted, then sort once: O(n log n) instead of n insertions
+        entries = []
+        for entity, values in [_item_entity(row) for row in items] + [_fixture_entity(row) for row in fixtures]:
+            fresh._collect(entity, values, entries)
+            if entity.get("project_name"):
+                name = entity["project_name"]
+                if name not in fresh._project_refs:
+                    fresh._collect({"kind": "project", "id": name, "label": name}, [name], entries)
+                fresh._project_refs[name] = fresh._project_refs.get(name, 0) + 1
+        entries.sort()
+        fresh._keys = [key for key, _, _ in entries]
+        fresh._handles = array("q", (handle for _, handle, _ in entries))
+        fresh._starts = array("b", (is_start for _, _, is_start in entries))
+
+        with self._lock:
+            self._keys, self._handles, self._starts = fresh._keys, fresh._handles, fresh._starts
+            self._entities, self._entity_keys = fresh._entities, fresh._entity_keys
+            self._handle_of, self._project_refs = fresh._handle_of, fresh._project_refs
+            self._next_handle = fresh._next_handle
+            self.loaded_at = time.time()
+
+    def _collect(self, entity: dict, values, entries: list):
+        handle = self._next_handle
+        self._next_handle += 1
+        keys = []
+        for value in values:
+            for key, is_start in _keys_for(value):
+                entries.append((key, handle, 1 if is_start else 0))
+                keys.append(key)
+        self._entities[handle] = entity
+        self._entity_keys[handle] = keys
+        self._handle_of[(entity["kind"], entity["id"])] = handle
+
+    def apply(self, changes: dict):
+        """Apply {(kind, id): (entity, values) or None for deleted} from a committed write."""
+        with self._lock:
+            for ref, change in changes.items():
+                if change is None:
+                    self._remove(ref)
+                else:
+                    self._put(*change)
+
+    def search(self, prefix: str, kinds=None, project: str | None = None, test_area: str | None = None, limit: int = 10):
+        """
+        Return up to `limit` entities with a key starting with `prefix`. Matches at
+        the start of a name rank above matches at a later word, then shorter names first.
+        Every key in the prefix range is considered, so the best matches are never
+        cut off by keys that merely sort earlier.
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        candidates = {}
+        with self._lock:
+            position = bisect_left(self._keys, prefix)
+            while position < len(self._keys) and self._keys[position].startswith(prefix):
+                handle = self._handles[position]
+                entity = self._entities[handle]
+                if (
+                    (not kinds or entity["kind"] in kinds)
+                    and (not project or entity["kind"] == "project" or entity.get("project_name") == project)
+                    and (not test_area or entity["kind"] == "project" or entity.get("test_area") == test_area)
+                ):
+                    rank = 0 if self._starts[position] else 1
+                    if handle not in candidates or rank < candidates[handle][0]:
+                        candidates[handle] = (rank, entity)
+                position += 1
+
+        ranked = heapq.nsmallest(limit, candidates.values(), key=lambda c: (c[0], len(c[1]["label"] or ""), c[1]["label"] or ""))
+        return [dict(entity) for _, entity in ranked]
+
+    def stats(self):
+        with self._lock:
+            key_bytes = sys.getsizeof(self._keys) + sum(sys.getsizeof(key) for key in self._keys)
+            array_bytes = (
+                self._handles.buffer_info()[1] * self._handles.itemsize
+                + self._starts.buffer_info()[1] * self._starts.itemsize
+            )
+            entity_bytes = sys.getsizeof(self._entities) + sum(
+                sys.getsizeof(entity) + sum(sys.getsizeof(v) for v in entity.values())
+                for entity in self._entities.values()
+            )
+            counts = {}
+            for entity in self._entities.values():
+                counts[entity["kind"]] = counts.get(entity["kind"], 0) + 1
+            return {
+                "keys": len(self._keys),
+                "entities": counts,
+                "approx_memory_bytes": key_bytes + array_bytes + entity_bytes,
+                "loaded_at": self.loaded_at,
+            }
+
+
+prefix_index = PrefixIndex()
+
+
+# ---- Incremental refresh: capture changed names at flush, apply after commit ----
+@event.listens_for(SessionLocal, "after_flush")
+def _track_catalog_names(session, flush_context):
+    pending = session.info.setdefault("prefix_index_pending", {})
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, models.Inventory):
+            entity, values = _item_entity(obj)
+        elif isinstance(obj, models.Fixture):
+            entity, values = _fixture_entity(obj)
+        else:
+            continue
+        pending[(entity["kind"], entity["id"])] = (entity, values)
+    for obj in session.deleted:
+        if isinstance(obj, models.Inventory):
+            pending[("item", obj.item_id)] = None
+        elif isinstance(obj, models.Fixture):
+            pending[("fixture", obj.fixture_id)] = None
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _apply_after_commit(session):
+    pending = session.info.pop("prefix_index_pending", None)
+    if pending:
+        prefix_index.apply(pending)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _reset_after_rollback(session):
+    session.info.pop("prefix_index_pending", None)
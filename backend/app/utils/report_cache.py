@@ -0,0 +1,95 @@
+# backend/app/utils/report_cache.py
+# ----------------------------------------------------------
+# In-process cache for dashboard report endpoints.
+# Entries expire after a short TTL and are dropped whenever the
+# daily usage rollup they read is refreshed. Concurrent misses for
+# the same key are coalesced so only one request runs the aggregation.
+# ----------------------------------------------------------
+import os
+import threading
+import time
+
+REPORT_CACHE_TTL_SECONDS = float(os.getenv("REPORT_CACHE_TTL_SECONDS", "30"))
+
+
+class _Flight:
+    """A computation in progress that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ReportCache:
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> (expires_at, value)
+        self._flights = {}  # key -> _Flight
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for `key`, computing it at most once across concurrent callers."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            flight = self._flights.get(key)
+            if flight:
+                self.coalesced += 1
+                leader = False
+            else:
+                self.misses += 1
+                flight = _Flight()
+                self._flights[key] = flight
+                generation = self._generation
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+                # Don't store results computed from data that was invalidated meanwhile
+                if flight.error is None and generation == self._generation:
+                    self._entries[key] = (time.monotonic() + self.ttl_seconds, flight.value)
+            flight.done.set()
+        return flight.value
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "invalidations": self.invalidations,
+                "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else None,
+            }
+
+
+report_cache = ReportCache(REPORT_CACHE_TTL_SECONDS)
+
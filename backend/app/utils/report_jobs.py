@@ -0,0 +1,156 @@
+# backend/app/utils/report_jobs.py
+# ----------------------------------------------------------
+# Background XLSX report jobs. Report data is queried on the
+# request path (cheap rollup reads), then the workbook is rendered
+# in a process pool so CPU-bound formatting never blocks a request
+# worker. Finished files are reused for identical parameters.
+# ----------------------------------------------------------
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from uuid import uuid4
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+from ..database import SessionLocal
+from .. import models
+from .idempotency import fingerprint
+from .xlsx_report import render_usage_workbook
+
+logger = logging.getLogger(__name__)
+
+REPORT_JOB_WORKERS = int(os.getenv("REPORT_JOB_WORKERS", "2"))
+# Workbooks for periods that are still open are reused only this long
+REPORT_JOB_FRESH_SECONDS = int(os.getenv("REPORT_JOB_FRESH_SECONDS", "300"))
+# Queued jobs older than this are assumed lost (e.g. server restart) and resubmitted
+REPORT_JOB_TIMEOUT_MINUTES = int(os.getenv("REPORT_JOB_TIMEOUT_MINUTES", "30"))
+REPORT_JOB_RETENTION_DAYS = int(os.getenv("REPORT_JOB_RETENTION_DAYS", "30"))
+
+REPORT_DIR = Path(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))) / "reports" / "xlsx"
+
+_executor = None
+_executor_lock = threading.Lock()
+_futures = {}  # job_id -> Future, for jobs submitted by this process
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: forking a process that runs server and scheduler threads is unsafe
+            _executor = ProcessPoolExecutor(
+                max_workers=REPORT_JOB_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def shutdown():
+    """Stop the worker processes. Jobs still queued are abandoned."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def report_path(job_id: str) -> Path:
+    return REPORT_DIR / f"{job_id}.xlsx"
+
+
+def _reusable(job: models.ReportJob, today: date) -> bool:
+    now = datetime.now(timezone.utc)
+    if job.status == "queued":
+        return job.created_at > now - timedelta(minutes=REPORT_JOB_TIMEOUT_MINUTES)
+    if job.status != "completed" or not report_path(job.job_id).exists():
+        return False
+    # Closed periods never change; open periods are reused while fresh
+    return job.period_end < today or job.completed_at > now - timedelta(seconds=REPORT_JOB_FRESH_SECONDS)
+
+
+def submit(db: Session, report_type: str, period_start: date, period_end: date, gather) -> models.ReportJob:
+    """
+    Return a job for the given report parameters: an existing queued or
+    completed job with the same parameters, or a new job rendering the data
+    returned by `gather()` in the process pool.
+    """
+    params_hash = fingerprint({"report_type": report_type, "start": period_start, "end": period_end})
+
+    # Serialize submits for the same parameters so duplicates share one job
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": params_hash})
+    existing = (
+        db.query(models.ReportJob)
+        .filter(models.ReportJob.params_hash == params_hash)
+        .filter(models.ReportJob.status.in_(["queued", "completed"]))
+        .order_by(models.ReportJob.created_at.desc())
+        .first()
+    )
+    if existing and _reusable(existing, date.today()):
+        db.commit()
+        return existing
+
+    data = gather()
+    job = models.ReportJob(
+        job_id=uuid4().hex,
+        report_type=report_type,
+        period_start=period_start,
+        period_end=period_end,
+        params_hash=params_hash,
+        status="queued",
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    future = _get_executor().submit(render_usage_workbook, data, str(report_path(job.job_id)))
+    _futures[job.job_id] = future
+    future.add_done_callback(lambda f, job_id=job.job_id: _finish(job_id, f))
+    return job
+
+
+def _finish(job_id: str, future):
+    """Record the outcome of a rendered job. Runs on the executor's callback thread."""
+    _futures.pop(job_id, None)
+    error = None
+    if future.cancelled():
+        error = "Cancelled before rendering"
+    elif future.exception() is not None:
+        error = str(future.exception()) or type(future.exception()).__name__
+        logger.error(f"[REPORT JOB] {job_id} failed: {error}")
+
+    db = SessionLocal()
+    try:
+        db.query(models.ReportJob).filter(models.ReportJob.job_id == job_id).update(
+            {
+                models.ReportJob.status: "failed" if error else "completed",
+                models.ReportJob.error: error,
+                models.ReportJob.completed_at: func.now(),
+            },
+            synchronize_session=False,
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def job_status(job: models.ReportJob) -> str:
+    """Stored status, refined to "running" while this process is rendering it."""
+    future = _futures.get(job.job_id)
+    if job.status == "queued" and future is not None and future.running():
+        return "running"
+    return job.status
+
+
+def purge_expired(db: Session, retention_days: int = REPORT_JOB_RETENTION_DAYS) -> int:
+    """Delete jobs and files older than the retention window. Returns the number of jobs removed."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    jobs = db.query(models.ReportJob).filter(models.ReportJob.created_at < cutoff).all()
+    for job in jobs:
+        report_path(job.job_id).unlink(missing_ok=True)
+        db.delete(job)
+    db.commit()
+    return len(jobs)
@@ -0,0 +1,165 @@
+# backend/app/utils/scan_index.py
+# ----------------------------------------------------------
+# Warm in-memory map from scannable codes (item part number,
+# fixture asset tag, fixture serial number) to the rows that
+# carry them. Loaded at startup, patched after each committed
+# ORM write and reloaded on a schedule. resolve() always reads
+# the rows back from the database, so a stale or missing entry
+# can never return wrong or incomplete data.
+# ----------------------------------------------------------
+import threading
+import time
+from sqlalchemy import event, or_
+from sqlalchemy.orm import Session
+from ..database import SessionLocal
+from .. import models
+
+
+def normalize_code(code: str | None) -> str:
+    return code.strip() if code else ""
+
+
+def _item_codes(item):
+    return [item.item_part_number]
+
+
+def _fixture_codes(fixture):
+    return [fixture.asset_tag, fixture.fixture_serial_number]
+
+
+class ScanIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refs = {}    # code -> set of ("item" | "fixture", id)
+        self._codes = {}   # ("item" | "fixture", id) -> codes (for removal)
+        self.loaded_at = None
+
+    def _put(self, refs: dict, codes: dict, ref, values):
+        self._drop(refs, codes, ref)
+        values = {normalize_code(value) for value in values} - {""}
+        for value in values:
+            refs.setdefault(value, set()).add(ref)
+        codes[ref] = values
+
+    @staticmethod
+    def _drop(refs: dict, codes: dict, ref):
+        for value in codes.pop(ref, ()):
+            entry = refs.get(value)
+            if entry:
+                entry.discard(ref)
+                if not entry:
+                    del refs[value]
+
+    def load(self):
+        """Rebuild the whole map from the database."""
+        db = SessionLocal()
+        try:
+            items = db.query(models.Inventory.item_id, models.Inventory.item_part_number).all()
+            fixtures = db.query(
+                models.Fixture.fixture_id,
+                models.Fixture.asset_tag,
+                models.Fixture.fixture_serial_number,
+            ).all()
+        finally:
+            db.close()
+
+        refs, codes = {}, {}
+        for item in items:
+            self._put(refs, codes, ("item", item.item_id), _item_codes(item))
+        for fixture in fixtures:
+            self._put(refs, codes, ("fixture", fixture.fixture_id), _fixture_codes(fixture))
+        with self._lock:
+            self._refs, self._codes = refs, codes
+            self.loaded_at = time.time()
+
+    def apply(self, changes: dict):
+        """Apply {(kind, id): codes or None for deleted} from a committed write."""
+        with self._lock:
+            for ref, values in changes.items():
+                if values is None:
+                    self._drop(self._refs, self._codes, ref)
+                else:
+                    self._put(self._refs, self._codes, ref, values)
+
+    def lookup(self, code: str):
+        """Return (item_ids, fixture_ids) currently mapped to `code`."""
+        with self._lock:
+            refs = list(self._refs.get(normalize_code(code), ()))
+        return (
+            sorted(ref_id for kind, ref_id in refs if kind == "item"),
+            sorted(ref_id for kind, ref_id in refs if kind == "fixture"),
+        )
+
+    def stats(self):
+        with self._lock:
+            return {"codes": len(self._refs), "rows": len(self._codes), "loaded_at": self.loaded_at}
+
+
+scan_index = ScanIndex()
+
+
+def resolve(db: Session, code: str):
+    """
+    Return (items, fixtures) whose part number / asset tag / serial equals `code`.
+    Each table is read once, by the code (hash indexes) together with the ids the
+    warm map holds for it: the code lookup finds rows the map has not seen yet
+    (e.g. written by another process), the ids find stored codes that only match
+    after normalization. Rows whose code changed since they were mapped are dropped.
+    """
+    code = normalize_code(code)
+    if not code:
+        return [], []
+
+    item_ids, fixture_ids = scan_index.lookup(code)
+    items = (
+        db.query(models.Inventory)
+        .filter(or_(models.Inventory.item_part_number == code, models.Inventory.item_id.in_(item_ids)))
+        .all()
+    )
+    fixtures = (
+        db.query(models.Fixture)
+        .filter(or_(
+            models.Fixture.asset_tag == code,
+            models.Fixture.fixture_serial_number == code,
+            models.Fixture.fixture_id.in_(fixture_ids),
+        ))
+        .all()
+    )
+    items = [item for item in items if normalize_code(item.item_part_number) == code]
+    fixtures = [fx for fx in fixtures if code in {normalize_code(c) for c in _fixture_codes(fx)}]
+
+    # Map rows the code lookup found that the map did not know about yet
+    known_items, known_fixtures = set(item_ids), set(fixture_ids)
+    changes = {("item", item.item_id): _item_codes(item) for item in items if item.item_id not in known_items}
+    changes.update({("fixture", fx.fixture_id): _fixture_codes(fx) for fx in fixtures if fx.fixture_id not in known_fixtures})
+    if changes:
+        scan_index.apply(changes)
+    return items, fixtures
+
+
+# ---- Incremental refresh: capture changed codes at flush, apply after commit ----
+@event.listens_for(SessionLocal, "after_flush")
+def _track_scan_codes(session, flush_context):
+    pending = session.info.setdefault("scan_index_pending", {})
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, models.Inventory):
+            pending[("item", obj.item_id)] = _item_codes(obj)
+        elif isinstance(obj, models.Fixture):
+            pending[("fixture", obj.fixture_id)] = _fixture_codes(obj)
+    for obj in session.deleted:
+        if isinstance(obj, models.Inventory):
+            pending[("item", obj.item_id)] = None
+        elif isinstance(obj, models.Fixture):
+            pending[("fixture", obj.fixture_id)] = None
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _apply_after_commit(session):
+    pending = session.info.pop("scan_index_pending", None)
+    if pending:
+        scan_index.apply(pending)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _reset_after_rollback(session):
+    session.info.pop("scan_index_pending", None)
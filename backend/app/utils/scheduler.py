@@ -4,11 +4,17 @@
 # ----------------------------------------------------------
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy.orm import Session
-from ..database import SessionLocal
+from ..database import SessionLocal, engine
 from .. import crud
+from . import archive, idempotency, report_jobs
+from .forecast import refresh_item_forecasts
+from .anomaly import detect_usage_anomalies
+from .prefix_index import prefix_index
+from .scan_index import scan_index
 from .email_service import send_low_stock_notification
-from datetime import datetime
+from datetime import date, datetime, timedelta
 import logging
 
 # Configure logging
@@ -75,6 +81,126 @@ def send_daily_low_stock_notifications():
     finally:
         db.close()
 
+def archive_expired_transaction_partitions():
+    """
+    Scheduled job that keeps monthly transaction partitions ahead of time and
+    archives partitions older than the retention window to compressed files.
+    Does nothing until the transactions table has been partitioned.
+    """
+    try:
+        # Held on its own connection for the whole job; the archive writes and
+        # drops below must never run in two workers at once
+        with engine.connect() as lock_conn:
+            if not archive.lock_archival(lock_conn):
+                logger.info("[SCHEDULER] Another worker is archiving transactions. Skipping.")
+                return
+            lock_conn.commit()  # the lock outlives the transaction; don't sit idle in one
+            try:
+                _archive_expired_partitions()
+            finally:
+                archive.unlock_archival(lock_conn)
+                lock_conn.commit()
+
+    except Exception as e:
+        logger.error(f"[SCHEDULER] Error in transaction archival job: {str(e)}")
+
+def _archive_expired_partitions():
+    """Create upcoming partitions, then archive and drop expired ones (archival lock held)."""
+    with engine.begin() as conn:
+        if not archive.is_partitioned(conn):
+            logger.info("[SCHEDULER] transactions is not partitioned. Skipping archival.")
+            return
+        archive.ensure_future_partitions(conn)
+        expired = archive.expired_partitions(conn)
+
+    for name, month_start, month_end in expired:
+        with engine.connect() as conn:
+            # Already archived and dropped (e.g. by a run this one overlapped with):
+            # writing now would replace the archive with an empty one
+            if name not in archive.list_monthly_partitions(conn):
+                continue
+
+        db: Session = SessionLocal()
+        try:
+            rows = crud.get_transaction_archive_query(db, month_start, month_end).yield_per(1000)
+            count = archive.write_archive(name, (crud.transaction_archive_row_to_dict(row) for row in rows))
+        finally:
+            db.close()
+
+        with engine.begin() as conn:
+            if not archive.detach_and_drop_partition(conn, name):
+                logger.warning(f"[SCHEDULER] Partition {name} disappeared while it was archived.")
+                continue
+        logger.info(f"[SCHEDULER] Archived {count} transactions from {name} to {archive.archive_path(name)}")
+
+def refresh_recent_usage_rollup():
+    """
+    Scheduled job that recomputes daily_usage_rollup for yesterday and today,
+    so report endpoints stay at most one interval behind the transactions table.
+    """
+    db: Session = SessionLocal()
+    try:
+        crud.refresh_daily_usage_rollup(db, since=date.today() - timedelta(days=1))
+    except Exception as e:
+        logger.error(f"[SCHEDULER] Error refreshing daily usage rollup: {str(e)}")
+    finally:
+        db.close()
+
+def refresh_forecasts_job():
+    """Scheduled job that recomputes item demand forecasts."""
+    db: Session = SessionLocal()
+    try:
+        count = refresh_item_forecasts(db)
+        logger.info(f"[SCHEDULER] Refreshed demand forecasts for {count} items.")
+    except Exception as e:
+        logger.error(f"[SCHEDULER] Error refreshing demand forecasts: {str(e)}")
+    finally:
+        db.close()
+
+def detect_usage_anomalies_job():
+    """Scheduled job that flags unusually large request volumes."""
+    db: Session = SessionLocal()
+    try:
+        count = detect_usage_anomalies(db)
+        logger.info(f"[SCHEDULER] Usage anomaly detection stored {count} flags.")
+    except Exception as e:
+        logger.error(f"[SCHEDULER] Error detecting usage anomalies: {str(e)}")
+    finally:
+        db.close()
+
+def reload_catalog_indexes():
+    """
+    Scheduled job that rebuilds the in-memory autocomplete and scan indexes,
+    picking up writes committed by other server processes.
+    """
+    try:
+        prefix_index.load()
+        scan_index.load()
+    except Exception as e:
+        logger.error(f"[SCHEDULER] Error reloading catalog indexes: {str(e)}")
+
+def purge_expired_idempotency_keys():
+    """Scheduled job that evicts Idempotency-Key records past their TTL."""
+    db: Session = SessionLocal()
+    try:
+        deleted = idempotency.purge_expired(db)
+        logger.info(f"[SCHEDULER] Purged {deleted} expired idempotency keys.")
+    except Exception as e:
+        logger.error(f"[SCHEDULER] Error purging idempotency keys: {str(e)}")
+    finally:
+        db.close()
+
+def purge_expired_report_jobs():
+    """Scheduled job that removes old report jobs and their workbook files."""
+    db: Session = SessionLocal()
+    try:
+        deleted = report_jobs.purge_expired(db)
+        logger.info(f"[SCHEDULER] Purged {deleted} expired report jobs.")
+    except Exception as e:
+        logger.error(f"[SCHEDULER] Error purging report jobs: {str(e)}")
+    finally:
+        db.close()
+
 def start_scheduler():
     """
     Start the scheduler with the daily low stock notification job.
@@ -89,6 +215,62 @@ def start_scheduler():
             name='Daily Low Stock Notification',
             replace_existing=True
         )
+        # Maintain transaction partitions daily at 12:30 AM
+        scheduler.add_job(
+            archive_expired_transaction_partitions,
+            trigger=CronTrigger(hour=0, minute=30),
+            id='transaction_partition_archival',
+            name='Transaction Partition Archival',
+            replace_existing=True
+        )
+        # Keep the report rollup fresh
+        scheduler.add_job(
+            refresh_recent_usage_rollup,
+            trigger=IntervalTrigger(minutes=1),
+            id='daily_usage_rollup_refresh',
+            name='Daily Usage Rollup Refresh',
+            replace_existing=True
+        )
+        # Recompute demand forecasts daily at 1:00 AM
+        scheduler.add_job(
+            refresh_forecasts_job,
+            trigger=CronTrigger(hour=1, minute=0),
+            id='item_forecast_refresh',
+            name='Item Forecast Refresh',
+            replace_existing=True
+        )
+        # Flag unusual request volumes daily at 1:15 AM
+        scheduler.add_job(
+            detect_usage_anomalies_job,
+            trigger=CronTrigger(hour=1, minute=15),
+            id='usage_anomaly_detection',
+            name='Usage Anomaly Detection',
+            replace_existing=True
+        )
+        # Resync the autocomplete and scan indexes every 5 minutes
+        scheduler.add_job(
+            reload_catalog_indexes,
+            trigger=IntervalTrigger(minutes=5),
+            id='catalog_index_reload',
+            name='Catalog Index Reload',
+            replace_existing=True
+        )
+        # Evict expired idempotency keys every hour
+        scheduler.add_job(
+            purge_expired_idempotency_keys,
+            trigger=CronTrigger(minute=5),
+            id='idempotency_key_purge',
+            name='Idempotency Key Purge',
+            replace_existing=True
+        )
+        # Remove old report workbooks daily at 12:45 AM
+        scheduler.add_job(
+            purge_expired_report_jobs,
+            trigger=CronTrigger(hour=0, minute=45),
+            id='report_job_purge',
+            name='Report Job Purge',
+            replace_existing=True
+        )
         scheduler.start()
         logger.info("[SCHEDULER] Scheduler started. Daily low stock notifications scheduled for 11:59 PM.")
     else:
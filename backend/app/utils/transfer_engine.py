@@ -0,0 +1,127 @@
+# backend/app/utils/transfer_engine.py
+# ----------------------------------------------------------
+# Cross-project stock transfers: set-based donor allocation,
+# transfer transaction records and deadlock/serialization retry.
+# ----------------------------------------------------------
+import logging
+import random
+import time
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from .. import models
+from . import catalog_version
+
+logger = logging.getLogger(__name__)
+
+# Postgres SQLSTATEs that are safe to retry from the start of the transaction
+RETRYABLE_PGCODES = {
+    "40P01",  # deadlock_detected
+    "40001",  # serialization_failure
+}
+MAX_ATTEMPTS = 4
+BASE_BACKOFF_SECONDS = 0.05
+
+# Takes stock from the largest donors first. Donor rows are locked in item_id
+# order and rows already locked by another transaction are skipped instead of
+# waited on, so concurrent shortfall requests never wait on each other's donors.
+ALLOCATE_DONORS_SQL = text("""
+    WITH donors AS (
+        SELECT item_id, item_current_quantity
+        FROM inventory
+        WHERE item_name = :item_name
+          AND item_id <> :item_id
+          AND item_current_quantity > 0
+        ORDER BY item_id
+        FOR UPDATE SKIP LOCKED
+    ),
+    ranked AS (
+        SELECT item_id,
+               item_current_quantity,
+               SUM(item_current_quantity) OVER (ORDER BY item_current_quantity DESC, item_id)
+                   - item_current_quantity AS taken_before
+        FROM donors
+    ),
+    allocation AS (
+        SELECT item_id, LEAST(item_current_quantity, :needed - taken_before) AS quantity
+        FROM ranked
+        WHERE taken_before < :needed
+    )
+    UPDATE inventory AS i
+    SET item_current_quantity = i.item_current_quantity - a.quantity
+    FROM allocation AS a
+    WHERE i.item_id = a.item_id
+    RETURNING i.item_id, i.project_name, i.test_area, a.quantity
+""")
+
+
+def allocate_from_donors(db: Session, item: models.Inventory, needed: int):
+    """
+    Take up to `needed` units of the same item from other projects in one statement.
+    Returns a list of (item_id, project_name, test_area, quantity) for each donor used.
+    The caller must roll back if the total is less than `needed`.
+    """
+    catalog_version.mark_changed(db, "inventory")
+    rows = db.execute(
+        ALLOCATE_DONORS_SQL,
+        {"item_name": item.item_name, "item_id": item.item_id, "needed": needed},
+    ).all()
+    # RETURNING order is not guaranteed; keep results stable for the response
+    return sorted(rows, key=lambda row: (-row.quantity, row.item_id))
+
+
+def record_transfer(
+    db: Session,
+    source_item_id: int,
+    source_project: str,
+    source_test_area: str,
+    dest_item: models.Inventory,
+    quantity: int,
+    employee_id: int,
+    fixture_id: int | None,
+    out_remarks: str,
+    in_remarks: str,
+):
+    """Add the transfer_out / transfer_in transaction pair for one transfer."""
+    db.add(models.Transaction(
+        item_id=source_item_id,
+        employee_id=employee_id,
+        fixture_id=fixture_id,
+        quantity_used=quantity,
+        test_area=source_test_area,
+        project_name=source_project,
+        transaction_type="transfer_out",
+        remarks=out_remarks,
+    ))
+    db.add(models.Transaction(
+        item_id=dest_item.item_id,
+        employee_id=employee_id,
+        fixture_id=fixture_id,
+        quantity_used=quantity,
+        test_area=dest_item.test_area,
+        project_name=dest_item.project_name,
+        transaction_type="transfer_in",
+        remarks=in_remarks,
+    ))
+
+
+def _is_retryable(error: DBAPIError) -> bool:
+    return getattr(error.orig, "pgcode", None) in RETRYABLE_PGCODES
+
+
+def run_with_retry(db: Session, operation):
+    """
+    Run `operation()` (which must commit its own work) and retry it with
+    exponential backoff when Postgres aborts it with a deadlock or
+    serialization failure. Other errors are raised unchanged.
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            return operation()
+        except DBAPIError as e:
+            db.rollback()
+            if not _is_retryable(e) or attempt == MAX_ATTEMPTS:
+                raise
+            delay = BASE_BACKOFF_SECONDS * (2 ** (attempt - 1)) * (1 + random.random())
+            logger.warning(f"[TRANSFER] Retrying after {e.orig.pgcode} (attempt {attempt}/{MAX_ATTEMPTS}, sleeping {delay:.3f}s)")
+            time.sleep(delay)
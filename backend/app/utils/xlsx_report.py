@@ -0,0 +1,83 @@
+# backend/app/utils/xlsx_report.py
+# ----------------------------------------------------------
+# Renders usage report workbooks with openpyxl. Runs inside the
+# report job process pool, so it only works on plain data passed
+# in by the caller and never touches the database.
+# ----------------------------------------------------------
+import os
+
+USAGE_COLUMNS = [
+    ("Name", "name", 32),
+    ("Transactions", "total", 14),
+    ("Requested", "requests", 12),
+    ("Returned", "returns", 12),
+    ("Restocked", "restocks", 12),
+]
+TOP_ITEM_COLUMNS = [
+    ("Item", "item_name", 36),
+    ("Part Number", "item_part_number", 20),
+    ("Requested", "total_requested", 12),
+    ("Requests", "transaction_count", 12),
+]
+LOW_STOCK_COLUMNS = [
+    ("Item", "item_name", 36),
+    ("Part Number", "item_part_number", 20),
+    ("Project", "project_name", 20),
+    ("Test Area", "test_area", 12),
+    ("On Hand", "item_current_quantity", 10),
+    ("Minimum", "item_min_count", 10),
+    ("Shortfall", "shortfall", 10),
+]
+
+
+def _write_table(sheet, columns, rows, header_font, header_fill, start_row=1):
+    from openpyxl.utils import get_column_letter
+
+    for col, (title, _, width) in enumerate(columns, start=1):
+        cell = sheet.cell(row=start_row, column=col, value=title)
+        cell.font = header_font
+        cell.fill = header_fill
+        sheet.column_dimensions[get_column_letter(col)].width = width
+    for row_index, row in enumerate(rows, start=start_row + 1):
+        for col, (_, key, _) in enumerate(columns, start=1):
+            sheet.cell(row=row_index, column=col, value=row.get(key))
+    sheet.freeze_panes = sheet.cell(row=start_row + 1, column=1)
+    if rows:
+        sheet.auto_filter.ref = f"A{start_row}:{get_column_letter(len(columns))}{start_row + len(rows)}"
+
+
+def render_usage_workbook(data: dict, path: str) -> str:
+    """
+    Write a usage workbook for one period to `path` and return the path.
+
+    `data` holds title, period_start, period_end, generated_at, summary (dict),
+    and row lists projects, test_areas, top_items and low_stock.
+    """
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill
+
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill("solid", fgColor="1F4E78")
+
+    workbook = Workbook()
+    summary = workbook.active
+    summary.title = "Summary"
+    summary["A1"] = data["title"]
+    summary["A1"].font = Font(bold=True, size=14)
+    summary["A2"] = f"{data['period_start']} to {data['period_end']}"
+    summary["A3"] = f"Generated {data['generated_at']}"
+    summary.column_dimensions["A"].width = 28
+    summary.column_dimensions["B"].width = 14
+    for row_index, (label, value) in enumerate(data["summary"].items(), start=5):
+        summary.cell(row=row_index, column=1, value=label).font = Font(bold=True)
+        summary.cell(row=row_index, column=2, value=value)
+
+    _write_table(workbook.create_sheet("By Project"), USAGE_COLUMNS, data["projects"], header_font, header_fill)
+    _write_table(workbook.create_sheet("By Test Area"), USAGE_COLUMNS, data["test_areas"], header_font, header_fill)
+    _write_table(workbook.create_sheet("Top Items"), TOP_ITEM_COLUMNS, data["top_items"], header_font, header_fill)
+    _write_table(workbook.create_sheet("Low Stock"), LOW_STOCK_COLUMNS, data["low_stock"], header_font, header_fill)
+
+    tmp_path = f"{path}.tmp"
+    workbook.save(tmp_path)
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,49 @@
+# Every worker's scheduler runs anomaly detection: overlapping runs must
+# leave each flag stored once.
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+
+if not os.getenv("MMIS_TEST_DATABASE_URL"):
+    pytest.skip("MMIS_TEST_DATABASE_URL is not set", allow_module_level=True)
+
+from sqlalchemy import func, text
+from app import models
+from app.database import SessionLocal
+from app.utils.anomaly import detect_usage_anomalies
+
+RUNS = 4
+
+
+def test_overlapping_runs_store_each_flag_once(db, catalog):
+    item_id = catalog.add_item(quantity=100)
+    # Two units a day for 60 days, then a spike of 40 yesterday
+    db.execute(
+        text(
+            "INSERT INTO transactions (item_id, employee_id, fixture_id, quantity_used, transaction_type, project_name, created_at) "
+            "SELECT :item_id, :employee_id, :fixture_id, CASE WHEN n = 1 THEN 40 ELSE 2 END, 'request', :project, "
+            "       now() - n * interval '1 day' "
+            "FROM generate_series(1, 60) AS n"
+        ),
+        {"item_id": item_id, "employee_id": catalog.employee_id, "fixture_id": catalog.fixture_id, "project": catalog.project},
+    )
+    db.commit()
+
+    barrier = threading.Barrier(RUNS)
+
+    def run(_):
+        session = SessionLocal()
+        try:
+            barrier.wait(timeout=10)
+            return detect_usage_anomalies(session)
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(max_workers=RUNS) as pool:
+        stored = list(pool.map(run, range(RUNS)))
+
+    flags = db.query(models.UsageAnomaly.day, func.count()).filter(models.UsageAnomaly.item_id == item_id).group_by(models.UsageAnomaly.day).all()
+    assert len(flags) == 1
+    assert flags[0][1] == 1
+    assert db.query(models.UsageAnomaly).count() == stored[0]
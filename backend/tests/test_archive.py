@@ -0,0 +1,98 @@
+# Archived history reads: block-indexed archives must return exactly what a
+# full scan returns, for every keyset position. No database needed.
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.utils import archive
+
+NAME = "transactions_p2024_03"
+
+
+def _rows(count: int):
+    newest = datetime(2024, 3, 31, 23, 0, tzinfo=timezone.utc)
+    # Newest first; every third timestamp is shared by two ids
+    return [
+        {
+            "transaction_id": 10_000 - n,
+            "created_at": newest - timedelta(minutes=(n // 2) * 3),
+            "transaction_type": "request" if n % 2 else "return",
+            "test_area": "ICT",
+            "project_name": "Alpha",
+        }
+        for n in range(count)
+    ]
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", tmp_path)
+    monkeypatch.setattr(archive, "ARCHIVE_BLOCK_ROWS", 50)
+    return tmp_path
+
+
+def _keys(rows):
+    return [(row["created_at"], row["transaction_id"]) for row in rows]
+
+
+def test_indexed_reads_match_full_scan(archive_dir):
+    rows = _rows(537)
+    assert archive.write_archive(NAME, rows) == 537
+    index = json.loads(archive.archive_index_path(NAME).read_text())
+    assert len(index["blocks"]) == 11
+
+    # Still one readable .gz file
+    with gzip.open(archive.archive_path(NAME), "rt", encoding="utf-8") as f:
+        assert sum(1 for _ in f) == 537
+
+    expected = _keys(rows)
+    assert _keys(archive.iter_archived_rows()) == expected
+    # A deep position starts at its block, not at the beginning of the file
+    assert archive._archive_start_offset(NAME, expected[300]) == index["blocks"][6][0]
+    for position in [expected[0], expected[49], expected[50], expected[51], expected[300], expected[-1]]:
+        older = [key for key in expected if key < position]
+        assert _keys(archive.iter_archived_rows(before=position)) == older
+
+
+def test_position_before_whole_archive_skips_file(archive_dir):
+    archive.write_archive(NAME, _rows(120))
+    oldest = _keys(_rows(120))[-1]
+    assert list(archive.iter_archived_rows(before=oldest)) == []
+
+
+def test_archive_without_index_falls_back_to_scan(archive_dir):
+    rows = _rows(120)
+    archive.write_archive(NAME, rows)
+    archive.archive_index_path(NAME).unlink()
+    position = _keys(rows)[70]
+    assert _keys(archive.iter_archived_rows(before=position)) == _keys(rows)[71:]
+
+
+def test_overlapping_writes_do_not_share_a_temp_file(archive_dir):
+    first, second = _rows(120), _rows(80)
+
+    def rows_interrupted_by_another_writer():
+        for n, row in enumerate(first):
+            if n == 60:
+                archive.write_archive(NAME, second)
+            yield row
+
+    archive.write_archive(NAME, rows_interrupted_by_another_writer())
+
+    # The last writer to finish wins with an intact archive; no temp files remain
+    assert _keys(archive.iter_archived_rows()) == _keys(first)
+    assert sorted(archive_dir.iterdir()) == sorted([archive.archive_path(NAME), archive.archive_index_path(NAME)])
+
+
+def test_failed_write_keeps_the_previous_archive(archive_dir):
+    archive.write_archive(NAME, _rows(30))
+
+    def failing_rows():
+        yield from _rows(10)
+        raise RuntimeError("database went away")
+
+    with pytest.raises(RuntimeError):
+        archive.write_archive(NAME, failing_rows())
+
+    assert _keys(archive.iter_archived_rows()) == _keys(_rows(30))
+    assert len(list(archive_dir.iterdir())) == 2
@@ -0,0 +1,18 @@
+# compute_forecasts is pure NumPy. No database needed.
+import numpy as np
+from app.utils.forecast import compute_forecasts
+
+
+def test_reorder_point_ignores_float_noise():
+    # One unit a day for eight days: the EWMA comes out as 1.0000000000000002,
+    # the reorder point is still exactly 7
+    result = compute_forecasts(np.ones((1, 8)), np.array([10.0]), alpha=0.1, lead_time_days=7)
+
+    assert result["demand_std"][0] == 0
+    assert result["reorder_point"][0] == 7
+
+
+def test_reorder_point_still_rounds_partial_units_up():
+    result = compute_forecasts(np.full((1, 90), 0.5), np.array([10.0]), lead_time_days=7)
+
+    assert result["reorder_point"][0] == 4
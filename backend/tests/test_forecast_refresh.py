@@ -0,0 +1,64 @@
+# refresh_item_forecasts against the rollup: the partial current day stays out
+# of the history, and overlapping runs from several workers both succeed.
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+import pytest
+
+if not os.getenv("MMIS_TEST_DATABASE_URL"):
+    pytest.skip("MMIS_TEST_DATABASE_URL is not set", allow_module_level=True)
+
+from sqlalchemy import insert
+from app import models
+from app.database import SessionLocal
+from app.utils.forecast import FORECAST_WINDOW_DAYS, refresh_item_forecasts
+
+
+def _seed_usage(db, item_id: int, project: str):
+    today = date.today()
+    rows = [{"day": today - timedelta(days=n), "quantity": 2} for n in range(1, FORECAST_WINDOW_DAYS + 1)]
+    # A few hours into today: far from a full day's demand
+    rows.append({"day": today, "quantity": 100})
+    db.execute(insert(models.DailyUsageRollup), [
+        {**row, "item_id": item_id, "project_name": project, "test_area": "ICT",
+         "transaction_type": "request", "transaction_count": 1}
+        for row in rows
+    ])
+    db.commit()
+
+
+def _forecast(db, item_id: int):
+    db.expire_all()
+    return db.query(models.ItemForecast).filter(models.ItemForecast.item_id == item_id).one()
+
+
+def test_history_ends_yesterday(db, catalog):
+    item_id = catalog.add_item(quantity=20)
+    _seed_usage(db, item_id, catalog.project)
+
+    refresh_item_forecasts(db)
+
+    forecast = _forecast(db, item_id)
+    assert forecast.moving_average_daily == 2
+    assert forecast.demand_std == 0
+
+
+def test_overlapping_refreshes_both_succeed(db, catalog):
+    item_id = catalog.add_item(quantity=20)
+    _seed_usage(db, item_id, catalog.project)
+    barrier = threading.Barrier(3)
+
+    def run(_):
+        session = SessionLocal()
+        try:
+            barrier.wait(timeout=10)
+            return refresh_item_forecasts(session)
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        counts = list(pool.map(run, range(3)))
+
+    assert len(set(counts)) == 1
+    assert _forecast(db, item_id).moving_average_daily == 2
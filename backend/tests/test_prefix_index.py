@@ -0,0 +1,30 @@
+# Type-ahead ranking must see every key in the prefix range, not just the
+# first ones in sort order. The index is in memory; no database needed.
+from app.utils.prefix_index import PrefixIndex
+
+
+def _item(item_id: int, name: str, project: str = "Astoria"):
+    entity = {
+        "kind": "item", "id": item_id, "label": name, "item_part_number": None,
+        "project_name": project, "test_area": "ICT",
+    }
+    return ("item", item_id), (entity, [name])
+
+
+def test_best_match_sorting_after_many_weaker_matches_is_found():
+    index = PrefixIndex()
+    # Long names that sort before the short, best-ranked "relayx"
+    index.apply(dict(_item(n, f"relay 0 long replacement part {n:03d}") for n in range(100)))
+    index.apply(dict([_item(1000, "relayx")]))
+
+    results = index.search("relay", kinds={"item"}, limit=10)
+
+    assert [entity["id"] for entity in results][0] == 1000
+    assert len(results) == 10
+
+
+def test_label_start_matches_rank_above_later_words():
+    index = PrefixIndex()
+    index.apply(dict([_item(1, "Omron relay"), _item(2, "relay socket extended")]))
+
+    assert [entity["id"] for entity in index.search("relay", kinds={"item"})] == [2, 1]
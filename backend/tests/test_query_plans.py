@@ -0,0 +1,229 @@
+# Plan regression checks: the hot read paths (transactions, crud and the
+# report routes) must keep using the indexes declared for them in models.py.
+# Each test runs the real code, captures the SQL it sent and asserts on
+# EXPLAIN (FORMAT JSON) of those statements.
+import os
+import pytest
+
+if not os.getenv("MMIS_TEST_DATABASE_URL"):
+    pytest.skip("MMIS_TEST_DATABASE_URL is not set", allow_module_level=True)
+
+from datetime import date, timedelta
+from sqlalchemy import text
+from app import crud, models
+from app.routes import reports as report_routes
+from app.routes.fixtures import FIXTURE_LIST_COLUMNS, FIXTURE_LIST_SORTS
+from app.routes.inventory import INVENTORY_LIST_COLUMNS, INVENTORY_LIST_SORTS
+from app.utils import listing
+
+ITEMS = 2000
+FIXTURES = 2000
+EMPLOYEES = 99
+TRANSACTIONS = 40000
+
+
+@pytest.fixture(scope="module")
+def seeded(module_catalog):
+    """
+    Enough rows that a sequential scan is never the cheapest plan for a selective
+    query. One transaction in a hundred belongs to the catalog employee, the rest
+    are spread over EMPLOYEES others, and one in five hundred is a transfer_out.
+    """
+    catalog, db = module_catalog, module_catalog.db
+    params = {"tag": catalog.tag, "project": catalog.project}
+    item_ids = db.execute(
+        text(
+            "INSERT INTO inventory (item_name, item_part_number, item_current_quantity, item_min_count, test_area, project_name) "
+            "SELECT 'Plan Item ' || :tag || ' ' || n, 'PLAN-' || :tag || '-' || n, 10, 1, 'ICT', :project "
+            "FROM generate_series(1, :count) AS n RETURNING item_id"
+        ),
+        {**params, "count": ITEMS},
+    ).scalars().all()
+    catalog.item_ids.extend(item_ids)
+    db.execute(
+        text(
+            "INSERT INTO fixtures (fixture_name, test_area, project_name) "
+            "SELECT 'Plan Fixture ' || :tag || ' ' || n, 'ICT', :project FROM generate_series(1, :count) AS n"
+        ),
+        {**params, "count": FIXTURES},
+    )
+    employee_ids = db.execute(
+        text(
+            "INSERT INTO employees (employee_badge_number, employee_name, employee_username, employee_password) "
+            "SELECT 'P' || :tag || '-' || n, 'Plan Employee ' || :tag || ' ' || n, 'plan_' || :tag || '_' || n, 'not-a-hash' "
+            "FROM generate_series(1, :count) AS n RETURNING employee_id"
+        ),
+        {**params, "count": EMPLOYEES},
+    ).scalars().all()
+    db.execute(
+        text(
+            "INSERT INTO transactions (item_id, employee_id, fixture_id, quantity_used, transaction_type, "
+            "test_area, project_name, remarks, created_at) "
+            "SELECT :first_item + n % :items, "
+            "       CASE WHEN n % 100 = 0 THEN :employee_id ELSE (:employee_ids)[1 + n % :employees] END, :fixture_id, 1, "
+            "       CASE WHEN n % 500 = 0 THEN 'transfer_out' "
+            "            ELSE (ARRAY['request', 'return', 'request', 'return', 'restock'])[1 + n % 5] END, "
+            "       (ARRAY['ICT', 'FBT', 'BSI'])[1 + n % 3], "
+            "       :project || '-' || n % 20, '', now() - n * interval '7 minutes' "
+            "FROM generate_series(1, :count) AS n"
+        ),
+        {
+            **params,
+            "first_item": min(item_ids),
+            "items": ITEMS,
+            "employee_id": catalog.employee_id,
+            "employee_ids": employee_ids,
+            "employees": EMPLOYEES,
+            "fixture_id": catalog.fixture_id,
+            "count": TRANSACTIONS,
+        },
+    )
+    db.commit()
+    # Statistics first, or the rebuild plans its grouped joins for empty tables
+    for table in ("inventory", "fixtures", "employees", "transactions"):
+        db.execute(text(f"ANALYZE {table}"))
+    crud.rebuild_open_checkouts(db)
+    crud.refresh_daily_usage_rollup(db)
+    for table in ("open_checkouts", "daily_usage_rollup"):
+        db.execute(text(f"ANALYZE {table}"))
+    db.commit()
+    yield catalog
+
+    db.rollback()
+    db.query(models.Report).filter(models.Report.item_id.in_(item_ids)).delete(synchronize_session=False)
+    db.query(models.OpenCheckout).filter(models.OpenCheckout.employee_id.in_(employee_ids)).delete(synchronize_session=False)
+    db.query(models.Transaction).filter(models.Transaction.employee_id.in_(employee_ids)).delete(synchronize_session=False)
+    db.query(models.Employee).filter(models.Employee.employee_id.in_(employee_ids)).delete(synchronize_session=False)
+    db.commit()
+
+
+def _plan_indexes(db, statements) -> set:
+    """Names of every index used in the plans of the captured queries (EXPLAIN does not run them)."""
+    names = set()
+    for statement, parameters in statements:
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH", "INSERT", "DELETE")):
+            continue
+        if isinstance(parameters, (list, tuple)):
+            continue  # executemany
+        plan = db.connection().exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+        nodes = [plan[0]["Plan"]]
+        while nodes:
+            node = nodes.pop()
+            if "Index Name" in node:
+                names.add(node["Index Name"])
+            nodes.extend(node.get("Plans", []))
+    return names
+
+
+def test_history_page_uses_created_at_index(db, seeded, count_statements):
+    with count_statements() as statements:
+        crud.get_transaction_history_page(db, limit=50)
+
+    assert "ix_transactions_created_at_id" in _plan_indexes(db, statements)
+
+
+def test_history_page_by_type_uses_type_index(db, seeded, count_statements):
+    with count_statements() as statements:
+        crud.get_transaction_history_page(db, transaction_type="transfer_out", limit=50)
+
+    assert "ix_transactions_type_created" in _plan_indexes(db, statements)
+
+
+def test_open_checkouts_by_employee_uses_employee_index(db, seeded, count_statements):
+    with count_statements() as statements:
+        crud.get_open_checkouts(db, employee_id=seeded.employee_id)
+
+    assert "ix_open_checkouts_employee_requested_at" in _plan_indexes(db, statements)
+
+
+def test_employee_requests_use_open_checkouts_employee_index(db, seeded, count_statements):
+    # GET /transactions/user/{id} reads the open_checkouts ledger, not transactions
+    with count_statements() as statements:
+        crud.get_transactions_by_employee(db, seeded.employee_id)
+
+    assert "ix_open_checkouts_employee_requested_at" in _plan_indexes(db, statements)
+
+
+def test_legacy_return_matching_uses_return_match_index(db, seeded, count_statements):
+    request = (
+        db.query(models.Transaction)
+        .filter(models.Transaction.employee_id == seeded.employee_id, models.Transaction.transaction_type == "request")
+        .first()
+    )
+    with count_statements() as statements:
+        crud.get_remaining_quantity(db, request)
+
+    assert "ix_transactions_return_match" in _plan_indexes(db, statements)
+
+
+def test_inventory_list_page_uses_name_index(db, seeded, count_statements):
+    selected = listing.parse_fields(None, INVENTORY_LIST_COLUMNS)
+    sort, keys, descending = listing.parse_sort(None, INVENTORY_LIST_SORTS, "item_name")
+    query = db.query(*[INVENTORY_LIST_COLUMNS[name].label(name) for name in selected])
+    with count_statements() as statements:
+        listing.fetch_rows(query, selected, sort, keys, descending, limit=50)
+
+    assert "ix_inventory_name_id" in _plan_indexes(db, statements)
+
+
+def test_fixture_list_page_uses_name_index(db, seeded, count_statements):
+    selected = listing.parse_fields(None, FIXTURE_LIST_COLUMNS)
+    sort, keys, descending = listing.parse_sort(None, FIXTURE_LIST_SORTS, "fixture_name")
+    query = db.query(*[FIXTURE_LIST_COLUMNS[name].label(name) for name in selected])
+    with count_statements() as statements:
+        listing.fetch_rows(query, selected, sort, keys, descending, limit=50)
+
+    assert "ix_fixtures_name_id" in _plan_indexes(db, statements)
+
+
+# ---- routes/reports.py: date ranges on daily_usage_rollup (day leads its key index) ----
+ROLLUP_DAY_INDEX = "ix_daily_usage_rollup_key"
+
+
+@pytest.mark.parametrize("report", [
+    report_routes._weekly_projects_stats,
+    report_routes._weekly_test_areas_stats,
+    report_routes._weekly_most_used_items,
+    report_routes._dashboard_summary,
+])
+def test_weekly_reports_use_rollup_day_index(db, seeded, count_statements, report):
+    with count_statements() as statements:
+        report(db)
+
+    assert ROLLUP_DAY_INDEX in _plan_indexes(db, statements)
+
+
+def test_usage_series_uses_rollup_day_index(db, seeded, count_statements):
+    with count_statements() as statements:
+        report_routes.get_usage_series(
+            start_date=date.today() - timedelta(days=6), end_date=date.today(), bucket="day",
+            group_by="project", transaction_type="request", top_n=10, db=db,
+        )
+
+    assert ROLLUP_DAY_INDEX in _plan_indexes(db, statements)
+
+
+def test_report_job_data_uses_rollup_day_index(db, seeded, count_statements):
+    start, end = report_routes._report_period("weekly", date.today())
+    with count_statements() as statements:
+        report_routes._workbook_data(db, "weekly", start, end)
+
+    assert ROLLUP_DAY_INDEX in _plan_indexes(db, statements)
+
+
+# ---- created_at ranges on transactions ----
+def test_rollup_refresh_uses_created_at_index(db, seeded, count_statements):
+    with count_statements() as statements:
+        crud.refresh_daily_usage_rollup(db, since=date.today() - timedelta(days=1))
+
+    indexes = _plan_indexes(db, statements)
+    assert "ix_transactions_created_at_id" in indexes
+    assert ROLLUP_DAY_INDEX in indexes  # the DELETE of the refreshed days
+
+
+def test_weekly_report_build_uses_a_created_at_index(db, seeded, count_statements):
+    with count_statements() as statements:
+        crud.generate_weekly_report(db, regenerate=True)
+
+    # Requests in the last 7 days: either index leading to created_at, never a scan
+    assert {"ix_transactions_created_at_id", "ix_transactions_type_created"} & _plan_indexes(db, statements)
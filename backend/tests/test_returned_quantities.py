@@ -0,0 +1,143 @@
+# Grouped returned-quantity computation (crud.returned_quantity_subquery) versus
+# the per-request lookups it replaced: same results, constant query count.
+import os
+from datetime import datetime, timedelta, timezone
+import pytest
+
+if not os.getenv("MMIS_TEST_DATABASE_URL"):
+    pytest.skip("MMIS_TEST_DATABASE_URL is not set", allow_module_level=True)
+
+from sqlalchemy import func, select
+from app import crud, models
+from app.routes import transactions as transaction_routes
+
+T = models.Transaction
+
+
+def _seed(db, catalog, item_id: int, count: int):
+    """`count` requests with linked, legacy and never-matching returns mixed in."""
+    start = datetime.now(timezone.utc) - timedelta(days=1)
+    requests = []
+    for i in range(count):
+        fixture_id = catalog.fixture_id if i % 2 == 0 else None
+        request = T(
+            item_id=item_id,
+            employee_id=catalog.employee_id,
+            fixture_id=fixture_id,
+            quantity_used=5,
+            transaction_type="request",
+            created_at=start + timedelta(minutes=10 * i),
+        )
+        db.add(request)
+        requests.append(request)
+    db.flush()
+
+    for i, request in enumerate(requests):
+        returned_at = request.created_at + timedelta(minutes=1)
+        if i % 3 == 0:
+            # Linked return (as backfilled from a REQUEST_TX_ID remark)
+            db.add(T(
+                item_id=item_id, employee_id=catalog.employee_id, fixture_id=request.fixture_id,
+                quantity_used=2, transaction_type="return", created_at=returned_at,
+                remarks=f"REQUEST_TX_ID:{request.transaction_id}|", request_transaction_id=request.transaction_id,
+            ))
+        elif i % 3 == 1:
+            # Unlinked return: a legacy match for this and every earlier request on the same fixture
+            db.add(T(
+                item_id=item_id, employee_id=catalog.employee_id, fixture_id=request.fixture_id,
+                quantity_used=1, transaction_type="return", created_at=returned_at, remarks="",
+            ))
+        else:
+            # Never legacy matches: NULL remarks, or a REQUEST_TX_ID prefix for a missing request
+            db.add(T(
+                item_id=item_id, employee_id=catalog.employee_id, fixture_id=request.fixture_id,
+                quantity_used=1, transaction_type="return", created_at=returned_at, remarks=None,
+            ))
+            db.add(T(
+                item_id=item_id, employee_id=catalog.employee_id, fixture_id=request.fixture_id,
+                quantity_used=1, transaction_type="return", created_at=returned_at, remarks="REQUEST_TX_ID:0|",
+            ))
+    db.commit()
+
+
+def _grouped_returned(db, employee_id: int) -> dict:
+    requests = (
+        select(T.transaction_id, T.item_id, T.employee_id, T.fixture_id, T.created_at)
+        .where(T.employee_id == employee_id, T.transaction_type == "request")
+        .subquery()
+    )
+    returned = crud.returned_quantity_subquery(requests)
+    return {row.request_id: int(row.returned) for row in db.execute(select(returned.c.request_id, returned.c.returned))}
+
+
+def _per_request_returned(db, employee_id: int) -> dict:
+    """The lookups the history endpoints used to run: up to two queries per request."""
+    requests = db.query(T).filter(T.employee_id == employee_id, T.transaction_type == "request").all()
+    result = {}
+    for request in requests:
+        explicit = (
+            db.query(func.coalesce(func.sum(T.quantity_used), 0))
+            .filter(T.transaction_type == "return")
+            .filter(T.request_transaction_id == request.transaction_id)
+            .scalar()
+        )
+        if explicit:
+            result[request.transaction_id] = int(explicit)
+            continue
+        legacy = (
+            db.query(func.coalesce(func.sum(T.quantity_used), 0))
+            .filter(T.item_id == request.item_id)
+            .filter(T.employee_id == request.employee_id)
+            .filter(T.fixture_id == request.fixture_id)  # None renders as IS NULL
+            .filter(T.transaction_type == "return")
+            .filter(T.created_at >= request.created_at)
+            .filter(T.request_transaction_id.is_(None))
+            .filter(~T.remarks.like("REQUEST_TX_ID:%"))
+            .scalar()
+        )
+        result[request.transaction_id] = int(legacy)
+    return result
+
+
+def test_grouped_returned_quantities_match_per_request_lookups(db, catalog):
+    item_id = catalog.add_item(quantity=100)
+    _seed(db, catalog, item_id, 12)
+
+    assert _grouped_returned(db, catalog.employee_id) == _per_request_returned(db, catalog.employee_id)
+
+
+def test_entry_points_match_per_request_lookups(db, catalog):
+    item_id = catalog.add_item(quantity=100)
+    # Enough requests that the earliest are fully returned through legacy matches
+    _seed(db, catalog, item_id, 30)
+    crud.rebuild_open_checkouts(db)
+
+    returned = _per_request_returned(db, catalog.employee_id)
+    requests = db.query(T).filter(T.employee_id == catalog.employee_id, T.transaction_type == "request").all()
+    remaining = {request.transaction_id: request.quantity_used - returned[request.transaction_id] for request in requests}
+    assert any(quantity <= 0 for quantity in remaining.values())
+
+    # GET /transactions/user/{id}: only requests that are not fully returned
+    open_requests = crud.get_transactions_by_employee(db, catalog.employee_id)
+    assert {row["transaction_id"]: row["remaining_quantity"] for row in open_requests} == {
+        transaction_id: quantity for transaction_id, quantity in remaining.items() if quantity > 0
+    }
+    # GET /transactions/{id}
+    for transaction_id, quantity in remaining.items():
+        assert transaction_routes.get_transaction(transaction_id, db)["remaining_quantity"] == quantity
+
+
+@pytest.mark.parametrize("count", [5, 50])
+def test_query_count_does_not_grow_with_requests(db, catalog, count_statements, count):
+    item_id = catalog.add_item(quantity=1000)
+    _seed(db, catalog, item_id, count)
+    db.expire_all()
+
+    with count_statements() as before:
+        expected = _per_request_returned(db, catalog.employee_id)
+    with count_statements() as after:
+        grouped = _grouped_returned(db, catalog.employee_id)
+
+    assert grouped == expected
+    assert len(after) == 1
+    assert len(before) >= count + 1
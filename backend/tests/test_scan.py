@@ -0,0 +1,73 @@
+# /scan/{code}: the warm code map must never hide rows written behind its back,
+# and codes containing "/" must reach the route.
+import os
+import pytest
+
+if not os.getenv("MMIS_TEST_DATABASE_URL"):
+    pytest.skip("MMIS_TEST_DATABASE_URL is not set", allow_module_level=True)
+
+from sqlalchemy import insert
+from starlette.routing import Match
+from app import crud, models
+from app.routes import scan as scan_routes
+from app.utils import scan_index
+
+
+def test_resolve_includes_rows_missing_from_the_map(db, catalog):
+    code = f"SCAN-{catalog.tag}"
+    mapped_id = catalog.add_item(quantity=3)
+    db.get(models.Inventory, mapped_id).item_part_number = code
+    db.commit()
+    assert scan_index.scan_index.lookup(code)[0] == [mapped_id]
+
+    # A Core insert bypasses the ORM listeners, like a write from another process
+    unmapped_id = db.execute(
+        insert(models.Inventory)
+        .values(
+            item_name=f"Test Item {catalog.tag}", item_part_number=code, item_current_quantity=5,
+            item_min_count=0, test_area="ICT", project_name=f"{catalog.project}-other",
+        )
+        .returning(models.Inventory.item_id)
+    ).scalar()
+    catalog.item_ids.append(unmapped_id)
+    db.commit()
+
+    items, fixtures = scan_index.resolve(db, code)
+
+    assert sorted(item.item_id for item in items) == sorted([mapped_id, unmapped_id])
+    assert fixtures == []
+    assert scan_index.scan_index.lookup(code)[0] == sorted([mapped_id, unmapped_id])
+
+
+def test_resolve_drops_rows_whose_code_changed(db, catalog):
+    code = f"SCAN-{catalog.tag}"
+    item_id = catalog.add_item()
+    scan_index.scan_index.apply({("item", item_id): [code]})
+
+    assert scan_index.resolve(db, code) == ([], [])
+
+
+def test_resolve_matches_fixture_codes_with_slashes(db, catalog):
+    fixture = db.get(models.Fixture, catalog.fixture_id)
+    fixture.asset_tag = f"AT/{catalog.tag}/01"
+    db.commit()
+
+    items, fixtures = scan_index.resolve(db, f" AT/{catalog.tag}/01 ")
+
+    assert items == []
+    assert [fx.fixture_id for fx in fixtures] == [catalog.fixture_id]
+
+
+def test_scan_route_accepts_codes_with_slashes():
+    scope = {"type": "http", "method": "GET", "path": "/scan/AT/0001/A"}
+    matches = [route.matches(scope) for route in scan_routes.router.routes]
+
+    assert [child["path_params"] for match, child in matches if match == Match.FULL] == [{"code": "AT/0001/A"}]
+
+
+def test_fixture_options_skip_projects_without_fixtures(db, catalog):
+    item = db.get(models.Inventory, catalog.add_item())
+    assert [fx.fixture_id for fx in crud.get_fixture_options(db, item)] == [catalog.fixture_id]
+
+    item.project_name = sorted(crud.SKIP_FIXTURE_PROJECTS)[0]
+    assert crud.get_fixture_options(db, item) == []
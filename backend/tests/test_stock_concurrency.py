@@ -0,0 +1,166 @@
+# Concurrent requests, restocks and transfers on the same items: stock must
+# never go negative, no units may appear or vanish, and deadlocks or
+# serialization failures must be absorbed by transfer_engine.run_with_retry.
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+
+if not os.getenv("MMIS_TEST_DATABASE_URL"):
+    pytest.skip("MMIS_TEST_DATABASE_URL is not set", allow_module_level=True)
+
+from fastapi import HTTPException
+from sqlalchemy import func, update
+from app import models, schemas
+from app.database import SessionLocal
+from app.routes import inventory as inventory_routes
+from app.routes import transactions as transaction_routes
+from app.utils import idempotency, transfer_engine
+
+PROJECTS = 4
+START_QUANTITY = 40
+WORKERS = 8
+OPERATIONS_PER_WORKER = 40
+
+
+def _transfer(db, data):
+    # POST /inventory/transfer without the admin token check
+    return transfer_engine.run_with_retry(
+        db,
+        lambda: idempotency.run(db, None, "inventory.transfer", data, lambda: inventory_routes._transfer_item(data, db)),
+    )
+
+
+def _worker(seed: int, catalog, item_ids):
+    """Run random stock operations; return (units requested, units restocked, operations completed, unexpected errors)."""
+    rng = random.Random(seed)
+    requested = restocked = completed = 0
+    errors = []
+    for _ in range(OPERATIONS_PER_WORKER):
+        db = SessionLocal()
+        try:
+            kind = rng.choice(["subtract", "request", "restock", "transfer", "transfer"])
+            quantity = rng.randint(1, 15)
+            if kind == "subtract":
+                # POST /transactions/request: one conditional UPDATE
+                transaction_routes.request_item(
+                    schemas.TransactionBase(
+                        item_id=rng.choice(item_ids), employee_id=catalog.employee_id,
+                        fixture_id=catalog.fixture_id, quantity_used=quantity, transaction_type="request",
+                    ),
+                    db,
+                )
+                requested += quantity
+            elif kind == "request":
+                # POST /inventory/request: locks the item, borrows shortfall from donors
+                inventory_routes.request_item(
+                    schemas.RequestCreate(
+                        item_id=rng.choice(item_ids), employee_id=catalog.employee_id,
+                        fixture_id=catalog.fixture_id, quantity=quantity,
+                    ),
+                    idempotency_key=None,
+                    db=db,
+                )
+                requested += quantity
+            elif kind == "restock":
+                inventory_routes.restock_item(
+                    {"item_id": rng.choice(item_ids), "quantity": quantity, "employee_id": catalog.employee_id},
+                    idempotency_key=None,
+                    db=db,
+                )
+                restocked += quantity
+            else:
+                source, dest = rng.sample(item_ids, 2)
+                _transfer(db, {
+                    "source_item_id": source, "dest_item_id": dest, "quantity": quantity,
+                    "employee_id": catalog.employee_id, "fixture_id": catalog.fixture_id,
+                })
+            completed += 1
+        except HTTPException as e:
+            # Insufficient stock is an expected outcome under contention
+            if e.status_code != 400:
+                errors.append(repr(e))
+        except Exception as e:
+            errors.append(repr(e))
+        finally:
+            db.close()
+    return requested, restocked, completed, errors
+
+
+def test_concurrent_stock_changes_never_oversell(db, catalog):
+    item_ids = [
+        catalog.add_item(quantity=START_QUANTITY, project=f"{catalog.project}-{n}", name=f"Contended {catalog.tag}")
+        for n in range(PROJECTS)
+    ]
+
+    negative_seen = []
+    stop = threading.Event()
+
+    def sample():
+        sampler = SessionLocal()
+        try:
+            while not stop.is_set():
+                lowest = (
+                    sampler.query(func.min(models.Inventory.item_current_quantity))
+                    .filter(models.Inventory.item_id.in_(item_ids))
+                    .scalar()
+                )
+                sampler.rollback()
+                if lowest < 0:
+                    negative_seen.append(lowest)
+        finally:
+            sampler.close()
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    try:
+        with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+            results = list(pool.map(lambda seed: _worker(seed, catalog, item_ids), range(WORKERS)))
+    finally:
+        stop.set()
+        sampler.join()
+
+    errors = [error for *_, worker_errors in results for error in worker_errors]
+    assert errors == []
+    assert negative_seen == []
+    # Contention must not turn every operation into a stock error
+    assert sum(c for _, _, c, _ in results) > WORKERS * OPERATIONS_PER_WORKER // 2
+
+    final = [catalog.quantity(item_id) for item_id in item_ids]
+    assert min(final) >= 0
+    requested = sum(r for r, *_ in results)
+    restocked = sum(s for _, s, *_ in results)
+    assert sum(final) == PROJECTS * START_QUANTITY + restocked - requested
+
+
+def test_run_with_retry_absorbs_deadlocks(catalog):
+    first_id, second_id = catalog.add_item(quantity=10), catalog.add_item(quantity=10)
+    barrier = threading.Barrier(2)
+    quantity = models.Inventory.item_current_quantity
+
+    def crosswise(lock_first: int, lock_second: int) -> int:
+        # Lock the two rows in opposite orders so Postgres aborts one side with 40P01
+        db = SessionLocal()
+        attempts = []
+
+        def operation():
+            attempts.append(1)
+            db.execute(update(models.Inventory).where(models.Inventory.item_id == lock_first).values(item_current_quantity=quantity + 1))
+            if len(attempts) == 1:
+                barrier.wait(timeout=10)
+            db.execute(update(models.Inventory).where(models.Inventory.item_id == lock_second).values(item_current_quantity=quantity + 1))
+            db.commit()
+
+        try:
+            transfer_engine.run_with_retry(db, operation)
+            return len(attempts)
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        attempts = list(pool.map(lambda ids: crosswise(*ids), [(first_id, second_id), (second_id, first_id)]))
+
+    assert sorted(attempts) == [1, 2]
+    assert catalog.quantity(first_id) == 12
+    assert catalog.quantity(second_id) == 12
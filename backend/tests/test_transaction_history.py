@@ -0,0 +1,31 @@
+# History date filters: a malformed date is a 400, never silently unfiltered
+# history. Validation happens before any query, so no database is needed.
+import pytest
+from fastapi import HTTPException
+from app import crud
+from app.routes import transactions as transaction_routes
+
+
+@pytest.mark.parametrize("call", [
+    lambda **dates: transaction_routes.get_all(**dates, db=None),
+    lambda **dates: transaction_routes.get_history(
+        **dates, limit=50, cursor=None, include_total=False, include_archived=False, db=None,
+    ),
+    lambda **dates: transaction_routes.export_transactions(format="csv", **dates, include_archived=False),
+])
+@pytest.mark.parametrize("dates", [
+    {"start_date": "2024-13-01", "end_date": None},
+    {"start_date": None, "end_date": "yesterday"},
+])
+def test_malformed_dates_are_rejected(call, dates):
+    with pytest.raises(HTTPException) as error:
+        call(test_area=None, project=None, transaction_type=None, **dates)
+
+    assert error.value.status_code == 400
+    assert next(name for name, value in dates.items() if value) in error.value.detail
+
+
+def test_end_date_includes_the_whole_day():
+    assert crud.parse_history_date("2024-02-28", days=1).isoformat() == "2024-02-29T00:00:00"
+    with pytest.raises(ValueError):
+        crud.parse_history_date("28/02/2024")
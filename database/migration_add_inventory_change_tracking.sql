@@ -0,0 +1,30 @@
+-- Migration script to add change tracking behind the in-memory inventory snapshot
+-- (backend/app/utils/inventory_snapshot.py). The backend also applies this on startup.
+-- Every insert/update stamps the row with the writing transaction id; deletes leave
+-- a tombstone. Snapshot refreshes read only rows stamped since their last watermark.
+
+ALTER TABLE inventory ADD COLUMN IF NOT EXISTS change_xid BIGINT;
+
+CREATE INDEX IF NOT EXISTS ix_inventory_change_xid ON inventory (change_xid);
+
+CREATE TABLE IF NOT EXISTS inventory_tombstones (
+    item_id INTEGER PRIMARY KEY,
+    change_xid BIGINT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_inventory_tombstones_change_xid ON inventory_tombstones (change_xid);
+
+CREATE OR REPLACE FUNCTION inventory_track_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO inventory_tombstones (item_id, change_xid) VALUES (OLD.item_id, txid_current())
+        ON CONFLICT (item_id) DO UPDATE SET change_xid = EXCLUDED.change_xid;
+        RETURN OLD;
+    END IF;
+    NEW.change_xid := txid_current();
+    RETURN NEW;
+END $$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS inventory_track_change ON inventory;
+CREATE TRIGGER inventory_track_change BEFORE INSERT OR UPDATE OR DELETE ON inventory
+    FOR EACH ROW EXECUTE FUNCTION inventory_track_change();
@@ -0,0 +1,16 @@
+-- Migration script to add full-text search over inventory (GET /inventory/search)
+-- The backend also applies this on startup; requires PostgreSQL 12+ for generated columns.
+-- The expression must match INVENTORY_SEARCH_EXPRESSION in backend/app/models.py
+
+ALTER TABLE inventory ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(item_name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(item_part_number, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(item_manufacturer, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(item_description, '')), 'C')
+    ) STORED;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_inventory_search_vector
+    ON inventory USING gin (search_vector);
+
+ANALYZE inventory;
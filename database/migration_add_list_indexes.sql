@@ -0,0 +1,29 @@
+-- Migration script to add the indexes behind sorted, keyset-paginated list endpoints
+-- (GET /inventory/, /fixtures/, /fixtures/filter, /documents/)
+-- The backend also creates these on startup; run this script to build them
+-- ahead of time without blocking writes (CONCURRENTLY cannot run in a transaction block)
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_inventory_name_id
+    ON inventory (item_name, item_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_inventory_created_at_id
+    ON inventory (created_at, item_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_inventory_project_test_area
+    ON inventory (project_name, test_area);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_fixtures_name_id
+    ON fixtures (fixture_name, fixture_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_fixtures_project_test_area
+    ON fixtures (project_name, test_area);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_project_documents_created_at_id
+    ON project_documents (created_at, document_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_project_documents_filename_id
+    ON project_documents (original_filename, document_id);
+
+ANALYZE inventory;
+ANALYZE fixtures;
+ANALYZE project_documents;
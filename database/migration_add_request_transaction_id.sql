@@ -0,0 +1,35 @@
+-- Migration script to link return transactions to their request transaction
+-- Run this script if you have an existing database without the request_transaction_id column
+
+-- Add request_transaction_id column if it doesn't exist
+DO $$ 
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 
+        FROM information_schema.columns 
+        WHERE table_name = 'transactions' 
+        AND column_name = 'request_transaction_id'
+    ) THEN
+        ALTER TABLE transactions 
+        ADD COLUMN request_transaction_id INTEGER REFERENCES transactions(transaction_id);
+        
+        RAISE NOTICE 'Column request_transaction_id added successfully';
+    ELSE
+        RAISE NOTICE 'Column request_transaction_id already exists';
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS ix_transactions_request_transaction_id
+    ON transactions (request_transaction_id);
+
+-- One-time backfill: returns used to store the link as a
+-- "REQUEST_TX_ID:<id>|remarks" prefix in remarks
+UPDATE transactions AS t
+SET request_transaction_id = CAST(substring(t.remarks FROM '^REQUEST_TX_ID:([0-9]+)') AS INTEGER)
+WHERE t.transaction_type = 'return'
+  AND t.request_transaction_id IS NULL
+  AND t.remarks ~ '^REQUEST_TX_ID:[0-9]+'
+  AND EXISTS (
+      SELECT 1 FROM transactions AS r
+      WHERE r.transaction_id = CAST(substring(t.remarks FROM '^REQUEST_TX_ID:([0-9]+)') AS INTEGER)
+  );
@@ -0,0 +1,16 @@
+-- Migration script to add the indexes behind barcode/QR scan lookups (GET /scan/{code})
+-- The backend also creates these on startup; run this script to build them
+-- ahead of time without blocking writes (CONCURRENTLY cannot run in a transaction block)
+-- Hash indexes: scans only ever compare codes for equality.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_inventory_part_number_hash
+    ON inventory USING hash (item_part_number);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_fixtures_asset_tag_hash
+    ON fixtures USING hash (asset_tag);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_fixtures_serial_number_hash
+    ON fixtures USING hash (fixture_serial_number);
+
+ANALYZE inventory;
+ANALYZE fixtures;
@@ -0,0 +1,31 @@
+-- Migration script to add the transactions index set
+-- The backend also creates these on startup; run this script to build them
+-- ahead of time without blocking writes (CONCURRENTLY cannot run in a transaction block)
+
+-- Date-range reports and keyset-paginated history
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_created_at_id
+    ON transactions (created_at, transaction_id);
+
+-- Per-user request history
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_employee_type_created
+    ON transactions (employee_id, transaction_type, created_at);
+
+-- Legacy return matching by item/employee/fixture
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_return_match
+    ON transactions (item_id, employee_id, fixture_id, created_at);
+
+-- History/report filters
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_type_created
+    ON transactions (transaction_type, created_at);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_project_created
+    ON transactions (project_name, created_at);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_test_area_created
+    ON transactions (test_area, created_at);
+
+-- Return-to-request links (see migration_add_request_transaction_id.sql)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_request_transaction_id
+    ON transactions (request_transaction_id);
+
+ANALYZE transactions;
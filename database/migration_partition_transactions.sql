@@ -0,0 +1,76 @@
+-- Migration script to convert the transactions table to monthly range partitions on created_at
+-- Run this script once, during a maintenance window, on an existing database.
+-- Afterwards the backend scheduler creates upcoming partitions and archives
+-- partitions older than TRANSACTION_RETENTION_MONTHS to backend/archive/transactions.
+--
+-- Notes:
+--  * A partitioned table's primary key must include the partition key, so the
+--    key becomes (transaction_id, created_at). transaction_id stays unique through
+--    its sequence.
+--  * Foreign keys that reference transactions(transaction_id) cannot point at a
+--    partitioned table without created_at, so they are dropped. The backend keeps
+--    request_transaction_id and open_checkouts consistent itself.
+
+BEGIN;
+
+ALTER TABLE open_checkouts DROP CONSTRAINT IF EXISTS open_checkouts_request_transaction_id_fkey;
+ALTER TABLE transactions DROP CONSTRAINT IF EXISTS transactions_request_transaction_id_fkey;
+
+ALTER TABLE transactions RENAME TO transactions_unpartitioned;
+
+UPDATE transactions_unpartitioned SET created_at = now() WHERE created_at IS NULL;
+
+-- Copy defaults, CHECK constraints, generated columns, storage and comments.
+-- Indexes are excluded: the old primary key on transaction_id alone is not valid
+-- on a partitioned table, so the key and indexes are created below.
+CREATE TABLE transactions (
+    LIKE transactions_unpartitioned INCLUDING ALL EXCLUDING INDEXES
+) PARTITION BY RANGE (created_at);
+
+ALTER TABLE transactions ADD PRIMARY KEY (transaction_id, created_at);
+ALTER TABLE transactions ADD FOREIGN KEY (item_id) REFERENCES inventory(item_id);
+ALTER TABLE transactions ADD FOREIGN KEY (employee_id) REFERENCES employees(employee_id);
+ALTER TABLE transactions ADD FOREIGN KEY (fixture_id) REFERENCES fixtures(fixture_id);
+
+-- Keep the id sequence when the old table is dropped
+ALTER SEQUENCE transactions_transaction_id_seq OWNED BY transactions.transaction_id;
+
+-- One partition per month from the oldest row up to two months ahead
+DO $$
+DECLARE
+    month_start DATE := date_trunc('month', COALESCE((SELECT MIN(created_at) FROM transactions_unpartitioned), now()))::date;
+    last_month DATE := (date_trunc('month', now()) + interval '2 months')::date;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF transactions FOR VALUES FROM (%L) TO (%L)',
+            'transactions_p' || to_char(month_start, 'YYYY_MM'),
+            month_start,
+            (month_start + interval '1 month')::date
+        );
+        month_start := (month_start + interval '1 month')::date;
+    END LOOP;
+END $$;
+
+-- No DEFAULT partition: once it held rows, creating the partition for their
+-- month would fail. The scheduler's daily archival job keeps the current month
+-- and PARTITION_MONTHS_AHEAD (2) months ahead created, so inserts at now() always
+-- have a partition; a row outside every partition is rejected instead.
+
+INSERT INTO transactions SELECT * FROM transactions_unpartitioned;
+
+DROP TABLE transactions_unpartitioned;
+
+-- Partitioned indexes (cascade to every partition)
+CREATE INDEX ix_transactions_transaction_id ON transactions (transaction_id);
+CREATE INDEX ix_transactions_request_transaction_id ON transactions (request_transaction_id);
+CREATE INDEX ix_transactions_created_at_id ON transactions (created_at, transaction_id);
+CREATE INDEX ix_transactions_employee_type_created ON transactions (employee_id, transaction_type, created_at);
+CREATE INDEX ix_transactions_return_match ON transactions (item_id, employee_id, fixture_id, created_at);
+CREATE INDEX ix_transactions_type_created ON transactions (transaction_type, created_at);
+CREATE INDEX ix_transactions_project_created ON transactions (project_name, created_at);
+CREATE INDEX ix_transactions_test_area_created ON transactions (test_area, created_at);
+
+COMMIT;
+
+ANALYZE transactions;